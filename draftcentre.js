@@ -1,6 +1,7 @@
 import { initializeApp } from "https://www.gstatic.com/firebasejs/10.8.0/firebase-app.js";
 import { getAuth, signInWithPopup, GoogleAuthProvider, onAuthStateChanged, signOut, setPersistence, browserSessionPersistence } from "https://www.gstatic.com/firebasejs/10.8.0/firebase-auth.js";
 import { getDatabase, ref, set, push, onValue, get, update, off, query, limitToLast, serverTimestamp, onDisconnect } from "https://www.gstatic.com/firebasejs/10.8.0/firebase-database.js";
+import { PlayerSearchIndex } from "./player-search.js";
 
 // Placeholder Firebase configuration
 const fallbackFirebaseConfig = {
@@ -22,6 +23,8 @@ const database = getDatabase();
 // --- Global State ---
 let currentUser = null;
 let allPlayers = [];
+let playerSearchIndex = null; // Prebuilt search index (player-search.js); allPlayers stays empty while it is used
+let playerSearchCount = 0;
 let draftedPlayers = [];
 let eliminatedPlayers = new Set();
 let eliminatedNHLTeams = new Set();
@@ -165,6 +168,7 @@ function resetUIState() {
     if (emptyQueueMessage) emptyQueueMessage.classList.remove('hidden');
 
     allPlayers = [];
+    playerSearchIndex = null;
     draftedPlayers = [];
     myDraftQueue = [];
     leagueData = null;
@@ -527,6 +531,7 @@ function setupLeagueListeners() {
         if (previousRound !== currentRound) {
             console.log(`🔥 Round changed from ${previousRound} to ${currentRound}, reloading player data...`);
             allPlayers = [];
+            playerSearchIndex = null;
             loadPlayerData();
             showNotification(`Round ${currentRound} has started! Player stats updated.`, 5000);
         }
@@ -571,7 +576,7 @@ function cleanupListeners() {
 
 // --- Player Data Handling ---
 function loadPlayerData() {
-    if (allPlayers && allPlayers.length > 0) {
+    if ((allPlayers && allPlayers.length > 0) || playerSearchIndex) {
         console.log("Player data already loaded.");
         filterPlayers();
         return;
@@ -582,6 +587,21 @@ function loadPlayerData() {
     }
 
     const dataSource = currentRound > 1 ? 'data/nhl_playoff_players.json' : 'data/nhl_players.json';
+    const indexSource = `data/search/${dataSource.split('/').pop().replace('.json', '')}`;
+
+    PlayerSearchIndex.load(indexSource)
+        .then(index => {
+            console.log(`Loaded search index for ${index.count} players from ${indexSource} (Round ${currentRound})`);
+            playerSearchIndex = index;
+            filterPlayers();
+        })
+        .catch(error => {
+            console.log(`Search index ${indexSource} not available (${error.message}), loading the full player file`);
+            loadPlayerFile(dataSource);
+        });
+}
+
+function loadPlayerFile(dataSource) {
     console.log(`Loading player data from ${dataSource} (Round ${currentRound})`);
 
     fetch(dataSource)
@@ -610,6 +630,10 @@ function loadPlayerData() {
 
 // --- Filtering & Rendering Players ---
 function filterPlayers() {
+    if (playerSearchIndex) {
+        filterIndexedPlayers();
+        return;
+    }
     if (!allPlayers || allPlayers.length === 0 || !playerTableBody) return;
 
     const searchTerm = document.getElementById('searchInput')?.value.toLowerCase().trim() || '';
@@ -636,28 +660,55 @@ function filterPlayers() {
     }
 
     // Apply sorting
-    if (currentSortColumn) {
-        filtered.sort((a, b) => {
-            let aValue = a[currentSortColumn];
-            let bValue = b[currentSortColumn];
-            const defaultStr = '';
-            const defaultNum = -Infinity;
-
-            if (typeof aValue === 'string' || typeof bValue === 'string') {
-                aValue = (aValue ?? defaultStr).toString().toLowerCase();
-                bValue = (bValue ?? defaultStr).toString().toLowerCase();
-                return currentSortDirection === 'asc' ? aValue.localeCompare(bValue) : bValue.localeCompare(aValue);
-            } else {
-                aValue = Number(aValue ?? defaultNum);
-                bValue = Number(bValue ?? defaultNum);
-                return currentSortDirection === 'asc' ? aValue - bValue : bValue - aValue;
-            }
-        });
+    filtered.sort(comparePlayers);
+
+    renderPlayerTable(filtered, draftedIdsSet);
+}
+
+function comparePlayers(a, b) {
+    if (!currentSortColumn) {
+        return (a.fullName || '').localeCompare(b.fullName || '');
+    }
+    let aValue = a[currentSortColumn];
+    let bValue = b[currentSortColumn];
+    const defaultStr = '';
+    const defaultNum = -Infinity;
+
+    if (typeof aValue === 'string' || typeof bValue === 'string') {
+        aValue = (aValue ?? defaultStr).toString().toLowerCase();
+        bValue = (bValue ?? defaultStr).toString().toLowerCase();
+        return currentSortDirection === 'asc' ? aValue.localeCompare(bValue) : bValue.localeCompare(aValue);
     } else {
-        filtered.sort((a, b) => (a.fullName || '').localeCompare(b.fullName || ''));
+        aValue = Number(aValue ?? defaultNum);
+        bValue = Number(bValue ?? defaultNum);
+        return currentSortDirection === 'asc' ? aValue - bValue : bValue - aValue;
     }
+}
 
-    renderPlayerTable(filtered, draftedIdsSet);
+// Same filters as filterPlayers, answered from the search index's shards instead of the full player file
+function filterIndexedPlayers() {
+    if (!playerTableBody) return;
+
+    const searchTerm = document.getElementById('searchInput')?.value.trim() || '';
+    const index = playerSearchIndex;
+    const searchNumber = ++playerSearchCount;
+
+    index.search({ term: searchTerm, position: currentPositionFilter, sortColumn: currentSortColumn, sortDirection: currentSortDirection })
+        .then(({ players, sorted }) => {
+            // A newer search (another keystroke, filter or league) has taken over the table
+            if (searchNumber !== playerSearchCount || index !== playerSearchIndex) return;
+
+            const showDrafted = document.getElementById('showDrafted')?.checked || false;
+            const draftedIdsSet = new Set(draftedPlayers.map(dp => dp.playerId?.toString()));
+            let filtered = showDrafted ? players : players.filter(player => !draftedIdsSet.has(player.id?.toString()));
+            if (!sorted) filtered.sort(comparePlayers);
+
+            renderPlayerTable(filtered, draftedIdsSet);
+        })
+        .catch(error => {
+            console.error('Error searching player index:', error);
+            showNotification('Error loading NHL player data. Check console.', 7000);
+        });
 }
 
 function renderPlayerTable(playersToRender, draftedIdsSet) {
@@ -1077,6 +1128,7 @@ function startDraft() {
         showNotification("Round 1 started!");
 
         allPlayers = [];
+        playerSearchIndex = null;
         loadPlayerData();
     }).catch((error) => {
         console.error("Error starting draft:", error);
@@ -1137,6 +1189,7 @@ function setupEventListeners() {
     if (refreshBtn) {
         refreshBtn.addEventListener('click', function() {
             allPlayers = [];
+            playerSearchIndex = null;
             if (playerTableBody) {
                 playerTableBody.innerHTML = `<tr><td colspan="10" style="text-align: center;"><div class="loader"></div></td></tr>`;
             }
@@ -1736,6 +1789,7 @@ function handleSaveDraftOrder() {
             });
 
             allPlayers = [];
+            playerSearchIndex = null;
             loadPlayerData();
         })
         .catch((error) => {
@@ -243,37 +243,69 @@ function loadLeagueData() {
     });
 }
 
-// Load player stats from updatedstats JSON file
+const rawGitHubBaseUrl = 'https://raw.githubusercontent.com/randyj18/Fantasy_Hockey/master/data/';
+
+// Load this league's stats through data/manifest.json, which points at the current
+// content-hashed bundle. Returns the stats rows, or null if there is no usable manifest.
+async function loadStatsBundle() {
+    try {
+        const manifestResponse = await fetch(`${rawGitHubBaseUrl}manifest.json`, { cache: 'no-cache' });
+        if (!manifestResponse.ok) {
+            return null;
+        }
+        const manifest = await manifestResponse.json();
+        const entry = (manifest.leagues && manifest.leagues[leagueId]) || manifest.default;
+        if (!entry || !entry.path) {
+            return null;
+        }
+        // Bundle names change whenever their content does, so they can be cached freely
+        const bundleResponse = await fetch(`${rawGitHubBaseUrl}${entry.path}`);
+        if (!bundleResponse.ok) {
+            return null;
+        }
+        const bundle = await bundleResponse.json();
+        console.log(`Loaded stats bundle ${entry.path} for ${manifest.date}`);
+        return bundle.stats;
+    } catch (error) {
+        console.warn("Could not load stats through manifest.json, falling back to dated files:", error);
+        return null;
+    }
+}
+
+// Load player stats from the manifest bundle, or the dated updatedstats JSON file
 async function loadPlayerStats() {
     try {
-        const now = new Date();
-        // Format to match 'YYYYMMDD' e.g. '20250527'
-        const currentDate = now.toISOString().split('T')[0].replace(/-/g, ''); // Example: 20250527
+        let data = await loadStatsBundle();
         
-        const rawGitHubBaseUrl = 'https://raw.githubusercontent.com/randyj18/Fantasy_Hockey/master/data/';
-        const latestStatsFile = `${rawGitHubBaseUrl}updatedstats-${currentDate}.json`;
-        
-        let response = await fetch(latestStatsFile);
-        
-        if (!response.ok) {
-            console.warn(`Stats file for today (${currentDate}) not found, trying yesterday's file`);
-            const yesterday = new Date();
-            yesterday.setDate(yesterday.getDate() - 1);
-            const yesterdayDate = yesterday.toISOString().split('T')[0].replace(/-/g, ''); // Example: 20250526
+        if (data === null) {
+            const now = new Date();
+            // Format to match 'YYYYMMDD' e.g. '20250527'
+            const currentDate = now.toISOString().split('T')[0].replace(/-/g, ''); // Example: 20250527
             
-            const yesterdayStatsFile = `${rawGitHubBaseUrl}updatedstats-${yesterdayDate}.json`;
-            response = await fetch(yesterdayStatsFile);
+            const latestStatsFile = `${rawGitHubBaseUrl}updatedstats-${currentDate}.json`;
+            
+            let response = await fetch(latestStatsFile);
             
             if (!response.ok) {
-                console.warn(`Stats file for yesterday (${yesterdayDate}) also not found. Player stats will be empty.`);
-                playerStats = {};
-                playerStatsByID = {};
-                return {}; // Return empty if no recent file found
+                console.warn(`Stats file for today (${currentDate}) not found, trying yesterday's file`);
+                const yesterday = new Date();
+                yesterday.setDate(yesterday.getDate() - 1);
+                const yesterdayDate = yesterday.toISOString().split('T')[0].replace(/-/g, ''); // Example: 20250526
+                
+                const yesterdayStatsFile = `${rawGitHubBaseUrl}updatedstats-${yesterdayDate}.json`;
+                response = await fetch(yesterdayStatsFile);
+                
+                if (!response.ok) {
+                    console.warn(`Stats file for yesterday (${yesterdayDate}) also not found. Player stats will be empty.`);
+                    playerStats = {};
+                    playerStatsByID = {};
+                    return {}; // Return empty if no recent file found
+                }
             }
+            
+            data = await response.json();
         }
         
-        const data = await response.json();
-        
         playerStats = {}; // Reset before populating
         playerStatsByID = {}; // Reset before populating
 
@@ -282,14 +314,15 @@ async function loadPlayerStats() {
                 const id = playerEntry.playerId || playerEntry["Player ID"]; // Accommodate both potential ID fields
                 if (id) {
                     // Ensure currentPlayoffStats exists and has the expected structure
-                    const currentStats = playerEntry.currentPlayoffStats || {};
+                    // Rows written by fetch_stats.py keep the stats at the top level
+                    const currentStats = playerEntry.currentPlayoffStats || playerEntry;
                     playerStatsByID[id.toString()] = {
                         goals: currentStats.Goals || 0,
                         assists: currentStats.Assists || 0,
                         wins: currentStats.Wins || 0,
                         shutouts: currentStats.Shutouts || 0,
                         // PointsBeforeAcquiring is directly from the playerEntry, not nested in currentPlayoffStats
-                        pointsBeforeAcquiring: playerEntry.pointsBeforeAcquiring || 0 
+                        pointsBeforeAcquiring: playerEntry.pointsBeforeAcquiring || playerEntry["Points Before Acquiring"] || 0
                     };
                 } else {
                     console.warn("Player entry without ID in stats file:", playerEntry);
@@ -0,0 +1,141 @@
+// Client for the sharded player search index written by scripts/search_index.py.
+// index.json lists the shards; each one is fetched the first time a query needs it.
+
+const TOKEN_SEPARATORS = /[\s\-'.]+/;
+
+// Lowercase with accents removed and whitespace collapsed, as normalize_name in search_index.py
+export function normalizeName(name) {
+    return (name || '').normalize('NFD').replace(/[\u0300-\u036f]/g, '').toLowerCase()
+        .split(/\s+/).filter(Boolean).join(' ');
+}
+
+function shardKey(term) {
+    const first = term[0];
+    return (first >= 'a' && first <= 'z') || (first >= '0' && first <= '9') ? first : '_';
+}
+
+function trigrams(text) {
+    const grams = new Set();
+    for (let i = 0; i + 3 <= text.length; i++) grams.add(text.slice(i, i + 3));
+    return grams;
+}
+
+export class PlayerSearchIndex {
+    constructor(baseUrl, index) {
+        this.baseUrl = baseUrl;
+        this.index = index;
+        this.shards = new Map();
+        this.players = new Map();
+        this.positionDocs = null;
+        // Players are numbered by team, so each record shard holds one range of documents
+        this.teamRanges = Object.values(index.teams)
+            .map(team => ({ start: team.docs[0], end: team.docs[1], shard: team.shard }))
+            .sort((a, b) => a.start - b.start);
+    }
+
+    static async load(baseUrl) {
+        const response = await fetch(`${baseUrl}/index.json`, { cache: 'no-cache' });
+        if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
+        const index = await response.json();
+        if (index.version !== 1) throw new Error(`Unsupported search index version ${index.version}`);
+        return new PlayerSearchIndex(baseUrl, index);
+    }
+
+    get count() {
+        return this.index.count;
+    }
+
+    // Shard names change with their content, so a fetched shard never goes stale
+    shard(entry) {
+        if (!this.shards.has(entry.path)) {
+            const request = fetch(`${this.baseUrl}/${entry.path}`).then(response => {
+                if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
+                return response.json();
+            });
+            request.catch(() => this.shards.delete(entry.path));
+            this.shards.set(entry.path, request);
+        }
+        return this.shards.get(entry.path);
+    }
+
+    teamRangeOf(doc) {
+        let low = 0;
+        let high = this.teamRanges.length - 1;
+        while (low < high) {
+            const middle = (low + high + 1) >> 1;
+            if (this.teamRanges[middle].start <= doc) low = middle;
+            else high = middle - 1;
+        }
+        return this.teamRanges[low];
+    }
+
+    // Player objects (the fields of the player files) for documents, loading only their teams' shards
+    async records(docs) {
+        const ranges = new Set(docs.filter(doc => !this.players.has(doc)).map(doc => this.teamRangeOf(doc)));
+        await Promise.all([...ranges].map(async range => {
+            const rows = await this.shard(range.shard);
+            rows.forEach((row, offset) => {
+                const player = {};
+                this.index.fields.forEach((field, i) => { player[field] = row[i]; });
+                this.players.set(range.start + offset, player);
+            });
+        }));
+        return docs.map(doc => this.players.get(doc));
+    }
+
+    // Documents whose name contains the term (name token prefixes for one or two characters), or null without a term
+    async matching(term) {
+        const query = normalizeName(term);
+        if (!query) return null;
+        if (query.length < 3) {
+            const prefix = query.split(TOKEN_SEPARATORS).filter(Boolean)[0];
+            const entry = prefix && this.index.prefix[shardKey(prefix)];
+            const table = entry ? await this.shard(entry) : {};
+            return new Set(table[prefix] || []);
+        }
+
+        const postings = await Promise.all([...trigrams(query)].map(async gram => {
+            const entry = this.index.trigram[shardKey(gram)];
+            const table = entry ? await this.shard(entry) : {};
+            return table[gram] || [];
+        }));
+        postings.sort((a, b) => a.length - b.length);
+        let candidates = postings[0];
+        for (const list of postings.slice(1)) {
+            const docs = new Set(list);
+            candidates = candidates.filter(doc => docs.has(doc));
+        }
+        // Sharing every trigram does not make the query a substring; check the names themselves
+        const players = await this.records(candidates);
+        return new Set(candidates.filter((doc, i) => normalizeName(players[i].fullName).includes(query)));
+    }
+
+    async withPosition(position) {
+        if (!this.positionDocs) {
+            const table = await this.shard(this.index.facets.position.shard);
+            this.positionDocs = new Map(Object.entries(table).map(([code, docs]) => [code, new Set(docs)]));
+        }
+        return this.positionDocs.get(position) || new Set();
+    }
+
+    // Players matching a search term and position ('all' for any), in presorted order when the
+    // column has one. `sorted` is false when the caller still has to sort them.
+    async search({ term = '', position = 'all', sortColumn = null, sortDirection = 'asc' } = {}) {
+        const [matches, positionDocs] = await Promise.all([
+            this.matching(term),
+            position === 'all' ? null : this.withPosition(position),
+        ]);
+        const keep = doc => (!matches || matches.has(doc)) && (!positionDocs || positionDocs.has(doc));
+
+        const order = this.index.orders[sortColumn || 'fullName'];
+        let docs;
+        if (order) {
+            const pages = await Promise.all(order.pages.map(page => this.shard(page)));
+            docs = pages.flat().filter(keep);
+            if ((sortColumn ? sortDirection : 'asc') !== order.direction) docs.reverse();
+        } else {
+            docs = (matches ? [...matches] : Array.from({ length: this.count }, (_, doc) => doc)).filter(keep);
+        }
+        return { players: await this.records(docs), sorted: Boolean(order) };
+    }
+}
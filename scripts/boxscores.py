@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+import os
+import json
+import argparse
+import logging
+from datetime import date, datetime, timedelta
+
+import requests
+
+from nhl_api import DEFAULT_TIMEOUT, FINISHED_GAME_STATES, create_session, fetch_boxscore, fetch_finished_games, fetch_play_by_play
+from club_stats import PLAYOFFS, current_season
+from data_io import iter_jsonl
+
+logger = logging.getLogger(__name__)
+
+# Game states while the puck is in play or between periods
+LIVE_GAME_STATES = ('LIVE', 'CRIT')
+# Game states in which the boxscore has player lines
+STARTED_GAME_STATES = LIVE_GAME_STATES + FINISHED_GAME_STATES
+# Only an official ('OFF') game goes in the ledger; a 'FINAL' boxscore can still change
+OFFICIAL_GAME_STATES = ('OFF',)
+# Games from this many days before the last run are fetched again, to pick up stat corrections
+CORRECTION_DAYS = 2
+# Stat columns of a boxscore player line, as named in updatedstats-*.json
+LINE_FIELDS = ("Games Played", "Goals", "Assists", "Wins", "Shutouts", "PIM")
+# Bonus column calculate_standings scores: one per goal, assist and fight in the same game
+GORDIE_HOWE_FIELD = "Points for Gordie Howe Hattricks"
+# Fighting majors are five minutes, so a player without that many can not have fought
+FIGHTING_MAJOR_MINUTES = 5
+
+# One JSON line per finished playoff game, committed with the other data files
+LEDGER_FILE = os.path.join('data', 'boxscore-ledger.jsonl')
+# An empty ledger is filled from this day of the season's final year; no playoff game is earlier
+PLAYOFFS_EARLIEST = (4, 1)
+
+
+def _goalie_played(goalie):
+    return goalie.get('toi') not in (None, '', '00:00')
+
+
+def player_lines(boxscore):
+    """
+    {player ID: stat line} for one game, with the LINE_FIELDS of every player who dressed
+    (goalies only if they played). Wins and shutouts are only credited once the game is over;
+    a shutout needs the winning goalie to have played the whole game.
+    """
+    final = boxscore.get('gameState') in FINISHED_GAME_STATES
+    lines = {}
+    for side in ('homeTeam', 'awayTeam'):
+        team_stats = (boxscore.get('playerByGameStats') or {}).get(side) or {}
+        for group in ('forwards', 'defense'):
+            for skater in team_stats.get(group) or []:
+                lines[str(skater['playerId'])] = {
+                    "Games Played": 1,
+                    "Goals": skater.get('goals', 0),
+                    "Assists": skater.get('assists', 0),
+                    "Wins": 0,
+                    "Shutouts": 0,
+                    "PIM": skater.get('pim', 0),
+                }
+        goalies = [goalie for goalie in team_stats.get('goalies') or [] if _goalie_played(goalie)]
+        for goalie in goalies:
+            won = final and goalie.get('decision') == 'W'
+            lines[str(goalie['playerId'])] = {
+                "Games Played": 1,
+                "Goals": goalie.get('goals', 0),
+                "Assists": goalie.get('assists', 0),
+                "Wins": int(won),
+                "Shutouts": int(won and len(goalies) == 1 and goalie.get('goalsAgainst', 0) == 0),
+                "PIM": goalie.get('pim', 0),
+            }
+    return lines
+
+
+def game_teams(game):
+    """Abbreviations of the two teams in a schedule or boxscore game"""
+    return {game.get(side, {}).get('abbrev') for side in ('homeTeam', 'awayTeam')} - {None}
+
+
+def gordie_howe_candidates(lines):
+    """Players with a goal, an assist and enough penalty minutes for a fight in one game's lines"""
+    return {player_id for player_id, line in lines.items()
+            if line.get("Goals", 0) >= 1 and line.get("Assists", 0) >= 1 and line.get("PIM", 0) >= FIGHTING_MAJOR_MINUTES}
+
+
+def fighters(play_by_play):
+    """IDs of the players given a fighting major in a game's play-by-play"""
+    players = set()
+    for play in play_by_play.get('plays', []):
+        details = play.get('details') or {}
+        if play.get('typeDescKey') == 'penalty' and details.get('descKey') == 'fighting' \
+                and details.get('committedByPlayerId'):
+            players.add(str(details['committedByPlayerId']))
+    return players
+
+
+class BoxscoreLedger:
+    """
+    The player lines of every finished playoff game, stored one JSON line per game keyed by
+    game ID. A corrected game is appended again and its last line wins; ingesting an unchanged
+    game again changes nothing. Player totals and bonuses are derived from the lines.
+    """
+
+    def __init__(self, path=LEDGER_FILE):
+        self.path = path
+        self.games = {}
+        if os.path.exists(path):
+            for entry in iter_jsonl(path):
+                self.games[str(entry['gameId'])] = entry
+
+    def __contains__(self, game_id):
+        return str(game_id) in self.games
+
+    def __len__(self):
+        return len(self.games)
+
+    def add(self, entry):
+        """Append one game, replacing an earlier line for it; returns False if that line is the same"""
+        game_id = str(entry['gameId'])
+        if self.games.get(game_id) == entry:
+            return False
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(entry, separators=(',', ':'), sort_keys=True) + '\n')
+        self.games[game_id] = entry
+        return True
+
+    def last_game_date(self):
+        dates = [entry['date'] for entry in self.games.values() if entry.get('date')]
+        return datetime.strptime(max(dates), '%Y-%m-%d').date() if dates else None
+
+    def totals(self, season=None):
+        """
+        {player ID: summed LINE_FIELDS plus Gordie Howe hat tricks} over every game, or only the
+        games of a season such as '20242025' (game IDs start with the season's first year)
+        """
+        totals = {}
+        for game_id, entry in self.games.items():
+            if season is not None and not game_id.startswith(season[:4]):
+                continue
+            for player_id, line in entry['lines'].items():
+                player_totals = totals.setdefault(player_id, dict.fromkeys(LINE_FIELDS + (GORDIE_HOWE_FIELD,), 0))
+                for field in LINE_FIELDS:
+                    player_totals[field] += line.get(field, 0)
+            for player_id in entry.get('gordieHowe', []):
+                totals[player_id][GORDIE_HOWE_FIELD] += 1
+        return totals
+
+
+def ledger_entry(game, boxscore, gordie_howe=()):
+    """The ledger line for one finished game"""
+    return {
+        "gameId": game['id'],
+        "date": game.get('gameDate') or boxscore.get('gameDate'),
+        "startTimeUTC": game.get('startTimeUTC') or boxscore.get('startTimeUTC'),
+        "teams": sorted(game_teams(boxscore) or game_teams(game)),
+        "lines": player_lines(boxscore),
+        "gordieHowe": sorted(gordie_howe),
+    }
+
+
+def ingest_game(ledger, game, session=None, timeout=DEFAULT_TIMEOUT):
+    """
+    Add or correct one official game: its boxscore, plus the play-by-play only when a player's
+    line could hold a Gordie Howe hat trick. Returns False if the game is not official yet or
+    its lines have not changed.
+    """
+    boxscore = fetch_boxscore(game['id'], session, timeout)
+    if boxscore.get('gameState') not in OFFICIAL_GAME_STATES:
+        return False
+    candidates = gordie_howe_candidates(player_lines(boxscore))
+    gordie_howe = candidates & fighters(fetch_play_by_play(game['id'], session, timeout)) if candidates else set()
+    return ledger.add(ledger_entry(game, boxscore, gordie_howe))
+
+
+def ledger_start_date(ledger, today=None):
+    """
+    First day to look for new or corrected games: CORRECTION_DAYS before the ledger's last game
+    day, or the start of this season's playoffs
+    """
+    today = today or datetime.now().date()
+    playoffs_start = date(int(current_season(today)[4:]), *PLAYOFFS_EARLIEST)
+    last = ledger.last_game_date()
+    # Games later on the last game day may have finished after the last run
+    return max(last - timedelta(days=CORRECTION_DAYS), playoffs_start) if last is not None else playoffs_start
+
+
+def ingest_finished_games(ledger, start_date=None, end_date=None, session=None, timeout=DEFAULT_TIMEOUT):
+    """
+    Add every official playoff game between the dates that is not in the ledger yet, and
+    correct the games of the last CORRECTION_DAYS: one schedule request per week and one
+    boxscore per new or recent game. Games that fail are retried on the next run. Returns the
+    number of games added or corrected.
+    """
+    end_date = end_date or datetime.now().date()
+    start_date = start_date or ledger_start_date(ledger, end_date)
+    if start_date > end_date:
+        return 0
+    recent = (end_date - timedelta(days=CORRECTION_DAYS)).isoformat()
+    added = 0
+    for game in fetch_finished_games(start_date, end_date, session, timeout):
+        if game.get('gameType') != PLAYOFFS:
+            continue
+        if game['id'] in ledger and (game.get('gameDate') or '') < recent:
+            continue
+        try:
+            if ingest_game(ledger, game, session, timeout):
+                added += 1
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"Failed to ingest game {game['id']}, it will be retried next run: {e}")
+    logger.info(f"Boxscore ledger: {added} games added or corrected, {len(ledger)} games in {ledger.path}")
+    return added
+
+
+def update_ledger(path=LEDGER_FILE, session=None, timeout=DEFAULT_TIMEOUT):
+    """The ledger with every game finished since the last run added and recent games corrected"""
+    ledger = BoxscoreLedger(path)
+    ingest_finished_games(ledger, session=session, timeout=timeout)
+    return ledger
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Add official playoff games to the boxscore ledger")
+    parser.add_argument("--since", default=None,
+                        help="First day to look for games, YYYY-MM-DD (default: the ledger's last game day)")
+    parser.add_argument("--ledger", default=LEDGER_FILE, help=f"Ledger file (default: {LEDGER_FILE})")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT,
+                        help=f"Per-request timeout in seconds (default: {DEFAULT_TIMEOUT})")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    args = parse_args(argv)
+    ledger = BoxscoreLedger(args.ledger)
+    since = datetime.strptime(args.since, '%Y-%m-%d').date() if args.since else None
+    session = create_session(2)
+    try:
+        ingest_finished_games(ledger, since, session=session, timeout=args.timeout)
+    finally:
+        session.close()
+    bonuses = sum(len(entry.get('gordieHowe', [])) for entry in ledger.games.values())
+    print(f"{len(ledger)} games in the ledger, {bonuses} Gordie Howe hat tricks")
+    return ledger
+
+
+if __name__ == "__main__":
+    main()
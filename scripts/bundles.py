@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+import os
+import gzip
+import json
+import hashlib
+import argparse
+import logging
+from datetime import datetime, timezone
+
+from data_io import LEAGUES_DATA_DIR, atomic_open
+from snapshots import latest_snapshot
+
+try:
+    import brotli
+except ImportError:  # .br variants are skipped without the brotli package
+    brotli = None
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DATA_DIR = 'data'
+# Points at the current bundles; the only front-end data file whose name never changes
+MANIFEST_FILE = os.path.join(DATA_DIR, 'manifest.json')
+BUNDLES_DIR = os.path.join(DATA_DIR, 'bundles')
+# Bundle name for the stats and standings of fetch_stats.py/calculate_standings.py
+DEFAULT_BUNDLE = 'default'
+HASH_LENGTH = 12
+
+
+def minified_json(data):
+    """Compact UTF-8 JSON with stable key order, so identical data always hashes the same"""
+    return json.dumps(data, separators=(',', ':'), sort_keys=True, ensure_ascii=False).encode('utf-8')
+
+
+def content_hash(payload):
+    return hashlib.sha256(payload).hexdigest()[:HASH_LENGTH]
+
+
+def _write_bytes(path, payload):
+    with atomic_open(path, 'wb') as f:
+        f.write(payload)
+
+
+def write_bundle(name, data, bundles_dir=BUNDLES_DIR):
+    """
+    Write `data` as bundles/<name>.<hash>.json plus .gz and (with brotli installed) .br
+    variants. A file with the same hash already holds the same bytes, so it is not rewritten.
+    Returns the manifest entry for the bundle.
+    """
+    payload = minified_json(data)
+    digest = content_hash(payload)
+    path = os.path.join(bundles_dir, f"{name}.{digest}.json")
+    encodings = {'gzip': '.gz'}
+    if brotli is not None:
+        encodings['br'] = '.br'
+
+    if not os.path.exists(path):
+        _write_bytes(path, payload)
+        # mtime=0 keeps the gzip bytes identical between runs
+        _write_bytes(path + '.gz', gzip.compress(payload, compresslevel=9, mtime=0))
+        if brotli is not None:
+            _write_bytes(path + '.br', brotli.compress(payload))
+
+    return {
+        "path": os.path.relpath(path, os.path.dirname(bundles_dir)).replace(os.sep, '/'),
+        "hash": digest,
+        "bytes": len(payload),
+        "encodings": sorted(encodings),
+    }
+
+
+def bundle_files(entry, bundles_dir=BUNDLES_DIR):
+    """Every file on disk that belongs to a manifest entry"""
+    path = os.path.normpath(os.path.join(os.path.dirname(bundles_dir), entry["path"]))
+    return {path, path + '.gz', path + '.br'}
+
+
+def load_manifest(path=MANIFEST_FILE):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def manifest_entries(manifest):
+    """All bundle entries in a manifest: the default bundle and one per league"""
+    entries = [manifest[DEFAULT_BUNDLE]] if manifest.get(DEFAULT_BUNDLE) else []
+    return entries + list((manifest.get('leagues') or {}).values())
+
+
+def prune_bundles(keep_manifests, bundles_dir=BUNDLES_DIR):
+    """
+    Delete bundle files none of `keep_manifests` refers to. The previous manifest is kept
+    alongside the new one so clients that fetched it a moment ago can still load its bundles.
+    """
+    keep = set()
+    for manifest in keep_manifests:
+        for entry in manifest_entries(manifest):
+            keep |= bundle_files(entry, bundles_dir)
+    removed = 0
+    if os.path.isdir(bundles_dir):
+        for name in os.listdir(bundles_dir):
+            path = os.path.normpath(os.path.join(bundles_dir, name))
+            if path not in keep and os.path.isfile(path):
+                os.remove(path)
+                removed += 1
+    return removed
+
+
+def write_bundles(updated_stats, standings, league_results=None, run_date=None,
+                  manifest_path=MANIFEST_FILE, bundles_dir=BUNDLES_DIR):
+    """
+    Write the content-hashed bundles for a run and point the manifest at them.
+    The default bundle holds the updatedstats rows and standings; each league in
+    league_results ({league_id: (rows, standings)}) gets its own bundle.
+    """
+    date_str = (run_date or datetime.now()).strftime("%Y%m%d")
+    previous = load_manifest(manifest_path)
+    manifest = {
+        "generatedAt": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        "date": date_str,
+        DEFAULT_BUNDLE: write_bundle(DEFAULT_BUNDLE, {"date": date_str, "stats": updated_stats, "standings": standings},
+                                     bundles_dir),
+        "leagues": {},
+    }
+    for league_id, (rows, league_standings) in sorted((league_results or {}).items()):
+        manifest["leagues"][league_id] = write_bundle(
+            f"league-{league_id}", {"date": date_str, "stats": rows, "standings": league_standings}, bundles_dir)
+
+    with atomic_open(manifest_path) as f:
+        json.dump(manifest, f, indent=2)
+    removed = prune_bundles([manifest, previous], bundles_dir)
+    logger.info(f"Wrote manifest for {date_str} with {len(manifest['leagues'])} league bundles "
+                f"(default bundle {manifest[DEFAULT_BUNDLE]['bytes']} bytes), removed {removed} old bundle files")
+    return manifest
+
+
+def _load_latest(prefix, data_dir):
+    day, path = latest_snapshot(prefix, data_dir)
+    if path is None:
+        return None, None
+    with open(path, 'r') as f:
+        return day, json.load(f)
+
+
+def load_latest_outputs(data_dir=DATA_DIR, leagues_dir=LEAGUES_DATA_DIR):
+    """
+    (run date, updatedstats rows, standings, {league_id: (rows, standings)}) from the newest
+    snapshot files on disk, for building bundles after the individual scripts have run
+    """
+    day, updated_stats = _load_latest('updatedstats', data_dir)
+    _, standings = _load_latest('standings', data_dir)
+    league_results = {}
+    if os.path.isdir(leagues_dir):
+        for league_id in sorted(os.listdir(leagues_dir)):
+            league_dir = os.path.join(leagues_dir, league_id)
+            _, rows = _load_latest('updatedstats', league_dir)
+            _, league_standings = _load_latest('standings', league_dir)
+            if rows is not None and league_standings is not None:
+                league_results[league_id] = (rows, league_standings)
+    run_date = datetime.combine(day, datetime.min.time()) if day else None
+    return run_date, updated_stats or [], standings or [], league_results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Write content-hashed front-end bundles and data/manifest.json from the latest outputs")
+    parser.add_argument("--manifest", default=MANIFEST_FILE, help=f"Manifest path (default: {MANIFEST_FILE})")
+    parser.add_argument("--bundles-dir", default=BUNDLES_DIR, help=f"Bundle directory (default: {BUNDLES_DIR})")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    run_date, updated_stats, standings, league_results = load_latest_outputs()
+    if run_date is None:
+        logger.error("No updatedstats snapshot found; nothing to bundle")
+        return None
+    return write_bundles(updated_stats, standings, league_results, run_date, args.manifest, args.bundles_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,98 +1,182 @@
 import os
 import json
-import glob
+import argparse
 from datetime import datetime
 
-def calculate_standings(stats_file_path):
+import numpy as np
+
+from snapshots import latest_snapshot
+from data_io import atomic_open
+from history_store import record_snapshot
+from scoring_rules import SCORING_COLUMNS, DEFAULT_SCORING, default_rules
+from fingerprints import FingerprintStore, fingerprint
+from metrics import METRICS, add_metrics_args, finish_run, record_run_caches, start_run
+
+def calculate_standings(stats_file_path, rules=DEFAULT_SCORING):
     """Calculate standings based on player stats"""
     with open(stats_file_path, 'r') as file:
         players = json.load(file)
     
-    # Initialize standings dictionary
-    standings = {}
-    
-    # Process each player
-    for player in players:
-        # Skip if missing critical data
-        if not player.get("Player ID") or not player.get("Team"):
+    return calculate_standings_from_players(players, rules)
+
+# Stat columns that count towards a player's points, and the default points each unit is worth.
+# Scoring is configured in scoring_rules.py (per league, or data/scoring_rules.json).
+SCORING_WEIGHTS = DEFAULT_SCORING.weights
+# Stat columns summed per team in the standings output
+TEAM_STAT_COLUMNS = ("Goals", "Assists", "Wins", "Shutouts")
+
+def _flatten_player(player):
+    """Convert a nested draftedPlayers-style row to the flat updatedstats row shape"""
+    row = dict(player.get("currentPlayoffStats") or {})
+    row["Player ID"] = player.get("playerId")
+    row["Team"] = player.get("FantasyTeam")
+    row["Position"] = player.get("Position")
+    # Only subtract pre-acquisition points recorded for the round the player was acquired in
+    round_drafted = player.get("playoffRoundDrafted", 0)
+    if round_drafted > 1 and player.get("preAcqRound", 0) >= round_drafted:
+        row["Points Before Acquiring"] = player.get("pointsBeforeAcquiring", 0)
+    return row
+
+def _column(rows, name):
+    """One stat column as an array; missing values count as 0"""
+    return np.array([row.get(name, 0) for row in rows])
+
+def load_player_columns(players, groups=None):
+    """
+    Load player rows into columns for vectorized scoring.
+    Accepts the flat updatedstats rows ("Player ID", "Team", "Goals", ..., "Points Before Acquiring")
+    and the nested draftedPlayers shape ("playerId", "FantasyTeam", "currentPlayoffStats", ...).
+    Rows missing a player ID or fantasy team are skipped. If `groups` (aligned with players) is
+    given, teams are keyed by (group, team) so several leagues can be scored in one pass.
+    Returns (team keys in first-seen order, dict of column arrays plus the list of player IDs).
+    """
+    rows = [player if "Player ID" in player or "Team" in player else _flatten_player(player)
+            for player in players]
+    if groups is None:
+        rows = [row for row in rows if row.get("Player ID") and row.get("Team")]
+        keys = [row["Team"] for row in rows]
+    else:
+        keys = [(group, row["Team"]) for row, group in zip(rows, groups) if row.get("Player ID") and row.get("Team")]
+        rows = [row for row in rows if row.get("Player ID") and row.get("Team")]
+
+    team_index = {}
+    teams = [team_index.setdefault(key, len(team_index)) for key in keys]
+
+    stats = np.zeros((len(rows), len(SCORING_COLUMNS)), dtype=np.int64)
+    for i, name in enumerate(SCORING_COLUMNS):
+        # Bonus columns are rarely present; skip building them when no row has them
+        if i >= len(TEAM_STAT_COLUMNS) and not any(name in row for row in rows):
             continue
-        
-        # Get team name
-        team = player.get("Team")
-        
-        # Initialize team in standings if not already present
-        if team not in standings:
-            standings[team] = {
-                "Total Points": 0,
-                "Players": 0,
-                "Goals": 0,
-                "Assists": 0,
-                "Wins": 0,
-                "Shutouts": 0
-            }
-        
-        # Calculate player points based on stats
-        # Use 0 as default value for any missing fields
-        player_points = (
-            # Points from goals and assists for skaters
-            player.get("Goals", 0) + 
-            player.get("Assists", 0) + 
-            # Points from wins and shutouts for goalies (2 points each)
-            (player.get("Wins", 0) * 2) + 
-            (player.get("Shutouts", 0)) +
-            # Special bonuses (if present)
-            player.get("Points for Gordie Howe Hattricks", 0) + 
-            player.get("Points for Conn Smythe", 0) -
-            # Points before acquiring (for mid-season additions)
-            player.get("Points Before Acquiring", 0)
-        )
-        
-        # Update team stats
-        standings[team]["Total Points"] += player_points
-        standings[team]["Players"] += 1
-        standings[team]["Goals"] += player.get("Goals", 0)
-        standings[team]["Assists"] += player.get("Assists", 0)
-        standings[team]["Wins"] += player.get("Wins", 0)
-        standings[team]["Shutouts"] += player.get("Shutouts", 0)
-    
-    # Sort teams by total points (descending)
-    sorted_standings = sorted(
-        standings.items(),
-        key=lambda x: x[1]["Total Points"],
-        reverse=True
-    )
-    
+        column = _column(rows, name)
+        if column.dtype.kind == 'f' and stats.dtype.kind != 'f':
+            stats = stats.astype(np.float64)
+        stats[:, i] = column
+
+    # Goalies are position G; rows without a position are goalies if they only have goalie stats
+    positions = [row.get("Position") for row in rows]
+    has_position = np.array([bool(position) and position != 'N/A' for position in positions], dtype=bool)
+    listed_goalie = np.array([position == 'G' for position in positions], dtype=bool)
+    goalie_stats_only = ((stats[:, 2] != 0) | (stats[:, 3] != 0)) & (stats[:, 0] == 0) & (stats[:, 1] == 0)
+
+    columns = {
+        "player": [row["Player ID"] for row in rows],
+        "team": np.array(teams, dtype=np.intp),
+        "stats": stats,
+        "pointsBeforeAcquiring": _column(rows, "Points Before Acquiring"),
+        "goalie": np.where(has_position, listed_goalie, goalie_stats_only),
+    }
+    return list(team_index), columns
+
+def _group_sum(team, values, team_count):
+    """Sum values (one entry or row per player) per team index"""
+    totals = np.zeros((team_count,) + values.shape[1:], dtype=values.dtype)
+    np.add.at(totals, team, values)
+    return totals
+
+def _points_list(points):
+    """Points as Python numbers; whole numbers stay ints when fractional weights made the array float"""
+    if points.dtype.kind == 'f':
+        return [int(value) if value.is_integer() else value for value in points.tolist()]
+    return points.tolist()
+
+def score_player_columns(columns, weights=SCORING_WEIGHTS):
+    """
+    Fantasy points for every loaded player row. `weights` is one weight per scoring column,
+    or one row of weights per player when players are scored under different rules.
+    """
+    if weights.ndim == 2:
+        return np.einsum('ij,ij->i', columns["stats"], weights) - columns["pointsBeforeAcquiring"]
+    return columns["stats"] @ weights - columns["pointsBeforeAcquiring"]
+
+def standings_from_columns(team_keys, columns, weights=SCORING_WEIGHTS):
+    """
+    Score loaded player columns and group them by team.
+    Returns (team key, stats) pairs sorted by total points; ties keep the order teams first appear in.
+    Each team's stats include Skaters/Goalies breakdowns of points and roster counts.
+    """
+    if not team_keys:
+        return []
+    team_count = len(team_keys)
+    team = columns["team"]
+    goalie = columns["goalie"]
+
+    player_points = score_player_columns(columns, weights)
+    total_points = _group_sum(team, player_points, team_count)
+    goalie_points = _group_sum(team, np.where(goalie, player_points, 0), team_count)
+    player_counts = np.bincount(team, minlength=team_count)
+    goalie_counts = np.bincount(team[goalie], minlength=team_count)
+    team_stats = _group_sum(team, columns["stats"][:, :len(TEAM_STAT_COLUMNS)], team_count)
+
+    # Convert back to Python numbers so results stay JSON serializable
+    total_points_list = _points_list(total_points)
+    skater_points_list = _points_list(total_points - goalie_points)
+    goalie_points_list = _points_list(goalie_points)
+    player_counts_list = player_counts.tolist()
+    goalie_counts_list = goalie_counts.tolist()
+    team_stats_list = team_stats.tolist()
+
+    sorted_standings = []
+    for i in np.argsort(-total_points, kind='stable').tolist():
+        stats = {"Total Points": total_points_list[i], "Players": player_counts_list[i]}
+        stats.update(zip(TEAM_STAT_COLUMNS, team_stats_list[i]))
+        stats["Skaters"] = {"Points": skater_points_list[i],
+                            "Count": player_counts_list[i] - goalie_counts_list[i]}
+        stats["Goalies"] = {"Points": goalie_points_list[i], "Count": goalie_counts_list[i]}
+        sorted_standings.append((team_keys[i], stats))
     return sorted_standings
 
-def main():
-    # Create data directory if it doesn't exist
-    os.makedirs('data', exist_ok=True)
-    
-    # Find the most recent stats file
-    try:
-        # First try to find updatedstats-*.json files
-        stats_files = glob.glob('data/updatedstats-*.json')
-        
-        if stats_files:
-            # Sort by modification time (most recent first)
-            stats_file_path = max(stats_files, key=os.path.getmtime)
-            print(f"Using most recent stats file: {stats_file_path}")
-        else:
-            # Fall back to playerlist.json if no updatedstats files found
-            stats_file_path = 'data/playerlist.json'
-            print(f"No updatedstats files found, using: {stats_file_path}")
-    except Exception as e:
-        print(f"Error finding stats file: {e}")
-        exit(1)
-    
-    # Calculate standings
-    standings = calculate_standings(stats_file_path)
-    
-    # Generate the standings file with current date
-    current_date = datetime.now().strftime("%Y%m%d")
-    standings_file = f"data/standings-{current_date}.json"
-    
-    # Format standings for output
+def calculate_standings_from_players(players, rules=DEFAULT_SCORING):
+    """Calculate standings from an already-loaded list of player stat entries"""
+    return standings_from_columns(*load_player_columns(players), weights=rules.weights)
+
+def calculate_league_standings(rows_by_league, rules_by_league=None):
+    """
+    Calculate standings for several leagues with a single load and grouped reduction.
+    `rules_by_league` maps league IDs to ScoringRules (default scoring otherwise).
+    Returns {league_id: sorted standings}, the same as calling calculate_standings_from_players per league.
+    """
+    rules_by_league = rules_by_league or {}
+    players = []
+    groups = []
+    for league_id, rows in rows_by_league.items():
+        players.extend(rows)
+        groups.extend([league_id] * len(rows))
+    team_keys, columns = load_player_columns(players, groups)
+
+    weights = SCORING_WEIGHTS
+    if any(rules != DEFAULT_SCORING for rules in rules_by_league.values()):
+        # Each player row gets its league's weights, so every league is still scored in one pass
+        team_weights = np.array([rules_by_league.get(league_id, DEFAULT_SCORING).weights
+                                 for league_id, _ in team_keys]).reshape(len(team_keys), len(SCORING_COLUMNS))
+        weights = team_weights[columns["team"]]
+
+    results = {league_id: [] for league_id in rows_by_league}
+    for (league_id, team), stats in standings_from_columns(team_keys, columns, weights):
+        results[league_id].append((team, stats))
+    return results
+
+def format_standings(standings):
+    """Format sorted standings as the ranked list written to standings-*.json"""
     formatted_standings = []
     for rank, (team_name, stats) in enumerate(standings, 1):
         formatted_standings.append({
@@ -105,19 +189,86 @@ def main():
             "Wins": stats["Wins"],
             "Shutouts": stats["Shutouts"]
         })
+    return formatted_standings
+
+def write_standings(formatted_standings, run_date=None):
+    """Write standings-YYYYMMDD.json and latest-standings.json, returning the dated filename"""
+    os.makedirs('data', exist_ok=True)
+    
+    # Generate the standings file with current date
+    current_date = (run_date or datetime.now()).strftime("%Y%m%d")
+    standings_file = f"data/standings-{current_date}.json"
     
     # Save standings to JSON file
-    with open(standings_file, 'w') as file:
+    with atomic_open(standings_file) as file:
         json.dump(formatted_standings, file, indent=4)
     
     print(f"Standings calculated and saved to {standings_file}")
     
     # Also save a copy as latest-standings.json for easy reference
-    with open('data/latest-standings.json', 'w') as file:
+    with atomic_open('data/latest-standings.json') as file:
         json.dump(formatted_standings, file, indent=4)
     
     print("Standings also saved to latest-standings.json")
     
+    # Keep the compact history in step with the daily files
+    record_snapshot('standings', formatted_standings, run_date)
+    
+    return standings_file
+
+def write_standings_outputs(formatted_standings, fingerprints, run_date=None):
+    """write_standings, recording the fingerprint the standings stage missed with"""
+    standings_file = write_standings(formatted_standings, run_date)
+    fingerprints.record('standings', [standings_file, 'data/latest-standings.json'])
+    return standings_file
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Calculate standings from the latest updatedstats file")
+    parser.add_argument("--force", action="store_true",
+                        help="Write the standings even if the stats and scoring rules match the previous run's fingerprint")
+    add_metrics_args(parser)
+    args = parser.parse_args(argv)
+    
+    # Create data directory if it doesn't exist
+    os.makedirs('data', exist_ok=True)
+    start_run(args)
+    
+    # Find the most recent stats file
+    try:
+        # First try to find updatedstats-*.json files. The newest is picked by the date in
+        # its name: modification times are reset by every git checkout.
+        _, stats_file_path = latest_snapshot('updatedstats', 'data')
+        
+        if stats_file_path:
+            print(f"Using most recent stats file: {stats_file_path}")
+        else:
+            # Fall back to playerlist.json if no updatedstats files found
+            stats_file_path = 'data/playerlist.json'
+            print(f"No updatedstats files found, using: {stats_file_path}")
+    except Exception as e:
+        print(f"Error finding stats file: {e}")
+        exit(1)
+    
+    with open(stats_file_path, 'r') as file:
+        players = json.load(file)
+    rules = default_rules()
+    
+    # Same stats and rules as the last run: the standings on disk are still current
+    fingerprints = FingerprintStore(force=args.force)
+    if fingerprints.check('standings', fingerprint(players, rules)):
+        standings_file = fingerprints.outputs('standings')[0]
+        print(f"Stats and scoring rules unchanged; {standings_file} is current")
+    else:
+        # Calculate standings
+        with METRICS.stage('standings', args.profile):
+            standings = calculate_standings_from_players(players, rules)
+        
+        # Format standings for output and save them
+        with METRICS.stage('write_outputs', args.profile):
+            standings_file = write_standings_outputs(format_standings(standings), fingerprints)
+    fingerprints.save()
+    record_run_caches(fingerprints=fingerprints)
+    finish_run(args, 'calculate_standings')
     return standings_file
 
 if __name__ == "__main__":
@@ -1,10 +1,112 @@
-import requests
 import json
 import os
+import argparse
 from datetime import datetime
 
-def main():
+from nhl_api import fetch_finished_games, fetch_schedule
+from snapshots import latest_snapshot
+
+# Written by update_playerlist.py
+DRAFTED_PLAYERS_FILE = 'data/playerlist_drafted_with_pre_acq_stats.json'
+# Written by fingerprints.py, in the data directory
+FINGERPRINTS_FILE_NAME = 'fingerprints.json'
+
+def set_output(name, value):
+    """Set a GitHub Actions step output (printed instead when not running in Actions)"""
+    output_file = os.environ.get('GITHUB_OUTPUT')
+    if output_file:
+        with open(output_file, 'a') as f:
+            f.write(f"{name}={value}\n")
+    else:
+        print(f"{name}={value}")
+
+def build_team_index(drafted_players):
+    """Map each NHL team abbreviation to the IDs of the drafted players on it"""
+    index = {}
+    for player_id, entry in (drafted_players or {}).items():
+        if isinstance(entry, dict) and entry.get('NHL Team') not in (None, 'N/A'):
+            index.setdefault(entry['NHL Team'], []).append(str(player_id))
+    return index
+
+def last_processed_day(data_dir='data'):
+    """The day the updated_stats stage last ran, even if its inputs were unchanged and it wrote nothing"""
+    try:
+        with open(os.path.join(data_dir, FINGERPRINTS_FILE_NAME), 'r') as f:
+            processed = (json.load(f).get('updated_stats') or {}).get('processedOn')
+        return datetime.strptime(processed, '%Y-%m-%d').date() if processed else None
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def pipeline_gate(today=None, data_dir='data', drafted_file=DRAFTED_PLAYERS_FILE, session=None):
+    """
+    Decide whether the daily pipeline has anything to do: it does if a game involving an
+    owned NHL team has finished since the latest updatedstats snapshot, or since the last run
+    if that was later (a run with unchanged inputs writes no snapshot). Only the schedule is
+    read, one request per week. Returns {"run": bool, "reason": ..., ...}.
+    """
+    today = today or datetime.now().date()
+    snapshot_day, _ = latest_snapshot('updatedstats', data_dir)
+    if snapshot_day is None:
+        return {"run": True, "reason": "no updatedstats snapshot yet"}
+    processed_day = last_processed_day(data_dir)
+    since = max(snapshot_day, processed_day) if processed_day is not None else snapshot_day
+    try:
+        with open(drafted_file, 'r') as f:
+            team_index = build_team_index(json.load(f))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"run": True, "reason": f"no drafted player list at {drafted_file}"}
+    
+    # The snapshot for a day is written in the morning, before any of that day's games
+    games = [game for game in fetch_finished_games(since, today, session)
+             if {game.get(side, {}).get('abbrev') for side in ('homeTeam', 'awayTeam')} & set(team_index)]
+    teams = sorted({game.get(side, {}).get('abbrev') for game in games for side in ('homeTeam', 'awayTeam')} & set(team_index))
+    result = {
+        "run": bool(games),
+        "since": since.isoformat(),
+        "games": [game.get('id') for game in games],
+        "teams": teams,
+        "players": sum(len(team_index[team]) for team in teams),
+    }
+    if games:
+        result["reason"] = f"{len(games)} games involving owned teams finished since {since}"
+    else:
+        result["reason"] = f"no game involving owned teams finished since {since}"
+    return result
+
+def run_gate():
+    """Print the gate result as JSON and set the should_run step output"""
+    try:
+        result = pipeline_gate()
+    except Exception as e:
+        # If the schedule can not be read, run the pipeline rather than miss an update
+        result = {"run": True, "reason": f"schedule lookup failed: {e}"}
+    print(json.dumps(result))
+    set_output('should_run', 'true' if result['run'] else 'false')
+    set_output('reason', result['reason'])
+    return result['run']
+
+def get_teams_that_played(start_date, end_date, session=None):
+    """Return the set of NHL team abbreviations with a finished game between start_date and end_date (inclusive)"""
+    teams = set()
+    for game in fetch_finished_games(start_date, end_date, session):
+        for side in ('homeTeam', 'awayTeam'):
+            abbrev = game.get(side, {}).get('abbrev')
+            if abbrev:
+                teams.add(abbrev)
+    return teams
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Check for NHL games involving owned teams")
+    parser.add_argument("--gate", action="store_true",
+                        help="Report whether games involving owned teams finished since the last snapshot "
+                             "(should_run output) instead of checking for live games")
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """Check if there are any active NHL games with players from our fantasy teams"""
+    args = parse_args(argv)
+    if args.gate:
+        return run_gate()
     
     # Create data directory if needed
     os.makedirs('data', exist_ok=True)
@@ -14,8 +116,7 @@ def main():
 
     # Get the current schedule from NHL API
     try:
-        response = requests.get(f'https://api-web.nhle.com/v1/schedule/{today}')
-        schedule = response.json()
+        schedule = fetch_schedule(today)
         
         # Check if there are any games today
         games_today = schedule.get('gameWeek', [{}])[0].get('games', [])
@@ -49,17 +150,17 @@ def main():
         
         # Set output for GitHub Actions
         if relevant_games:
-            print('::set-output name=games_active::true')
+            set_output('games_active', 'true')
             print(f'Found {len(relevant_games)} active games with our players')
             return True
         else:
-            print('::set-output name=games_active::false')
+            set_output('games_active', 'false')
             print('No active games with our players')
             return False
             
     except Exception as e:
         print(f'Error checking games: {e}')
-        print('::set-output name=games_active::false')
+        set_output('games_active', 'false')
         return False
 
 if __name__ == "__main__":
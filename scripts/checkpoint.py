@@ -0,0 +1,79 @@
+import os
+import json
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+
+from landing_cache import REPO_ROOT
+
+logger = logging.getLogger(__name__)
+
+# Journals live next to the landing cache, which the workflows carry between runs
+CHECKPOINT_DIR = os.path.join(REPO_ROOT, '.cache', 'nhl', 'checkpoints')
+# Completed fetches older than this are fetched again on --resume
+DEFAULT_MAX_AGE = timedelta(hours=12)
+
+
+def checkpoint_path(job, checkpoint_dir=CHECKPOINT_DIR):
+    """Journal file for a job such as 'fetch_stats'"""
+    return os.path.join(checkpoint_dir, f"{job}.jsonl")
+
+
+class CheckpointJournal:
+    """
+    Append-only record of finished player fetches for one job: one JSON line per player with
+    its ID, the time it finished and the fetched data. Lines are flushed as they are written,
+    so a run that is killed keeps everything it completed and --resume can pick up from there.
+    """
+
+    def __init__(self, path, clock=None):
+        self.path = path
+        self._clock = clock or (lambda: datetime.now(timezone.utc))
+        self._file = None
+        self._lock = threading.Lock()
+
+    def load(self, max_age=DEFAULT_MAX_AGE):
+        """{player ID: data} for fetches that finished within max_age; the newest entry per player wins"""
+        cutoff = self._clock() - max_age
+        completed = {}
+        try:
+            with open(self.path, 'r') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        finished_at = datetime.fromisoformat(entry['at'])
+                    except (ValueError, KeyError, TypeError):
+                        # A run killed mid-write leaves a partial last line
+                        continue
+                    if finished_at >= cutoff:
+                        completed[str(entry['id'])] = entry.get('data')
+                    else:
+                        completed.pop(str(entry['id']), None)
+        except FileNotFoundError:
+            pass
+        return completed
+
+    def record(self, player_id, data):
+        """Append one finished fetch"""
+        line = json.dumps({'id': str(player_id), 'at': self._clock().isoformat(timespec='seconds'), 'data': data},
+                          separators=(',', ':'))
+        with self._lock:
+            if self._file is None:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                self._file = open(self.path, 'a')
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def clear(self):
+        """Forget every entry: at the start of a fresh run, and once the output is finalized"""
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,107 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+
+from nhl_api import NHL_API_BASE_URL, DEFAULT_WORKERS, DEFAULT_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+# NHL API game types
+REGULAR_SEASON = 2
+PLAYOFFS = 3
+
+# Club stats fields -> /landing featuredStats subSeason fields, per player type.
+# Goalie lines carry no points, which is how the landing parsers tell them apart.
+SKATER_FIELDS = {
+    "gamesPlayed": "gamesPlayed",
+    "goals": "goals",
+    "assists": "assists",
+    "points": "points",
+    "plusMinus": "plusMinus",
+    "penaltyMinutes": "pim",
+    "powerPlayGoals": "powerPlayGoals",
+    "shorthandedGoals": "shorthandedGoals",
+    "gameWinningGoals": "gameWinningGoals",
+    "overtimeGoals": "otGoals",
+    "shots": "shots",
+    "shootingPctg": "shootingPctg",
+}
+GOALIE_FIELDS = {
+    "gamesPlayed": "gamesPlayed",
+    "wins": "wins",
+    "losses": "losses",
+    "overtimeLosses": "otLosses",
+    "shutouts": "shutouts",
+    "goalsAgainstAverage": "goalsAgainstAvg",
+    "savePercentage": "savePctg",
+}
+# featuredStats key for each game type
+FEATURED_STATS_KEYS = {REGULAR_SEASON: "regularSeason", PLAYOFFS: "playoffs"}
+
+
+def current_season(today=None):
+    """NHL season ID such as '20242025' for a date; seasons start in September"""
+    today = today or datetime.now().date()
+    start_year = today.year if today.month >= 9 else today.year - 1
+    return f"{start_year}{start_year + 1}"
+
+
+def fetch_club_stats(team, season=None, game_type=PLAYOFFS, session=None, timeout=DEFAULT_TIMEOUT):
+    """Fetch one team's skater and goalie stat listing, or None if the request failed"""
+    url = f"{NHL_API_BASE_URL}/club-stats/{team}/{season or current_season()}/{game_type}"
+    http = session or requests
+    try:
+        response = http.get(url, timeout=timeout)
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"Failed to fetch club stats for {team}. Error: {e}")
+        return None
+    if response.status_code != 200:
+        logger.warning(f"Failed to fetch club stats for {team}. Status code: {response.status_code}")
+        return None
+    return response.json()
+
+
+def landings_from_club_stats(club_stats, team, game_type=PLAYOFFS):
+    """
+    {player ID: trimmed /landing-shaped payload} for every player in a club stats response,
+    so the existing landing parsers read bulk stats unchanged.
+    """
+    featured_key = FEATURED_STATS_KEYS[game_type]
+    landings = {}
+    for group, fields in (("skaters", SKATER_FIELDS), ("goalies", GOALIE_FIELDS)):
+        for player in club_stats.get(group, []):
+            if not player.get('playerId'):
+                continue
+            sub_season = {landing_field: player[club_field]
+                          for club_field, landing_field in fields.items() if club_field in player}
+            landings[str(player['playerId'])] = {
+                'featuredStats': {featured_key: {'subSeason': sub_season}},
+                'position': player.get('positionCode', 'G' if group == "goalies" else None),
+                'currentTeamAbbrev': team,
+            }
+    return landings
+
+
+def fetch_club_landings(teams, season=None, game_type=PLAYOFFS, session=None, workers=DEFAULT_WORKERS,
+                        timeout=DEFAULT_TIMEOUT):
+    """
+    Landing-shaped payloads for every player listed by the given teams, with one request per team.
+    Teams whose request fails are skipped; their players fall back to /landing.
+    """
+    teams = sorted({team for team in teams if team and team != 'N/A'})
+    season = season or current_season()
+    if not teams:
+        return {}
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(teams)))) as executor:
+        responses = list(executor.map(
+            lambda team: fetch_club_stats(team, season, game_type, session, timeout), teams))
+
+    landings = {}
+    for team, club_stats in zip(teams, responses):
+        if club_stats is not None:
+            landings.update(landings_from_club_stats(club_stats, team, game_type))
+    loaded = sum(response is not None for response in responses)
+    logger.info(f"Club stats: {len(landings)} players from {loaded} of {len(teams)} teams ({season}, game type {game_type})")
+    return landings
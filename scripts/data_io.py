@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+import os
+import json
+import argparse
+import tempfile
+from contextlib import contextmanager
+
+# Per-league outputs go to data/leagues/<leagueId>/ (league_standings.py writes them, bundles.py reads them)
+LEAGUES_DATA_DIR = os.path.join('data', 'leagues')
+
+
+@contextmanager
+def atomic_open(path, mode='w'):
+    """
+    Open a temporary file next to `path` for writing and move it into place on success,
+    so readers only ever see the old or the complete new file. On error the temp file is removed.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, mode) as f:
+            yield f
+        # Data files are committed and served; mkstemp creates them owner-only
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class JsonlWriter:
+    """Writes records one JSON object per line as they are produced; the file appears atomically on close"""
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self._context = atomic_open(path)
+        self._file = None
+
+    def __enter__(self):
+        self._file = self._context.__enter__()
+        return self
+
+    def write(self, record):
+        self._file.write(json.dumps(record, separators=(',', ':')))
+        self._file.write('\n')
+        self.count += 1
+
+    def __exit__(self, *exc_info):
+        return self._context.__exit__(*exc_info)
+
+
+class JsonArrayWriter(JsonlWriter):
+    """
+    Streams records into the legacy single-array format the front end reads. The output is
+    byte-for-byte what json.dump(records, f, indent=indent) writes, without holding the list.
+    """
+
+    def __init__(self, path, indent=2):
+        super().__init__(path)
+        self.indent = indent
+
+    def write(self, record):
+        prefix = ' ' * self.indent
+        self._file.write('[\n' if self.count == 0 else ',\n')
+        self._file.write('\n'.join(prefix + line for line in json.dumps(record, indent=self.indent).split('\n')))
+        self.count += 1
+
+    def __exit__(self, *exc_info):
+        if exc_info[0] is None:
+            self._file.write('\n]' if self.count else '[]')
+        return super().__exit__(*exc_info)
+
+
+def iter_jsonl(path):
+    """Lazily yield the records of a JSONL file"""
+    with open(path, 'r') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def iter_records(path):
+    """Records of a .jsonl file (read lazily) or a legacy JSON array file"""
+    if path.endswith('.jsonl'):
+        yield from iter_jsonl(path)
+        return
+    with open(path, 'r') as f:
+        yield from json.load(f)
+
+
+def jsonl_path(path):
+    """The JSONL counterpart of a legacy .json data file"""
+    return os.path.splitext(path)[0] + '.jsonl'
+
+
+def jsonl_to_json(source, destination=None, indent=2):
+    """Convert a JSONL file to the legacy array format, one record in memory at a time"""
+    destination = destination or os.path.splitext(source)[0] + '.json'
+    with JsonArrayWriter(destination, indent) as writer:
+        for record in iter_jsonl(source):
+            writer.write(record)
+    return writer.count
+
+
+def batched(records, size):
+    """Lists of up to `size` records from any iterable"""
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Convert a JSONL data file to the legacy JSON array format")
+    parser.add_argument("source", help="Input .jsonl file")
+    parser.add_argument("destination", nargs="?", help="Output .json file (default: next to the input)")
+    parser.add_argument("--indent", type=int, default=2)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    count = jsonl_to_json(args.source, args.destination, args.indent)
+    print(f"Wrote {count} records to {args.destination or os.path.splitext(args.source)[0] + '.json'}")
+
+
+if __name__ == "__main__":
+    main()
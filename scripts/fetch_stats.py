@@ -1,19 +1,34 @@
 import os
-import requests
+import argparse
 import json
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
+
+from nhl_api import DEFAULT_WORKERS, DEFAULT_TIMEOUT, fetch_landing
+from landing_cache import open_landing_cache
+from stats_provider import PlayerStatsProvider
+from check_active_games import get_teams_that_played
+from snapshots import latest_snapshot
+from history_store import record_snapshot
+from club_stats import current_season, fetch_club_landings
+from checkpoint import DEFAULT_MAX_AGE, CheckpointJournal, checkpoint_path
+from data_io import atomic_open
+from boxscores import GORDIE_HOWE_FIELD, update_ledger
+from fingerprints import FingerprintStore, fingerprint
+from metrics import METRICS, add_metrics_args, finish_run, record_run_caches, start_run
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def fetch_player_stats(player_id):
-    """Fetch player playoff stats from NHL API"""
-    stats_url = f"https://api-web.nhle.com/v1/player/{player_id}/landing"
-    response = requests.get(stats_url)
-    if response.status_code == 200:
-        data = response.json()
-        
+# Written by update_playerlist.py
+DRAFTED_PLAYERS_FILE = "data/playerlist_drafted_with_pre_acq_stats.json"
+
+# Stat fields that are refreshed from the NHL API; everything else comes from the drafted player list
+STAT_FIELDS = ("Goals", "Assists", "Wins", "Shutouts")
+
+def parse_player_stats(data):
+    """Extract the playoff stat line from a /landing payload (None means the fetch failed)"""
+    if data is not None:
         # Only get playoff stats, don't fall back to regular season
         featured_stats = data.get('featuredStats', {})
         
@@ -27,31 +42,77 @@ def fetch_player_stats(player_id):
                 "Wins": playoff_stats.get('wins', 0),
                 "Shutouts": playoff_stats.get('shutouts', 0)
             }
-        
-        # If no playoff stats, return all zeros
-        return {
-            "Games Played": 0,
-            "Goals": 0,
-            "Assists": 0,
-            "Wins": 0,
-            "Shutouts": 0
-        }
-    else:
-        print(f"Failed to fetch stats for player {player_id}. Status code: {response.status_code}")
-        return {
-            "Games Played": 0,
-            "Goals": 0,
-            "Assists": 0,
-            "Wins": 0,
-            "Shutouts": 0
-        }
+    
+    # If no playoff stats (or the request failed), return all zeros
+    return {
+        "Games Played": 0,
+        "Goals": 0,
+        "Assists": 0,
+        "Wins": 0,
+        "Shutouts": 0
+    }
 
-def main():
-    # Create data directory if it doesn't exist
-    os.makedirs('data', exist_ok=True)
+def fetch_player_stats(player_id, session=None, timeout=DEFAULT_TIMEOUT, cache=None):
+    """Fetch player playoff stats from NHL API"""
+    return parse_player_stats(fetch_landing(player_id, session, timeout, cache))
+
+def load_incremental_context(today=None):
+    """
+    For --incremental runs: load the previous updatedstats snapshot and the set of NHL teams
+    that finished a game since it was written. Returns (teams_played, previous_players keyed
+    by player ID), or None when either is unavailable and every player must be refetched.
+    """
+    today = today or datetime.now().date()
+    snapshot_day, snapshot_path = latest_snapshot('updatedstats', 'data')
+    if snapshot_path is None or snapshot_day > today:
+        logger.info("Incremental refresh: no previous updatedstats snapshot found, fetching every player")
+        return None
     
-    # Load player list from the specified JSON file
-    input_filename = "data/playerlist_drafted_with_pre_acq_stats.json"
+    try:
+        with open(snapshot_path, "r") as file:
+            previous_players = {str(p.get("Player ID")): p for p in json.load(file) if isinstance(p, dict)}
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning(f"Incremental refresh: could not read {snapshot_path} ({e}), fetching every player")
+        return None
+    
+    try:
+        # Games scheduled on the snapshot day itself finish after the 08:00 UTC run, so include that day
+        teams_played = get_teams_that_played(snapshot_day, today)
+    except Exception as e:
+        logger.warning(f"Incremental refresh: schedule lookup failed ({e}), fetching every player")
+        return None
+    
+    logger.info(f"Incremental refresh: {len(teams_played)} NHL teams finished games since {snapshot_path}: {sorted(teams_played)}")
+    return teams_played, previous_players
+
+def incremental_requested(args):
+    """
+    Whether to load the incremental context: --incremental only decides which players are
+    fetched, and with --ledger none are, so its schedule lookups would be wasted
+    """
+    if args.incremental and args.ledger:
+        logger.info("Ignoring --incremental: with --ledger every player's stats come from the boxscore ledger")
+        return False
+    return args.incremental
+
+def select_carry_forward(valid_entries, incremental_context):
+    """
+    Return previous-snapshot stats, keyed by player ID, for players whose NHL team has not
+    finished a game since that snapshot. Anything that cannot be verified is refetched.
+    """
+    if incremental_context is None:
+        return {}
+    teams_played, previous_players = incremental_context
+    carried = {}
+    for player_id, player_entry in valid_entries:
+        previous = previous_players.get(str(player_id))
+        if previous is None or player_entry.get('NHL Team') in teams_played:
+            continue
+        carried[player_id] = {field: previous.get(field, 0) for field in STAT_FIELDS}
+    return carried
+
+def load_drafted_players(input_filename=DRAFTED_PLAYERS_FILE):
+    """Load the drafted player list written by update_playerlist.py, exiting if it is missing or invalid"""
     try:
         with open(input_filename, "r") as file:
             player_list_data = json.load(file)
@@ -63,23 +124,66 @@ def main():
         logger.error(f"Error: Could not decode JSON from '{input_filename}'. File might be corrupted or not valid JSON.")
         exit(1)
     
-    # List to collect player data
-    updated_players_data = []
-    
     # The input is expected to be an object where keys are NHL player IDs
     if not isinstance(player_list_data, dict):
         logger.error(f"Error: Expected '{input_filename}' to contain a JSON object (dictionary), but found {type(player_list_data)}.")
         exit(1)
-        
-    logger.info(f"Processing {len(player_list_data)} player entries from {input_filename}.")
     
-    # Loop through each player and fetch player data
+    return player_list_data
+
+def seed_club_stats(provider, entries):
+    """
+    Give the provider club stats for every NHL team of the (player ID, drafted entry) pairs it
+    does not know yet: one request per team instead of one per player
+    """
+    pending = set(provider.missing(player_id for player_id, _ in entries))
+    teams = {entry.get('NHL Team') for player_id, entry in entries if str(player_id) in pending}
+    if teams:
+        provider.seed(fetch_club_landings(teams, session=provider.session, workers=provider.workers,
+                                          timeout=provider.timeout))
+
+def build_updated_stats(player_list_data, provider, incremental_context=None, use_club_stats=False,
+                        ledger_totals=None):
+    """
+    Combine the drafted player list with current playoff stats.
+    Returns the list of player entries written to updatedstats-YYYYMMDD.json, in input order.
+    With use_club_stats, stats come from one club stats request per NHL team and only players
+    missing from those listings are fetched one by one. With ledger_totals (BoxscoreLedger.totals)
+    nothing is fetched: stats and Gordie Howe hat tricks come from the boxscore ledger.
+    """
+    # List to collect player data
+    updated_players_data = []
+    
+    logger.info(f"Processing {len(player_list_data)} player entries.")
+    
     # player_list_data is a dictionary where keys are NHL player IDs
+    valid_entries = []
     for nhl_player_id_str, player_entry in player_list_data.items():
         if not isinstance(player_entry, dict):
             logger.warning(f"Skipping entry for key '{nhl_player_id_str}' as it's not a valid player object.")
             continue
-
+        valid_entries.append((nhl_player_id_str, player_entry))
+    
+    if ledger_totals is not None:
+        # Players without a line in the ledger have not played a playoff game
+        carried_stats = {player_id: ledger_totals.get(player_id, {}) for player_id, _ in valid_entries}
+    else:
+        # In incremental mode, players whose team has not played keep their previous stats
+        carried_stats = select_carry_forward(valid_entries, incremental_context)
+    ids_to_fetch = [player_id for player_id, _ in valid_entries if player_id not in carried_stats]
+    
+    if use_club_stats:
+        seed_club_stats(provider, [(player_id, entry) for player_id, entry in valid_entries if player_id not in carried_stats])
+    
+    # Fetch every remaining player's landing data concurrently; results come back in input order
+    logger.info(f"Fetching current playoff stats for {len(ids_to_fetch)} players using {provider.workers} workers")
+    landings_by_id = dict(zip(ids_to_fetch, provider.get_many(ids_to_fetch)))
+    if incremental_context is not None:
+        logger.info(f"Incremental refresh: skipped {len(carried_stats)} of {len(valid_entries)} player fetches, "
+                    f"fetched {len(ids_to_fetch)}")
+    
+    # Loop through each player and build the output entry
+    for nhl_player_id_str, player_entry in valid_entries:
         # The key in player_list_data is the NHL Player ID (as a string from JSON key)
         player_id_for_api = nhl_player_id_str 
         
@@ -89,8 +193,10 @@ def main():
         nhl_team_abbr = player_entry.get('NHL Team', 'N/A') 
         position = player_entry.get('Position', 'N/A')
 
-        logger.info(f"Fetching current playoff stats for {player_name} (ID: {player_id_for_api})")
-        current_playoff_stats = fetch_player_stats(player_id_for_api)
+        if nhl_player_id_str in carried_stats:
+            current_playoff_stats = carried_stats[nhl_player_id_str]
+        else:
+            current_playoff_stats = parse_player_stats(landings_by_id[nhl_player_id_str])
         
         # Preserve existing fields and add/update new stats
         # Crucially, 'pointsBeforeAcquiring' and 'preAcqRound' are preserved from the input.
@@ -110,23 +216,127 @@ def main():
             "Wins": current_playoff_stats.get("Wins", 0),
             "Shutouts": current_playoff_stats.get("Shutouts", 0)
         }
+        if ledger_totals is not None:
+            updated_player_data_entry[GORDIE_HOWE_FIELD] = current_playoff_stats.get(GORDIE_HOWE_FIELD, 0)
         
         updated_players_data.append(updated_player_data_entry)
         logger.info(f"Processed player: {player_name}, Current Playoff Stats: {current_playoff_stats}")
     
+    return updated_players_data
+
+def updated_stats_fingerprint(player_list_data, stats_by_player):
+    """
+    Fingerprint of this stage's inputs: the drafted player list and each drafted player's stats
+    (ledger totals, or the STAT_FIELDS of rows built from fetched stats)
+    """
+    return fingerprint(player_list_data, {player_id: stats_by_player.get(player_id, {}) for player_id in player_list_data})
+
+def fetched_stats(updated_players_data):
+    """{player ID: STAT_FIELDS} of built updatedstats rows"""
+    return {str(row["Player ID"]): {field: row.get(field, 0) for field in STAT_FIELDS} for row in updated_players_data}
+
+def write_updated_stats(updated_players_data, run_date=None):
+    """Write updatedstats-YYYYMMDD.json for run_date (default today) and return its filename"""
     # Generate the filename with the current date
-    current_date_str = datetime.now().strftime("%Y%m%d") # Using YYYYMMDD for better sorting
+    current_date_str = (run_date or datetime.now()).strftime("%Y%m%d") # Using YYYYMMDD for better sorting
     filename = f"updatedstats-{current_date_str}.json"
     
     # Path to save the file
     save_path = "data"
+    os.makedirs(save_path, exist_ok=True)
     
-    # Write player data to JSON file
-    with open(os.path.join(save_path, filename), "w") as json_file:
+    # Write player data to JSON file; readers never see a half-written file
+    with atomic_open(os.path.join(save_path, filename)) as json_file:
         json.dump(updated_players_data, json_file, indent=4)
     
     print(f"Successfully saved playoff stats for {len(updated_players_data)} players to {filename}")
     
+    # Keep the compact history in step with the daily files
+    record_snapshot('updatedstats', updated_players_data, run_date)
+    
+    return filename
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch current playoff stats for all drafted players")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"Number of concurrent NHL API requests (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT,
+                        help=f"Per-request timeout in seconds (default: {DEFAULT_TIMEOUT})")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Ignore the on-disk landing cache and fetch every player")
+    parser.add_argument("--run-id", default=None,
+                        help="Pipeline run ID used to reuse landing data fetched by update_playerlist.py "
+                             "(default: $PIPELINE_RUN_ID)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only refetch players whose NHL team played since the previous updatedstats snapshot")
+    parser.add_argument("--no-club-stats", action="store_true",
+                        help="Fetch every player's /landing data instead of one club stats listing per NHL team")
+    parser.add_argument("--ledger", action="store_true",
+                        help="Take stats from the boxscore ledger (one request per new game) instead of per player")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip players an interrupted earlier run already fetched (see --resume-max-age)")
+    parser.add_argument("--resume-max-age", type=float, default=DEFAULT_MAX_AGE.total_seconds() / 3600,
+                        help=f"Hours a fetch from an interrupted run stays usable (default: {DEFAULT_MAX_AGE.total_seconds() / 3600:g})")
+    parser.add_argument("--force", action="store_true",
+                        help="Write the output even if its inputs match the previous run's fingerprint")
+    add_metrics_args(parser)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    
+    # Create data directory if it doesn't exist
+    os.makedirs('data', exist_ok=True)
+    start_run(args)
+    
+    # Load player list from the specified JSON file
+    player_list_data = load_drafted_players()
+    
+    with METRICS.stage('incremental_context', args.profile):
+        incremental_context = load_incremental_context() if incremental_requested(args) else None
+    
+    with METRICS.stage('landing_cache', args.profile):
+        cache = open_landing_cache(args.no_cache)
+    # Every finished fetch is journaled so an interrupted run can be resumed
+    journal = CheckpointJournal(checkpoint_path('fetch_stats'))
+    provider = PlayerStatsProvider(cache, workers=args.workers, timeout=args.timeout, run_id=args.run_id,
+                                   journal=journal)
+    if args.resume:
+        provider.resume(timedelta(hours=args.resume_max_age))
+    else:
+        journal.clear()
+    provider.load_run()
+    fingerprints = FingerprintStore(force=args.force)
+    with METRICS.stage('ledger', args.profile):
+        ledger_totals = update_ledger(session=provider.session, timeout=args.timeout).totals(current_season()) if args.ledger else None
+    # With the ledger every input is known up front; fetched stats are only known once fetched
+    with METRICS.stage('updated_stats', args.profile):
+        if ledger_totals is not None and fingerprints.check('updated_stats', updated_stats_fingerprint(player_list_data, ledger_totals)):
+            updated_players_data = None
+        else:
+            updated_players_data = build_updated_stats(player_list_data, provider, incremental_context,
+                                                       use_club_stats=not args.no_club_stats, ledger_totals=ledger_totals)
+            if ledger_totals is None:
+                fingerprints.check('updated_stats', updated_stats_fingerprint(player_list_data, fetched_stats(updated_players_data)))
+    provider.close()
+    provider.log_summary()
+    if cache is not None:
+        cache.save()
+        cache.log_summary()
+    
+    if fingerprints.hit('updated_stats'):
+        filename = os.path.basename(fingerprints.outputs('updated_stats')[0])
+        print(f"Inputs unchanged since {filename} was written; not rewriting it")
+    else:
+        with METRICS.stage('write_outputs', args.profile):
+            filename = write_updated_stats(updated_players_data)
+        fingerprints.record('updated_stats', [os.path.join('data', filename)])
+    # Saved on a hit too: it records the day for the pipeline gate
+    fingerprints.save()
+    # The output is final, so nothing is left to resume
+    journal.clear()
+    record_run_caches(cache, provider, fingerprints)
+    finish_run(args, 'fetch_stats')
     return filename
 
 if __name__ == "__main__":
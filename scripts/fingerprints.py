@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+import os
+import json
+import hashlib
+import logging
+from datetime import date, datetime, timezone
+
+from data_io import atomic_open
+from scoring_rules import ScoringRules
+
+logger = logging.getLogger(__name__)
+
+# Fingerprint of each stage's inputs from its last run; committed with the outputs it describes
+FINGERPRINTS_FILE = os.path.join('data', 'fingerprints.json')
+# Part of every fingerprint; bump it when a stage's output format changes so old entries miss
+FINGERPRINT_VERSION = 1
+
+
+def _encode(value):
+    if isinstance(value, ScoringRules):
+        return value.spec
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    raise TypeError(f"Can not fingerprint {type(value).__name__}")
+
+
+def fingerprint(*inputs):
+    """SHA-256 of the inputs as canonical JSON: equal inputs match whatever their key order"""
+    payload = json.dumps([FINGERPRINT_VERSION, *inputs], separators=(',', ':'), sort_keys=True, default=_encode)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class FingerprintStore:
+    """
+    Per-stage input fingerprints, used like a build cache. A stage checks the fingerprint of
+    its inputs first; on a hit its previous outputs are still current, so it skips both the
+    computation and the writes. After a miss the stage writes its outputs and records the
+    fingerprint with them. A hit needs the recorded outputs to still exist.
+    Each entry also keeps the day its stage last ran, hit or miss ('processedOn'), which the
+    daily pipeline gate reads.
+    With path=None nothing is loaded or saved and every check misses.
+    """
+
+    def __init__(self, path=FINGERPRINTS_FILE, force=False):
+        self.path = path
+        self.force = force
+        self.entries = {}
+        self.status = {}
+        self._pending = {}
+        self._dirty = False
+        if path is not None and os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    self.entries = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"Ignoring unreadable fingerprint file {path}: {e}")
+
+    def check(self, stage, value):
+        """True (a hit) if `value` is the stage's recorded fingerprint and its outputs still exist"""
+        entry = self.entries.get(stage) or {}
+        hit = not self.force and self.path is not None and entry.get('fingerprint') == value \
+            and all(os.path.exists(path) for path in entry.get('outputs', []))
+        self.status[stage] = 'hit' if hit else 'miss'
+        if hit:
+            self._mark_processed(entry)
+        else:
+            self._pending[stage] = value
+        logger.info(f"Stage '{stage}': fingerprint {value[:12]} {'hit, skipping it' if hit else 'miss'}")
+        return hit
+
+    def _mark_processed(self, entry):
+        today = date.today().isoformat()
+        if entry.get('processedOn') != today:
+            entry['processedOn'] = today
+            self._dirty = True
+
+    def hit(self, stage):
+        return self.status.get(stage) == 'hit'
+
+    def outputs(self, stage):
+        """Paths the stage wrote when its fingerprint was recorded"""
+        return list((self.entries.get(stage) or {}).get('outputs', []))
+
+    def load_output(self, stage, index=0):
+        """The JSON content of one of the stage's recorded outputs"""
+        with open(self.outputs(stage)[index], 'r') as f:
+            return json.load(f)
+
+    def record(self, stage, outputs):
+        """Remember the fingerprint a stage missed with, once its outputs are written"""
+        value = self._pending.pop(stage, None)
+        if value is None:
+            return
+        self.entries[stage] = {
+            "fingerprint": value,
+            "outputs": list(outputs),
+            "recordedAt": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        }
+        self._mark_processed(self.entries[stage])
+        self._dirty = True
+
+    def save(self):
+        if self.path is None or not self._dirty:
+            return
+        with atomic_open(self.path) as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        self._dirty = False
+
+    def log_summary(self):
+        if self.status:
+            logger.info("Stage fingerprints: " + ", ".join(f"{stage} {status}" for stage, status in self.status.items()))
@@ -2,12 +2,24 @@ import requests
 import json
 import time
 import os
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 import firebase_admin
 from firebase_admin import credentials
 from firebase_admin import db
 
+from nhl_api import (NHL_API_BASE_URL, DEFAULT_WORKERS, DEFAULT_TIMEOUT, DEFAULT_RATE, DEFAULT_BURST,
+                     RateLimiter, create_session, fetch_landings)
+from landing_cache import open_landing_cache, trim_landing
+from checkpoint import DEFAULT_MAX_AGE, CheckpointJournal, checkpoint_path
+from player_database import (RosterDelta, carry_forward_stats, load_player_index, stale_teams_since_last_build,
+                             write_delta_report)
+from data_io import JsonArrayWriter, JsonlWriter, batched, jsonl_path, jsonl_to_json
+from search_index import build_index_for_file
+
+# Teams whose rosters and players are fetched and written at a time
+DEFAULT_TEAMS_PER_BATCH = 4
+
 def initialize_firebase():
     """Initialize Firebase connection"""
     try:
@@ -67,67 +79,122 @@ def get_position_code(player):
     
     return 'N/A'  # Default if no position found
 
-def fetch_player_stats(player_id, position_code, stats_type="regularSeason", retries=3, backoff_factor=0.3):
-    """Fetch player statistics - either regular season or playoffs"""
-    stats_url = f"https://api-web.nhle.com/v1/player/{player_id}/landing"
+def parse_player_stats(data, position_code, stats_type="regularSeason"):
+    """Player statistics from a /landing payload - either regular season or playoffs (None means the fetch failed)"""
+    if data is None:
+        # Return minimal stats on error
+        if position_code == 'G':
+            return {'gamesPlayed': 0, 'wins': 0, 'shutouts': 0}
+        else:
+            return {'gamesPlayed': 0, 'goals': 0, 'assists': 0, 'points': 0}
+    
+    # Get either regular season or playoff stats based on stats_type
+    if stats_type == "playoffs":
+        featured_stats = data.get('featuredStats', {}).get('playoffs', {}).get('subSeason', {})
+    else:  # Default to regular season
+        featured_stats = data.get('featuredStats', {}).get('regularSeason', {}).get('subSeason', {})
+    
+    # Base stats for all players
+    player_stats = {
+        'gamesPlayed': featured_stats.get('gamesPlayed', 0),
+    }
     
-    session = requests.Session()
-    retry_strategy = Retry(
-        total=retries,
-        status_forcelist=[429, 500, 502, 503, 504],
-        allowed_methods=["HEAD", "GET", "OPTIONS"],
-        backoff_factor=backoff_factor
-    )
-    adapter = HTTPAdapter(max_retries=retry_strategy)
-    session.mount("https://", adapter)
-    session.mount("http://", adapter)
+    if position_code in ['G']:  # Goalie stats
+        player_stats.update({
+            'wins': featured_stats.get('wins', 0),
+            'losses': featured_stats.get('losses', 0),
+            'otLosses': featured_stats.get('otLosses', 0),
+            'shutouts': featured_stats.get('shutouts', 0),
+            'goalsAgainstAverage': featured_stats.get('goalsAgainstAverage', 0),
+            'savePercentage': featured_stats.get('savePercentage', 0)
+        })
+    else:  # Skater stats (forwards and defensemen)
+        player_stats.update({
+            'goals': featured_stats.get('goals', 0),
+            'assists': featured_stats.get('assists', 0),
+            'points': featured_stats.get('points', 0),
+            'plusMinus': featured_stats.get('plusMinus', 0),
+            'pim': featured_stats.get('pim', 0),
+            'powerPlayGoals': featured_stats.get('powerPlayGoals', 0),
+            'powerPlayPoints': featured_stats.get('powerPlayPoints', 0),
+            'gameWinningGoals': featured_stats.get('gameWinningGoals', 0)
+        })
+    
+    return player_stats
 
+def fetch_roster(team, session, timeout=DEFAULT_TIMEOUT):
+    """Fetch a team's current roster, or None if the request failed"""
+    url = f"{NHL_API_BASE_URL}/roster/{team}/current"  # Use 'current' to get current season
     try:
-        response = session.get(stats_url, timeout=10)
+        response = session.get(url, timeout=timeout)
         response.raise_for_status()
-        data = response.json()
-        
-        # Get either regular season or playoff stats based on stats_type
-        if stats_type == "playoffs":
-            featured_stats = data.get('featuredStats', {}).get('playoffs', {}).get('subSeason', {})
-        else:  # Default to regular season
-            featured_stats = data.get('featuredStats', {}).get('regularSeason', {}).get('subSeason', {})
-        
-        # Base stats for all players
-        player_stats = {
-            'gamesPlayed': featured_stats.get('gamesPlayed', 0),
-        }
-        
-        if position_code in ['G']:  # Goalie stats
-            player_stats.update({
-                'wins': featured_stats.get('wins', 0),
-                'losses': featured_stats.get('losses', 0),
-                'otLosses': featured_stats.get('otLosses', 0),
-                'shutouts': featured_stats.get('shutouts', 0),
-                'goalsAgainstAverage': featured_stats.get('goalsAgainstAverage', 0),
-                'savePercentage': featured_stats.get('savePercentage', 0)
-            })
-        else:  # Skater stats (forwards and defensemen)
-            player_stats.update({
-                'goals': featured_stats.get('goals', 0),
-                'assists': featured_stats.get('assists', 0),
-                'points': featured_stats.get('points', 0),
-                'plusMinus': featured_stats.get('plusMinus', 0),
-                'pim': featured_stats.get('pim', 0),
-                'powerPlayGoals': featured_stats.get('powerPlayGoals', 0),
-                'powerPlayPoints': featured_stats.get('powerPlayPoints', 0),
-                'gameWinningGoals': featured_stats.get('gameWinningGoals', 0)
+        return response.json()
+    except requests.exceptions.RequestException as e:
+        print(f"Failed to fetch data for team {team}. Error: {e}")
+        return None
+
+def roster_players(team, roster):
+    """Basic player info for every forward, defenseman and goalie on a roster, in roster order"""
+    players = []
+    # Process all player categories (forwards, defensemen, goalies)
+    for category in ['forwards', 'defensemen', 'goalies']:
+        for player in roster.get(category, []):
+            players.append({
+                "id": player['id'],
+                "fullName": get_full_name(player),
+                "firstName": player.get('firstName', {}).get('default', ''),
+                "lastName": player.get('lastName', {}).get('default', ''),
+                "positionCode": player.get('positionCode', ''),
+                # Get position code with proper mapping
+                "position": get_position_code(player),
+                "teamAbbreviation": team,
+                "jerseyNumber": player.get('jerseyNumber', '')
             })
+    return players
+
+def iter_players(team_abbreviations, stats_type, session, tracker, existing_by_id, cache=None, workers=DEFAULT_WORKERS,
+                 timeout=DEFAULT_TIMEOUT, teams_per_batch=DEFAULT_TEAMS_PER_BATCH, journal=None, resumed=None):
+    """
+    Yield player info plus stats for every player on the given teams, in team and roster order.
+    Teams are handled a few at a time: their rosters and then player landings are fetched
+    concurrently and the players yielded before the next teams are requested, so memory stays
+    bounded however many teams there are. The session's rate limiter paces the requests.
+    
+    The RosterDelta tracker decides which players are refetched (new, moved and stale ones);
+    everyone else keeps the stats from their entry in existing_by_id. Players in `resumed` (from
+    the checkpoint journal) are not fetched again; every new landing fetch is journaled.
+    """
+    resumed = resumed or {}
+    
+    def record(player_id, data):
+        if data is not None and journal is not None:
+            journal.record(player_id, trim_landing(data))
+    
+    rosters_loaded = 0
+    for teams in batched(team_abbreviations, max(1, teams_per_batch)):
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(teams)))) as executor:
+            rosters = list(executor.map(lambda team: fetch_roster(team, session, timeout), teams))
+        rosters_loaded += sum(roster is not None for roster in rosters)
         
-        return player_stats
+        players = []
+        for team, roster in zip(teams, rosters):
+            if roster is not None:
+                players.extend(roster_players(team, roster))
+        to_fetch = [player for player in players if tracker.add(player)]
+        print(f"Processing teams: {', '.join(teams)} - fetching stats for {len(to_fetch)} of {len(players)} players")
         
-    except requests.exceptions.RequestException as e:
-        print(f"Failed to fetch stats for player {player_id}. Error: {e}")
-        # Return minimal stats on error
-        if position_code == 'G':
-            return {'gamesPlayed': 0, 'wins': 0, 'shutouts': 0}
-        else:
-            return {'gamesPlayed': 0, 'goals': 0, 'assists': 0, 'points': 0}
+        landing_ids = [player['id'] for player in to_fetch if str(player['id']) not in resumed]
+        landings_by_id = dict(zip(landing_ids, fetch_landings(landing_ids, workers=workers, timeout=timeout,
+                                                              session=session, cache=cache, on_result=record)))
+        for player_data in to_fetch:
+            data = resumed.pop(str(player_data['id']), None) or landings_by_id.get(player_data['id'])
+            player_data.update(parse_player_stats(data, player_data['position'], stats_type))
+        fetched_ids = {player['id'] for player in to_fetch}
+        for player_data in players:
+            if player_data['id'] not in fetched_ids:
+                carry_forward_stats(player_data, existing_by_id[player_data['id']])
+        yield from players
+    print(f"Fetched {rosters_loaded} of {len(team_abbreviations)} rosters")
 
 def load_manual_players(file_path):
     """Load manually added players from a JSON file"""
@@ -145,7 +212,9 @@ def load_manual_players(file_path):
         print(f"Error loading manual player file: {e}")
         return []
 
-def get_all_players(league_id="ONaEwjf0r2hguG0LaAuc"):
+def get_all_players(league_id="ONaEwjf0r2hguG0LaAuc", no_cache=False, workers=DEFAULT_WORKERS,
+                    rate=DEFAULT_RATE, burst=DEFAULT_BURST, incremental=False, stream=False, resume=False,
+                    resume_max_age=DEFAULT_MAX_AGE):
     """Generate database of all NHL players - regular season or playoff stats based on current round"""
     
     # Initialize Firebase
@@ -175,95 +244,117 @@ def get_all_players(league_id="ONaEwjf0r2hguG0LaAuc"):
     #                     'EDM', 'VAN', 'ANA', 'DAL', 'LAK', 'SJS', 'CBJ', 'MIN', 'WPG', 
     #                     'VGK', 'SEA', 'UTA']
 
-    # Base URL for the API
-    base_url = "https://api-web.nhle.com/v1/roster/"
-    
-    # Dictionary to collect all players
-    all_players = []
+    # Players whose team has not played since the last run are served from the landing cache
+    cache = open_landing_cache(no_cache)
     
-    # Loop through each team and fetch player data
-    for team in team_abbreviations:
-        print(f"Processing team: {team}")
-        url = f"{base_url}{team}/current"  # Use 'current' to get current season
-        
-        try:
-            response = requests.get(url)
-            response.raise_for_status()
-            data = response.json()
-            
-            # Process all player categories (forwards, defensemen, goalies)
-            for category in ['forwards', 'defensemen', 'goalies']:
-                if category in data:
-                    for player in data[category]:
-                        # Get position code with proper mapping
-                        position_code = get_position_code(player)
-                        
-                        # Get basic player info
-                        player_data = {
-                            "id": player['id'],
-                            "fullName": get_full_name(player),
-                            "firstName": player.get('firstName', {}).get('default', ''),
-                            "lastName": player.get('lastName', {}).get('default', ''),
-                            "positionCode": player.get('positionCode', ''),
-                            "position": position_code,
-                            "teamAbbreviation": team,
-                            "jerseyNumber": player.get('jerseyNumber', '')
-                        }
-                        
-                        # Add player stats (with a small delay to avoid rate limiting)
-                        stats = fetch_player_stats(player['id'], position_code, stats_type)
-                        player_data.update(stats)
-                        
-                        all_players.append(player_data)
-                        time.sleep(0.1)  # Small delay between player requests
-            
-            # Small delay between team requests
-            time.sleep(0.5)
-            
-        except requests.exceptions.RequestException as e:
-            print(f"Failed to fetch data for team {team}. Error: {e}")
+    # The existing file is diffed against the rosters; in incremental mode it also supplies
+    # the stats of players who have not moved or played since it was built (otherwise only teams are kept)
+    existing_by_id = load_player_index(output_file, with_stats=incremental)
+    stale_teams = stale_teams_since_last_build(output_file) if incremental else None
+    tracker = RosterDelta(existing_by_id, stale_teams)
     
-    # Load and add manual players
+    # Load manual players
     manual_players_file = 'data/manual-playerlist.json'
     manual_players = load_manual_players(manual_players_file)
     
-    if manual_players:
-        # Check for duplicate players - we'll use player ID as the unique identifier
-        existing_ids = {player['id'] for player in all_players}
-        
-        for manual_player in manual_players:
-            player_id = manual_player.get('id')
-            
-            # Skip duplicates
-            if player_id in existing_ids:
-                print(f"Skipping duplicate player: {manual_player.get('fullName')} (ID: {player_id})")
-                continue
-            
-            # Add to our list and update tracking set
-            all_players.append(manual_player)
-            existing_ids.add(player_id)
+    # Every finished fetch is journaled so an interrupted or cancelled run can be resumed
+    journal = CheckpointJournal(checkpoint_path('get_all_players'))
+    resumed = {}
+    if resume:
+        resumed = journal.load(resume_max_age)
+        print(f"Resuming: {len(resumed)} players already fetched")
+    else:
+        journal.clear()
+    
+    # One connection pool and request budget for every roster and player request
+    limiter = RateLimiter(rate, burst)
+    session = create_session(workers, limiter)
+    start_time = time.perf_counter()
+    # Players are written as soon as their teams are done
+    writer = JsonlWriter(jsonl_path(output_file)) if stream else JsonArrayWriter(output_file, indent=2)
+    try:
+        with writer:
+            # Check for duplicate players - we'll use player ID as the unique identifier
+            existing_ids = set()
+            for player_data in iter_players(team_abbreviations, stats_type, session, tracker, existing_by_id,
+                                            cache, workers, journal=journal, resumed=resumed):
+                writer.write(player_data)
+                existing_ids.add(player_data['id'])
+            roster_count = writer.count
             
-            print(f"Added manual player: {manual_player.get('fullName')} (ID: {player_id})")
+            # Add manual players after the rostered ones
+            for manual_player in manual_players:
+                player_id = manual_player.get('id')
+                
+                # Skip duplicates
+                if player_id in existing_ids:
+                    print(f"Skipping duplicate player: {manual_player.get('fullName')} (ID: {player_id})")
+                    continue
+                
+                # Add to our file and update tracking set
+                writer.write(manual_player)
+                existing_ids.add(player_id)
+                
+                print(f"Added manual player: {manual_player.get('fullName')} (ID: {player_id})")
+    finally:
+        session.close()
+        journal.close()
+    print(f"Fetched {roster_count} players in {time.perf_counter() - start_time:.1f}s "
+          f"({session.requests_sent} requests, {session.retried} retries, {limiter.throttled_count} throttled, {limiter.waited:.1f}s waiting for the rate limit)")
+    
+    if stream:
+        # The front end reads the legacy array
+        jsonl_to_json(jsonl_path(output_file), output_file, indent=2)
+    
+    if cache is not None:
+        cache.save()
+        cache_stats = cache.stats()
+        print(f"Landing cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+              f"{cache_stats['revalidations']} revalidated")
     
-    # Save all players to JSON file
-    with open(output_file, 'w') as json_file:
-        json.dump(all_players, json_file, indent=2)
+    print(f"Successfully saved {writer.count} players to {output_file}")
     
-    print(f"Successfully saved {len(all_players)} players to {output_file}")
+    # Manual players are not on a roster but were not removed either
+    delta = tracker.finish()
+    manual_ids = {manual_player.get('id') for manual_player in manual_players}
+    delta["removed"] = [player_id for player_id in delta["removed"] if player_id not in manual_ids]
+    write_delta_report(output_file, delta, session.requests_sent)
+    # The output is final, so nothing is left to resume
+    journal.clear()
+    
+    # The draft centre searches the prebuilt index rather than downloading the whole file
+    build_index_for_file(output_file)
 
 def main():
     # Ensure data directory exists
     os.makedirs('data', exist_ok=True)
     
     # Default league ID, can be overridden by command line argument
-    league_id = "ONaEwjf0r2hguG0LaAuc"
-    
-    # Check if a league ID was provided as a command line argument
-    import sys
-    if len(sys.argv) > 1:
-        league_id = sys.argv[1]
+    import argparse
+    parser = argparse.ArgumentParser(description="Generate the NHL player database")
+    parser.add_argument("league_id", nargs="?", default="ONaEwjf0r2hguG0LaAuc",
+                        help="League used to look up the current playoff round")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Ignore the on-disk landing cache and fetch every player")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"Number of concurrent NHL API requests (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE,
+                        help=f"Maximum NHL API requests per second; lowered automatically when throttled (default: {DEFAULT_RATE})")
+    parser.add_argument("--burst", type=int, default=DEFAULT_BURST,
+                        help=f"Requests that may be sent back to back before the rate applies (default: {DEFAULT_BURST})")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only refetch stats for new and moved players and teams that played since the last build")
+    parser.add_argument("--stream", action="store_true",
+                        help="Also keep the output as JSONL, one player per line, next to the JSON array")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip players an interrupted earlier run already fetched (see --resume-max-age)")
+    parser.add_argument("--resume-max-age", type=float, default=DEFAULT_MAX_AGE.total_seconds() / 3600,
+                        help=f"Hours a fetch from an interrupted run stays usable (default: {DEFAULT_MAX_AGE.total_seconds() / 3600:g})")
+    args = parser.parse_args()
     
-    get_all_players(league_id)
+    get_all_players(args.league_id, no_cache=args.no_cache, workers=args.workers, rate=args.rate, burst=args.burst,
+                    incremental=args.incremental, stream=args.stream, resume=args.resume,
+                    resume_max_age=timedelta(hours=args.resume_max_age))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
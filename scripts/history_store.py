@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+import os
+import json
+import argparse
+import logging
+import tempfile
+from datetime import datetime, timedelta
+
+from snapshots import list_snapshots
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# One append-only log per snapshot kind: data/history/<kind>.jsonl
+HISTORY_DIR = os.path.join('data', 'history')
+# Field identifying a row in each kind of daily snapshot
+SNAPSHOT_KEYS = {
+    'updatedstats': 'Player ID',
+    'standings': 'Team',
+}
+# Write a full snapshot every this many entries so reading one date never replays the whole season
+KEYFRAME_INTERVAL = 30
+# Retention: every day is kept this long; older days are rolled up to the last snapshot of each week
+KEEP_DAILY_DAYS = 60
+# `prune` leaves the daily files from this many recent days in data/ for the website and the scripts
+KEEP_DAILY_FILES_DAYS = 14
+
+
+def _format_date(day):
+    return day.strftime('%Y%m%d')
+
+
+def _parse_date(value):
+    return datetime.strptime(value, '%Y%m%d').date()
+
+
+def encode_delta(previous_rows, rows, key_field):
+    """
+    Describe `rows` as changes against `previous_rows`, or return None if the rows cannot be keyed
+    (missing or duplicate keys), in which case a full snapshot has to be stored.
+    The delta holds changed fields ("update"), new or reshaped rows ("set"), removed keys ("remove")
+    and the row order when it is not simply the previous order plus new rows at the end ("order").
+    """
+    keys = [row.get(key_field) for row in rows]
+    if None in keys or len(set(keys)) != len(keys):
+        return None
+    previous = {row[key_field]: row for row in previous_rows}
+
+    delta = {}
+    updates = {}
+    new_rows = {}
+    for key, row in zip(keys, rows):
+        old_row = previous.get(key)
+        if old_row is None or list(old_row) != list(row):
+            # New row, or its fields changed order: store it whole so the export keeps the layout
+            new_rows[key] = row
+            continue
+        changed = {field: value for field, value in row.items() if old_row[field] != value}
+        if changed:
+            updates[key] = changed
+    removed = [key for key in previous if key not in set(keys)]
+
+    if updates:
+        delta['update'] = updates
+    if new_rows:
+        delta['set'] = new_rows
+    if removed:
+        delta['remove'] = removed
+    removed_set = set(removed)
+    default_order = [key for key in previous if key not in removed_set]
+    default_order += [key for key in new_rows if key not in previous]
+    if default_order != keys:
+        delta['order'] = keys
+    return delta
+
+
+def apply_delta(previous_rows, delta, key_field):
+    """Rebuild a snapshot from the previous day's rows and an encoded delta"""
+    rows_by_key = {row[key_field]: row for row in previous_rows}
+    for key in delta.get('remove', []):
+        rows_by_key.pop(key, None)
+    for key, changed in delta.get('update', {}).items():
+        row = dict(rows_by_key[key])
+        row.update(changed)
+        rows_by_key[key] = row
+    for key, row in delta.get('set', {}).items():
+        rows_by_key[key] = row
+    order = delta.get('order', rows_by_key.keys())
+    return [rows_by_key[key] for key in order]
+
+
+class HistoryStore:
+    """
+    Append-only history of one kind of daily snapshot (updatedstats or standings).
+
+    Each line of the log is one day: either a full snapshot ("rows") or a delta against
+    the previous day (see encode_delta). Identical days are a single short line.
+    Appending the same date again supersedes the earlier entry for that date.
+    """
+
+    def __init__(self, kind, history_dir=HISTORY_DIR):
+        if kind not in SNAPSHOT_KEYS:
+            raise ValueError(f"Unknown snapshot kind '{kind}', expected one of {sorted(SNAPSHOT_KEYS)}")
+        self.kind = kind
+        self.key_field = SNAPSHOT_KEYS[kind]
+        self.path = os.path.join(history_dir, f'{kind}.jsonl')
+        self._entries = None
+
+    def entries(self):
+        """Log entries in file order (read once and kept in memory)"""
+        if self._entries is None:
+            self._entries = []
+            try:
+                with open(self.path, 'r') as f:
+                    for line in f:
+                        if line.strip():
+                            self._entries.append(json.loads(line))
+            except FileNotFoundError:
+                pass
+        return self._entries
+
+    def dates(self):
+        """Dates that have a snapshot, oldest first"""
+        return sorted({_parse_date(entry['date']) for entry in self.entries()})
+
+    def iter_snapshots(self):
+        """Yield (date, rows) for every stored day in date order, replaying the log once"""
+        rows = []
+        latest = {}
+        for entry in self.entries():
+            rows = entry['rows'] if 'rows' in entry else apply_delta(rows, entry, self.key_field)
+            latest[entry['date']] = rows
+        for date_str in sorted(latest):
+            yield _parse_date(date_str), latest[date_str]
+
+    def snapshot(self, day):
+        """Rows stored for one date, replayed from the nearest full snapshot; None if the date is missing"""
+        target = _format_date(day)
+        entries = self.entries()
+        last = max((i for i, entry in enumerate(entries) if entry['date'] == target), default=None)
+        if last is None:
+            return None
+        start = max(i for i in range(last + 1) if 'rows' in entries[i])
+        rows = entries[start]['rows']
+        for entry in entries[start + 1:last + 1]:
+            rows = apply_delta(rows, entry, self.key_field)
+        return rows
+
+    def latest(self):
+        """(date, rows) of the entry appended last, or (None, None) for an empty store"""
+        entries = self.entries()
+        if not entries:
+            return None, None
+        return _parse_date(entries[-1]['date']), self.snapshot(_parse_date(entries[-1]['date']))
+
+    def _encode_entry(self, day, rows, previous_rows, since_keyframe):
+        """Log entry for one day: a delta against previous_rows, or a full snapshot every KEYFRAME_INTERVAL entries"""
+        entry = {'date': _format_date(day)}
+        delta = None
+        if previous_rows is not None and since_keyframe + 1 < KEYFRAME_INTERVAL:
+            delta = encode_delta(previous_rows, rows, self.key_field)
+        if delta is None:
+            entry['rows'] = rows
+        else:
+            entry.update(delta)
+        return entry
+
+    def append(self, day, rows):
+        """Append one day's snapshot to the log, as a delta against the last entry when possible"""
+        entries = self.entries()
+        since_keyframe = next((n for n, entry in enumerate(reversed(entries)) if 'rows' in entry), None)
+        previous_rows = self.latest()[1] if since_keyframe is not None else None
+        entry = self._encode_entry(day, rows, previous_rows, since_keyframe or 0)
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(entry, separators=(',', ':')) + '\n')
+        entries.append(entry)
+        return entry
+
+    def rewrite(self, snapshots):
+        """Atomically replace the whole log with the given (date, rows) pairs"""
+        entries = []
+        previous_rows = None
+        since_keyframe = 0
+        for day, rows in snapshots:
+            entry = self._encode_entry(day, rows, previous_rows, since_keyframe)
+            since_keyframe = 0 if 'rows' in entry else since_keyframe + 1
+            previous_rows = rows
+            entries.append(entry)
+
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            for entry in entries:
+                f.write(json.dumps(entry, separators=(',', ':')) + '\n')
+        # The log is committed next to the daily files; mkstemp creates it owner-only
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, self.path)
+        self._entries = entries
+        return entries
+
+    def compact(self, keep_daily_days=KEEP_DAILY_DAYS, today=None):
+        """
+        Apply the retention policy: keep every day from the last `keep_daily_days` days and,
+        before that, only the last snapshot of each ISO week. Returns the number of days dropped.
+        """
+        snapshots = list(self.iter_snapshots())
+        if not snapshots:
+            return 0
+        cutoff = (today or snapshots[-1][0]) - timedelta(days=keep_daily_days)
+        last_of_week = {}
+        for day, _ in snapshots:
+            if day < cutoff:
+                last_of_week[day.isocalendar()[:2]] = day
+        kept = [(day, rows) for day, rows in snapshots
+                if day >= cutoff or last_of_week[day.isocalendar()[:2]] == day]
+        self.rewrite(kept)
+        dropped = len(snapshots) - len(kept)
+        logger.info(f"Compacted {self.path}: kept {len(kept)} days, rolled up {dropped}")
+        return dropped
+
+
+def record_snapshot(kind, rows, run_date=None, history_dir=HISTORY_DIR):
+    """Append today's (or run_date's) rows to the history log for `kind`"""
+    return HistoryStore(kind, history_dir).append((run_date or datetime.now()).date(), rows)
+
+
+def import_snapshots(data_dir='data', history_dir=HISTORY_DIR, kinds=tuple(SNAPSHOT_KEYS)):
+    """
+    Rebuild the history logs from the daily <kind>-*.json files in data_dir.
+    Days already in the history without a daily file (e.g. pruned ones) are kept.
+    """
+    imported = {}
+    for kind in kinds:
+        store = HistoryStore(kind, history_dir)
+        snapshots = dict(store.iter_snapshots())
+        files = list_snapshots(kind, data_dir)
+        for day, path in files:
+            with open(path, 'r') as f:
+                snapshots[day] = json.load(f)
+        store.rewrite(sorted(snapshots.items()))
+        imported[kind] = len(files)
+        logger.info(f"Imported {len(files)} {kind} snapshots into {store.path} ({len(snapshots)} days stored)")
+    return imported
+
+
+def export_snapshots(kind, out_dir='data', history_dir=HISTORY_DIR, start=None, end=None):
+    """Write <kind>-YYYYMMDD.json files (same format as the daily scripts) for the stored dates in [start, end]"""
+    os.makedirs(out_dir, exist_ok=True)
+    written = []
+    for day, rows in HistoryStore(kind, history_dir).iter_snapshots():
+        if (start and day < start) or (end and day > end):
+            continue
+        path = os.path.join(out_dir, f'{kind}-{_format_date(day)}.json')
+        with open(path, 'w') as f:
+            json.dump(rows, f, indent=4)
+        written.append(path)
+    logger.info(f"Exported {len(written)} {kind} snapshots to {out_dir}")
+    return written
+
+
+def prune_daily_files(kind, data_dir='data', history_dir=HISTORY_DIR, keep_days=KEEP_DAILY_FILES_DAYS, today=None):
+    """
+    Delete <kind>-*.json files older than keep_days that the history reproduces exactly.
+    Files the history does not match are left in place, and so is the newest file, which the
+    pipeline gate and --incremental read however old it is. Returns the deleted paths.
+    """
+    store = HistoryStore(kind, history_dir)
+    stored = dict(store.iter_snapshots())
+    cutoff = (today or datetime.now().date()) - timedelta(days=keep_days)
+    deleted = []
+    for day, path in list_snapshots(kind, data_dir)[:-1]:
+        if day >= cutoff:
+            continue
+        with open(path, 'r') as f:
+            content = f.read()
+        if day not in stored or json.dumps(stored[day], indent=4) != content:
+            logger.warning(f"Keeping {path}: the history does not reproduce it")
+            continue
+        os.remove(path)
+        deleted.append(path)
+    logger.info(f"Pruned {len(deleted)} {kind} daily files older than {cutoff}")
+    return deleted
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the compact history of daily stats and standings snapshots")
+    parser.add_argument("--history-dir", default=HISTORY_DIR,
+                        help=f"Directory holding the history logs (default: {HISTORY_DIR})")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import", help="Rebuild the history from the daily files in data/")
+    import_parser.add_argument("--data-dir", default="data")
+
+    export_parser = subparsers.add_parser("export", help="Write legacy daily files from the history")
+    export_parser.add_argument("kind", choices=sorted(SNAPSHOT_KEYS))
+    export_parser.add_argument("--out-dir", default="data")
+    export_parser.add_argument("--start", type=_parse_date, help="First date to export (YYYYMMDD)")
+    export_parser.add_argument("--end", type=_parse_date, help="Last date to export (YYYYMMDD)")
+
+    compact_parser = subparsers.add_parser("compact", help="Apply the retention/rollup policy")
+    compact_parser.add_argument("--keep-daily-days", type=int, default=KEEP_DAILY_DAYS,
+                                help=f"Days kept at daily resolution (default: {KEEP_DAILY_DAYS})")
+
+    prune_parser = subparsers.add_parser("prune", help="Delete old daily files that the history reproduces")
+    prune_parser.add_argument("--data-dir", default="data")
+    prune_parser.add_argument("--keep-days", type=int, default=KEEP_DAILY_FILES_DAYS,
+                              help=f"Daily files from the last this many days are kept (default: {KEEP_DAILY_FILES_DAYS})")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == "import":
+        return import_snapshots(args.data_dir, args.history_dir)
+    if args.command == "export":
+        return export_snapshots(args.kind, args.out_dir, args.history_dir, args.start, args.end)
+    if args.command == "prune":
+        return {kind: prune_daily_files(kind, args.data_dir, args.history_dir, args.keep_days) for kind in SNAPSHOT_KEYS}
+    return {kind: HistoryStore(kind, args.history_dir).compact(args.keep_daily_days) for kind in SNAPSHOT_KEYS}
+
+
+if __name__ == "__main__":
+    main()
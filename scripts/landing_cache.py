@@ -0,0 +1,205 @@
+import os
+import json
+import logging
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone
+
+from nhl_api import fetch_finished_games, latest_game_start_by_team, parse_api_datetime
+
+logger = logging.getLogger(__name__)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Default on-disk location. Kept out of data/ so it never lands in the repo;
+# the workflows persist it between runs with actions/cache instead.
+DEFAULT_CACHE_PATH = os.path.join(REPO_ROOT, '.cache', 'nhl', 'landing_cache.json')
+
+# Entries older than this are dropped no matter what the schedule says
+MAX_ENTRY_AGE = timedelta(days=7)
+# Upper bound on the number of cached players (oldest fetches are evicted first)
+MAX_ENTRIES = 5000
+# A game that started less than this long before a fetch may still have been
+# in progress, so its stats might not be in the cached payload yet
+GAME_DURATION_MARGIN = timedelta(hours=6)
+
+
+def trim_landing(data):
+    """Keep only the parts of a /landing payload that the scripts actually read"""
+    return {
+        'featuredStats': data.get('featuredStats', {}),
+        'position': data.get('position'),
+        'currentTeamAbbrev': data.get('currentTeamAbbrev'),
+    }
+
+
+class LandingCache:
+    """
+    Persistent cache of trimmed /landing payloads keyed by NHL player ID.
+
+    An entry is fresh while the player's NHL team has not finished a game since
+    the entry was fetched. Stale entries are revalidated with the stored ETag /
+    Last-Modified validators when the API supplied them.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_age=MAX_ENTRY_AGE, max_entries=MAX_ENTRIES):
+        self.path = path
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self.entries = {}
+        # team abbreviation -> start time of its latest finished game; None means unknown
+        self.team_last_game = None
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.stale_fallbacks = 0
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Load entries from disk, ignoring a missing or unreadable file"""
+        try:
+            with open(self.path, 'r') as f:
+                self.entries = json.load(f).get('entries', {})
+            logger.info(f"Loaded {len(self.entries)} cached landing entries from {self.path}")
+        except FileNotFoundError:
+            self.entries = {}
+        except (json.JSONDecodeError, AttributeError) as e:
+            logger.warning(f"Ignoring unreadable landing cache {self.path}: {e}")
+            self.entries = {}
+        return self
+
+    def save(self):
+        """Evict old entries and write the cache atomically"""
+        self.evict()
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'entries': self.entries}, f, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+
+    def evict(self, now=None):
+        """Drop entries older than max_age, then the oldest ones beyond max_entries"""
+        now = now or datetime.now(timezone.utc)
+        with self._lock:
+            for player_id in list(self.entries):
+                fetched_at = parse_api_datetime(self.entries[player_id].get('fetchedAt'))
+                if fetched_at is None or now - fetched_at > self.max_age:
+                    del self.entries[player_id]
+            if len(self.entries) > self.max_entries:
+                by_age = sorted(self.entries, key=lambda pid: self.entries[pid]['fetchedAt'])
+                for player_id in by_age[:len(self.entries) - self.max_entries]:
+                    del self.entries[player_id]
+
+    def refresh_schedule(self, session=None, today=None):
+        """
+        Look up finished games since the oldest cached fetch so freshness can be
+        judged per team. On failure every entry is treated as stale.
+        """
+        today = today or datetime.now(timezone.utc).date()
+        fetch_times = [parse_api_datetime(e.get('fetchedAt')) for e in self.entries.values()]
+        fetch_times = [t for t in fetch_times if t is not None]
+        if not fetch_times:
+            self.team_last_game = {}
+            return
+        # Start a day early so late games overlapping the oldest fetch are included
+        start_date = (min(fetch_times) - timedelta(days=1)).date()
+        try:
+            games = fetch_finished_games(start_date, today, session)
+            self.team_last_game = latest_game_start_by_team(games)
+            logger.info(f"Found {len(games)} finished games since {start_date} for cache freshness")
+        except Exception as e:
+            logger.warning(f"Could not load schedule for cache freshness, revalidating all entries: {e}")
+            self.team_last_game = None
+
+    def is_fresh(self, entry, now=None):
+        """True if the entry's team has not finished a game since the entry was fetched"""
+        now = now or datetime.now(timezone.utc)
+        fetched_at = parse_api_datetime(entry.get('fetchedAt'))
+        if fetched_at is None or now - fetched_at > self.max_age or self.team_last_game is None:
+            return False
+        team = entry.get('data', {}).get('currentTeamAbbrev')
+        if not team:
+            return False
+        last_game = self.team_last_game.get(team)
+        if last_game is None:
+            return True
+        return last_game + GAME_DURATION_MARGIN <= fetched_at
+
+    def lookup(self, player_id):
+        """Return cached data if fresh (counted as a hit), otherwise None (counted as a miss)"""
+        key = str(player_id)
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None and self.is_fresh(entry):
+                self.hits += 1
+                return entry['data']
+            self.misses += 1
+            return None
+
+    def conditional_headers(self, player_id):
+        """Validators for a conditional GET of a stale entry, if the API gave us any"""
+        entry = self.entries.get(str(player_id))
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('lastModified'):
+                headers['If-Modified-Since'] = entry['lastModified']
+        return headers
+
+    def store(self, player_id, data, headers=None):
+        """Cache a freshly fetched payload and return its trimmed form"""
+        headers = headers or {}
+        trimmed = trim_landing(data)
+        with self._lock:
+            self.entries[str(player_id)] = {
+                'data': trimmed,
+                'fetchedAt': datetime.now(timezone.utc).isoformat(),
+                'etag': headers.get('ETag'),
+                'lastModified': headers.get('Last-Modified'),
+            }
+        return trimmed
+
+    def revalidated(self, player_id):
+        """Handle a 304 Not Modified: the cached data is current again"""
+        with self._lock:
+            entry = self.entries[str(player_id)]
+            entry['fetchedAt'] = datetime.now(timezone.utc).isoformat()
+            self.revalidations += 1
+            return entry['data']
+
+    def fallback(self, player_id):
+        """Serve stale data when a request fails, or None if nothing is cached"""
+        with self._lock:
+            entry = self.entries.get(str(player_id))
+            if entry is None:
+                return None
+            self.stale_fallbacks += 1
+            return entry['data']
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'revalidations': self.revalidations,
+            'staleFallbacks': self.stale_fallbacks,
+            'hitRatio': round(self.hits / total, 3) if total else 0.0,
+            'entries': len(self.entries),
+        }
+
+    def log_summary(self):
+        stats = self.stats()
+        logger.info(f"Landing cache: {stats['hits']} hits, {stats['misses']} misses "
+                    f"({stats['revalidations']} revalidated via 304, {stats['staleFallbacks']} stale fallbacks), "
+                    f"hit ratio {stats['hitRatio']:.1%}, {stats['entries']} entries")
+
+
+def open_landing_cache(no_cache=False, path=DEFAULT_CACHE_PATH, session=None):
+    """Load the landing cache and its schedule-based freshness data, or return None when disabled"""
+    if no_cache:
+        return None
+    cache = LandingCache(path).load()
+    cache.refresh_schedule(session)
+    return cache
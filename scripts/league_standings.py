@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+import os
+import json
+import argparse
+import logging
+from datetime import datetime
+
+from nhl_api import DEFAULT_WORKERS, DEFAULT_TIMEOUT
+from landing_cache import open_landing_cache
+from stats_provider import PlayerStatsProvider
+from fetch_stats import STAT_FIELDS, parse_player_stats
+from boxscores import GORDIE_HOWE_FIELD
+from calculate_standings import calculate_league_standings, format_standings
+from scoring_rules import rules_for_leagues
+from rtdb import CountingReference, read_leagues
+from data_io import LEAGUES_DATA_DIR
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def build_ownership_index(leagues_snapshot):
+    """
+    Build an index from NHL player ID to every fantasy roster that owns the player.
+    Each ownership records the league, fantasy team, NHL playoff round the player was
+    acquired in and the pre-acquisition points recorded for that round.
+    Banked picks and entries without a playerId are skipped.
+    """
+    index = {}
+    for league_id, league_data in (leagues_snapshot or {}).items():
+        if not isinstance(league_data, dict) or not isinstance(league_data.get('draftedPlayers'), dict):
+            continue
+        for firebase_player_key, player_data in league_data['draftedPlayers'].items():
+            if not isinstance(player_data, dict) or not player_data.get('playerId'):
+                continue
+            nhl_player_id = str(player_data['playerId'])
+            index.setdefault(nhl_player_id, []).append({
+                'leagueId': league_id,
+                'firebaseKey': firebase_player_key,
+                'Team': player_data.get('Team', 'Unknown Fantasy Team'),
+                'Player': player_data.get('Player', f"Player {nhl_player_id}"),
+                'NHL Team': player_data.get('NHL Team', 'N/A'),
+                'Position': player_data.get('Position', 'N/A'),
+                'playoffRoundDrafted': player_data.get('playoffRoundDrafted', 0),
+                'pointsBeforeAcquiring': player_data.get('pointsBeforeAcquiring', 0),
+                'preAcqRound': player_data.get('preAcqRound', 0),
+            })
+    return index
+
+
+def build_league_rows(index, stats_by_player):
+    """
+    Expand the ownership index into per-league player rows in the updatedstats format.
+    Each player's stats are looked up once and shared by every league that owns them.
+    """
+    rows_by_league = {}
+    for nhl_player_id, ownerships in index.items():
+        stats = stats_by_player.get(nhl_player_id, {})
+        player_stats = {field: stats.get(field, 0) for field in STAT_FIELDS}
+        if GORDIE_HOWE_FIELD in stats:
+            player_stats[GORDIE_HOWE_FIELD] = stats[GORDIE_HOWE_FIELD]
+        for ownership in ownerships:
+            row = {
+                "Player": ownership['Player'],
+                "Player ID": nhl_player_id,
+                "NHL Team": ownership['NHL Team'],
+                "Position": ownership['Position'],
+                "Team": ownership['Team'],
+                "playoffRoundDrafted": ownership['playoffRoundDrafted'],
+                "Points Before Acquiring": ownership['pointsBeforeAcquiring'],
+                "preAcqRound": ownership['preAcqRound'],
+            }
+            row.update(player_stats)
+            rows_by_league.setdefault(ownership['leagueId'], []).append(row)
+    return rows_by_league
+
+
+def compute_all_league_standings(index, stats_by_player, rules_by_league=None):
+    """
+    Return {league_id: (player rows, formatted standings)} for every league in the index,
+    scoring each league with its rules from rules_by_league (default scoring otherwise)
+    """
+    rows_by_league = build_league_rows(index, stats_by_player)
+    # Every league is scored in one grouped pass over the combined rows
+    standings_by_league = calculate_league_standings(rows_by_league, rules_by_league)
+    return {league_id: (rows, format_standings(standings_by_league[league_id]))
+            for league_id, rows in rows_by_league.items()}
+
+
+def fetch_index_stats(index, provider, known_stats=None):
+    """
+    Stats for every indexed player, keyed by NHL player ID. Players already in known_stats
+    (e.g. the updatedstats rows of the same run) are not fetched again.
+    """
+    stats_by_player = dict(known_stats or {})
+    missing = [pid for pid in index if pid not in stats_by_player]
+    for player_id, landing in zip(missing, provider.get_many(missing)):
+        stats_by_player[player_id] = parse_player_stats(landing)
+    return stats_by_player
+
+
+def write_league_outputs(league_results, run_date=None, data_dir=LEAGUES_DATA_DIR):
+    """Write updatedstats/standings files per league under data/leagues/<leagueId>/"""
+    current_date = (run_date or datetime.now()).strftime("%Y%m%d")
+    written = []
+    for league_id, (rows, standings) in league_results.items():
+        league_dir = os.path.join(data_dir, league_id)
+        os.makedirs(league_dir, exist_ok=True)
+        with open(os.path.join(league_dir, f"updatedstats-{current_date}.json"), 'w') as f:
+            json.dump(rows, f, indent=4)
+        with open(os.path.join(league_dir, f"standings-{current_date}.json"), 'w') as f:
+            json.dump(standings, f, indent=4)
+        with open(os.path.join(league_dir, "latest-standings.json"), 'w') as f:
+            json.dump(standings, f, indent=4)
+        written.append(league_dir)
+    logger.info(f"Wrote standings for {len(written)} leagues to {data_dir}")
+    return written
+
+
+def load_leagues_from_file(path):
+    """Read leagues from a Realtime Database JSON export (e.g. RTDB-SampleJSONextract.json)"""
+    with open(path, 'r') as f:
+        data = json.load(f)
+    return data.get('leagues', data)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Calculate standings for every league in a single pass")
+    parser.add_argument("--leagues-file", default=None,
+                        help="Read leagues from an RTDB JSON export instead of Firebase")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"Number of concurrent NHL API requests (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT,
+                        help=f"Per-request timeout in seconds (default: {DEFAULT_TIMEOUT})")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Ignore the on-disk landing cache and fetch every player")
+    args = parser.parse_args(argv)
+
+    if args.leagues_file:
+        leagues_snapshot = load_leagues_from_file(args.leagues_file)
+    else:
+        from update_playerlist import initialize_firebase
+        database = CountingReference(initialize_firebase())
+        leagues_snapshot = read_leagues(database)
+        database.stats.log_summary()
+
+    index = build_ownership_index(leagues_snapshot)
+    ownership_count = sum(len(owners) for owners in index.values())
+    logger.info(f"Indexed {len(index)} NHL players across {ownership_count} roster spots")
+
+    cache = open_landing_cache(args.no_cache)
+    provider = PlayerStatsProvider(cache, workers=args.workers, timeout=args.timeout)
+    stats_by_player = fetch_index_stats(index, provider)
+    provider.close()
+    provider.log_summary()
+    if cache is not None:
+        cache.save()
+        cache.log_summary()
+
+    rules_by_league = rules_for_leagues(leagues_snapshot)
+    return write_league_outputs(compute_all_league_standings(index, stats_by_player, rules_by_league))
+
+
+if __name__ == "__main__":
+    main()
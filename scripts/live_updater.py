@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+import os
+import json
+import time
+import argparse
+import logging
+import subprocess
+from datetime import datetime, timedelta, timezone
+
+import requests
+
+from nhl_api import DEFAULT_TIMEOUT, FINISHED_GAME_STATES, create_session, fetch_boxscore, fetch_schedule, parse_api_datetime
+from boxscores import LIVE_GAME_STATES, STARTED_GAME_STATES, game_teams, player_lines
+from fetch_stats import STAT_FIELDS
+from calculate_standings import calculate_league_standings, calculate_standings_from_players, format_standings
+from scoring_rules import default_rules, rules_for_leagues
+from bundles import load_latest_outputs, write_bundles
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Seconds between polls while the puck is in play, at most during an intermission,
+# and at most while waiting for the first game to start
+PLAY_INTERVAL = 30
+INTERMISSION_INTERVAL = 180
+PREGAME_INTERVAL = 900
+# NHL game days run past midnight UTC; the last West Coast games are over by this hour
+GAME_DAY_ROLLOVER_HOUR_UTC = 10
+
+
+def game_day(now=None):
+    """The NHL schedule date being played at `now` (UTC)"""
+    now = now or datetime.now(timezone.utc)
+    return (now - timedelta(hours=GAME_DAY_ROLLOVER_HOUR_UTC)).date()
+
+
+class LiveFeed:
+    """The day's schedule and game boxscores from the NHL API"""
+
+    def __init__(self, session=None, timeout=DEFAULT_TIMEOUT):
+        self.session = session or create_session(2)
+        self.timeout = timeout
+
+    def games(self, date):
+        schedule = fetch_schedule(date, self.session, self.timeout)
+        date_str = date.strftime('%Y-%m-%d')
+        return next((day.get('games', []) for day in schedule.get('gameWeek', []) if day.get('date') == date_str), [])
+
+    def boxscore(self, game_id):
+        return fetch_boxscore(game_id, self.session, self.timeout)
+
+    def exhausted(self, game_ids):
+        return False
+
+    def close(self):
+        self.session.close()
+
+
+class ReplayFeed:
+    """
+    Recorded game feeds from a directory: games.json holds the day's schedule games and
+    <gameId>/0001.json, 0002.json, ... the boxscores in the order they were fetched. Each
+    boxscore request returns the next frame of that game, and the last one once they run out.
+    A game without recorded frames returns an empty boxscore, so its state never changes.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._positions = {}
+
+    def games(self, date):
+        with open(os.path.join(self.directory, 'games.json'), 'r') as f:
+            return json.load(f)
+
+    def _frames(self, game_id):
+        game_dir = os.path.join(self.directory, str(game_id))
+        if not os.path.isdir(game_dir):
+            return []
+        return sorted(os.path.join(game_dir, name) for name in os.listdir(game_dir) if name.endswith('.json'))
+
+    def boxscore(self, game_id):
+        frames = self._frames(game_id)
+        if not frames:
+            return {}
+        position = self._positions.get(game_id, 0)
+        self._positions[game_id] = position + 1
+        with open(frames[min(position, len(frames) - 1)], 'r') as f:
+            return json.load(f)
+
+    def exhausted(self, game_ids):
+        """Whether every one of the games has returned its last frame (a recording cut off before they ended)"""
+        return all(self._positions.get(game_id, 0) >= len(self._frames(game_id)) for game_id in game_ids)
+
+    def close(self):
+        pass
+
+
+class RecordingFeed:
+    """Passes another feed through and saves what it returns in the ReplayFeed layout"""
+
+    def __init__(self, feed, directory):
+        self.feed = feed
+        self.directory = directory
+        self._frames = {}
+
+    def _save(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(data, f)
+
+    def games(self, date):
+        games = self.feed.games(date)
+        self._save(os.path.join(self.directory, 'games.json'), games)
+        return games
+
+    def boxscore(self, game_id):
+        boxscore = self.feed.boxscore(game_id)
+        frame = self._frames[game_id] = self._frames.get(game_id, 0) + 1
+        self._save(os.path.join(self.directory, str(game_id), f"{frame:04d}.json"), boxscore)
+        return boxscore
+
+    def exhausted(self, game_ids):
+        return self.feed.exhausted(game_ids)
+
+    def close(self):
+        self.feed.close()
+
+
+class LiveStandings:
+    """
+    The latest daily stats with the player lines of the games being played on top.
+    A game's new boxscore only touches the players whose line in it changed, and the
+    standings are recomputed from the combined rows when something did.
+    """
+
+    def __init__(self, base_rows, league_rows=None, rules_by_league=None):
+        self.base_rows = base_rows
+        self.league_rows = league_rows or {}
+        self.rules_by_league = rules_by_league or {}
+        self.base_stats = {}
+        for rows in [base_rows] + list(self.league_rows.values()):
+            for row in rows:
+                self.base_stats.setdefault(str(row.get("Player ID")), {field: row.get(field, 0) for field in STAT_FIELDS})
+        # Game ID -> {player ID: line}, and the resulting stats of every player with a line
+        self.game_lines = {}
+        self.live_stats = {}
+
+    def teams(self):
+        """NHL teams with at least one owned player"""
+        rows = [row for rows in [self.base_rows] + list(self.league_rows.values()) for row in rows]
+        return {row.get("NHL Team") for row in rows} - {None, 'N/A'}
+
+    def update_game(self, game_id, lines):
+        """Replace a game's player lines; returns the IDs of owned players whose stats changed"""
+        previous = self.game_lines.get(game_id, {})
+        self.game_lines[game_id] = lines
+        changed = {player_id for player_id in set(previous) | set(lines)
+                   if previous.get(player_id) != lines.get(player_id) and player_id in self.base_stats}
+        for player_id in changed:
+            stats = dict(self.base_stats[player_id])
+            for game in self.game_lines.values():
+                line = game.get(player_id)
+                if line:
+                    for field in STAT_FIELDS:
+                        stats[field] += line.get(field, 0)
+            self.live_stats[player_id] = stats
+        return changed
+
+    def _overlay(self, rows):
+        return [dict(row, **self.live_stats[str(row.get("Player ID"))]) if str(row.get("Player ID")) in self.live_stats
+                else row for row in rows]
+
+    def rows(self):
+        return self._overlay(self.base_rows)
+
+    def league_results(self):
+        """{league_id: (rows, formatted standings)} like league_standings.compute_all_league_standings"""
+        rows_by_league = {league_id: self._overlay(rows) for league_id, rows in self.league_rows.items()}
+        standings = calculate_league_standings(rows_by_league, self.rules_by_league)
+        return {league_id: (rows, format_standings(standings[league_id])) for league_id, rows in rows_by_league.items()}
+
+
+def next_poll_interval(games, now):
+    """
+    Seconds until the next poll given the latest state of each tracked game, or None once
+    they are all over: PLAY_INTERVAL while any game is in play, the rest of the intermission
+    (up to INTERMISSION_INTERVAL) while all live games are between periods, and the time to
+    the first puck drop (up to PREGAME_INTERVAL) when none has started.
+    """
+    unfinished = [game for game in games if game.get('gameState') not in FINISHED_GAME_STATES]
+    if not unfinished:
+        return None
+    live = [game for game in unfinished if game.get('gameState') in LIVE_GAME_STATES]
+    if any(not (game.get('clock') or {}).get('inIntermission') for game in live):
+        return PLAY_INTERVAL
+    if live:
+        remaining = min((game.get('clock') or {}).get('secondsRemaining', INTERMISSION_INTERVAL) for game in live)
+        return max(PLAY_INTERVAL, min(INTERMISSION_INTERVAL, remaining))
+    starts = [start for start in (parse_api_datetime(game.get('startTimeUTC')) for game in unfinished) if start]
+    if not starts:
+        return PREGAME_INTERVAL
+    return max(PLAY_INTERVAL, min(PREGAME_INTERVAL, (min(starts) - now).total_seconds()))
+
+
+def poll_games(feed, games, live, now):
+    """
+    Fetch the boxscore of every tracked game that is under way, or about to start, and has not
+    been seen finished. Updates `games` with each game's latest state and returns the IDs of the
+    players whose stats changed.
+    """
+    changed = set()
+    for game_id, game in games.items():
+        if game.get('gameState') in FINISHED_GAME_STATES and game_id in live.game_lines:
+            continue
+        start = parse_api_datetime(game.get('startTimeUTC'))
+        if game.get('gameState') not in STARTED_GAME_STATES and start and start > now + timedelta(seconds=PLAY_INTERVAL):
+            continue
+        try:
+            boxscore = feed.boxscore(game_id)
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"Failed to fetch the boxscore of game {game_id}, keeping its last line: {e}")
+            continue
+        game.update({key: boxscore[key] for key in ('gameState', 'clock') if key in boxscore})
+        if boxscore.get('gameState') in STARTED_GAME_STATES:
+            changed |= live.update_game(game_id, player_lines(boxscore))
+    return changed
+
+
+def run(feed, live, date, publish, clock=None, sleep=time.sleep):
+    """
+    Poll the day's games involving owned teams until they are all over, calling
+    publish(live) whenever a player's stats changed. Returns the number of publishes.
+    """
+    clock = clock or (lambda: datetime.now(timezone.utc))
+    teams = live.teams()
+    games = {game['id']: dict(game) for game in feed.games(date) if game_teams(game) & teams}
+    if not games:
+        logger.info(f"No games on {date} involve owned teams")
+        return 0
+    logger.info(f"Tracking {len(games)} games on {date}: {sorted(games)}")
+
+    publishes = 0
+    while True:
+        changed = poll_games(feed, games, live, clock())
+        if changed:
+            publish(live)
+            publishes += 1
+            logger.info(f"Republished standings: {len(changed)} players changed")
+        interval = next_poll_interval(games.values(), clock())
+        if interval is None:
+            break
+        unfinished = [game_id for game_id, game in games.items() if game.get('gameState') not in FINISHED_GAME_STATES]
+        if feed.exhausted(unfinished):
+            logger.warning(f"The feed ended before games {sorted(unfinished)} were over")
+            break
+        states = ', '.join(f"{game_id} {game.get('gameState')}" for game_id, game in games.items())
+        logger.info(f"Next poll in {interval:.0f}s ({states})")
+        sleep(interval)
+    logger.info(f"All tracked games are over after {publishes} publishes")
+    return publishes
+
+
+def make_publisher(run_date, on_publish=None):
+    """publish(live) that writes the live rows and standings through the bundle manifest"""
+
+    def publish(live):
+        rows = live.rows()
+        standings = format_standings(calculate_standings_from_players(rows, default_rules()))
+        write_bundles(rows, standings, live.league_results(), run_date)
+        if on_publish:
+            # e.g. commit and push the manifest so the front end sees the update
+            result = subprocess.run(on_publish, shell=True)
+            if result.returncode != 0:
+                logger.warning(f"--on-publish command exited with {result.returncode}")
+
+    return publish
+
+
+def load_leagues_rules(league_ids, leagues_file=None):
+    """
+    Scoring rules for the leagues with standings on disk: from an RTDB export if given,
+    else the local rules file (data/scoring_rules.json) or the defaults
+    """
+    if leagues_file:
+        with open(leagues_file, 'r') as f:
+            data = json.load(f)
+        leagues = data.get('leagues', data)
+    else:
+        leagues = {}
+    return rules_for_leagues({league_id: leagues.get(league_id, {}) for league_id in league_ids})
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Update standings from the boxscores of live games involving owned NHL teams")
+    parser.add_argument("--date", default=None, help="Game day to follow, YYYY-MM-DD (default: the current one)")
+    parser.add_argument("--replay", metavar="DIR", default=None,
+                        help="Replay recorded game feeds from DIR instead of polling the NHL API")
+    parser.add_argument("--record", metavar="DIR", default=None,
+                        help="Save the schedule and every boxscore fetched to DIR for --replay")
+    parser.add_argument("--leagues-file", default=None,
+                        help="RTDB JSON export with each league's scoringRules (default: data/scoring_rules.json)")
+    parser.add_argument("--on-publish", default=None,
+                        help="Shell command to run after each publish, such as a git commit and push")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT,
+                        help=f"Per-request timeout in seconds (default: {DEFAULT_TIMEOUT})")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    date = datetime.strptime(args.date, '%Y-%m-%d').date() if args.date else game_day()
+
+    run_date, updated_stats, _, league_results = load_latest_outputs()
+    if run_date is None:
+        logger.error("No updatedstats snapshot found; run the daily pipeline first")
+        return 0
+    if run_date.date() > date:
+        # The daily snapshot for a day is written before that day's games
+        logger.error(f"The latest snapshot ({run_date:%Y%m%d}) already includes the games of {date}")
+        return 0
+
+    league_rows = {league_id: rows for league_id, (rows, _) in league_results.items()}
+    live = LiveStandings(updated_stats, league_rows, load_leagues_rules(league_rows, args.leagues_file))
+    feed = ReplayFeed(args.replay) if args.replay else LiveFeed(timeout=args.timeout)
+    if args.record:
+        feed = RecordingFeed(feed, args.record)
+    # A replay runs as fast as it can
+    sleep = (lambda seconds: None) if args.replay else time.sleep
+    try:
+        return run(feed, live, date, make_publisher(run_date, args.on_publish), sleep=sleep)
+    finally:
+        feed.close()
+
+
+if __name__ == "__main__":
+    main()
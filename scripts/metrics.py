@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+import os
+import re
+import json
+import time
+import bisect
+import cProfile
+import logging
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+from data_io import atomic_open
+
+logger = logging.getLogger(__name__)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Run outputs that are not data: kept out of the repo, uploaded as a workflow artifact
+METRICS_DIR = os.path.join(REPO_ROOT, '.cache', 'metrics')
+REPORT_FILE = os.path.join(METRICS_DIR, 'run-report.json')
+# For the node_exporter textfile collector
+PROMETHEUS_FILE = os.path.join(METRICS_DIR, 'fantasy_hockey.prom')
+PROFILE_DIR = os.path.join(METRICS_DIR, 'profiles')
+METRIC_PREFIX = 'fantasy_hockey'
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_DATE_SEGMENT = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+_NUMBER_SEGMENT = re.compile(r'^\d+$')
+_TEAM_SEGMENT = re.compile(r'^[A-Z]{3}$')
+
+
+def endpoint_label(url):
+    """The URL path with IDs, dates and team codes replaced, e.g. /v1/player/{id}/landing"""
+    segments = []
+    for segment in urlsplit(url).path.split('/'):
+        if _DATE_SEGMENT.match(segment):
+            segment = '{date}'
+        elif _NUMBER_SEGMENT.match(segment):
+            segment = '{id}'
+        elif _TEAM_SEGMENT.match(segment):
+            segment = '{team}'
+        segments.append(segment)
+    return '/'.join(segments) or '/'
+
+
+class Histogram:
+    """Latency samples of one endpoint or operation, reported as buckets and percentiles"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.samples = []
+
+    def observe(self, seconds):
+        self.samples.append(seconds)
+
+    def cumulative_counts(self):
+        """Samples at or below each bucket bound, then the total (the +Inf bucket)"""
+        ordered = sorted(self.samples)
+        return [bisect.bisect_right(ordered, bound) for bound in self.buckets] + [len(ordered)]
+
+    def percentile(self, fraction):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def to_dict(self):
+        counts = self.cumulative_counts()
+        return {
+            'count': len(self.samples),
+            'sumSeconds': round(sum(self.samples), 6),
+            'p50Seconds': round(self.percentile(0.5), 6),
+            'p95Seconds': round(self.percentile(0.95), 6),
+            'maxSeconds': round(max(self.samples, default=0.0), 6),
+            'buckets': {**{str(bound): count for bound, count in zip(self.buckets, counts)}, '+Inf': counts[-1]},
+        }
+
+
+class RunMetrics:
+    """
+    Everything measured during one run: wall time and memory peak per stage, latency, count
+    and size of every NHL API request and Realtime Database call, retries and cache hit
+    ratios. One process-wide instance (METRICS) is fed from the HTTP session, the RTDB
+    wrapper and the stage runner, and written out once at the end of the run.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self.stages = {}
+            self.http = {}
+            self.rtdb = {}
+            self.caches = {}
+            self._active_stages = 0
+            # Stages reset the tracemalloc peak, so the run's peak is kept here
+            self._memory_peak = 0
+
+    def _http_entry(self, endpoint):
+        if endpoint not in self.http:
+            self.http[endpoint] = {'latency': Histogram(), 'requests': 0, 'bytes': 0, 'retries': 0, 'statuses': {}}
+        return self.http[endpoint]
+
+    def observe_http(self, endpoint, seconds, size=0, status=None):
+        with self._lock:
+            entry = self._http_entry(endpoint)
+            entry['latency'].observe(seconds)
+            entry['requests'] += 1
+            entry['bytes'] += size
+            status = str(status if status is not None else 'error')
+            entry['statuses'][status] = entry['statuses'].get(status, 0) + 1
+
+    def count_retry(self, endpoint):
+        with self._lock:
+            entry = self._http_entry(endpoint)
+            entry['retries'] += 1
+
+    def observe_rtdb(self, operation, seconds, size=0):
+        with self._lock:
+            entry = self.rtdb.setdefault(operation, {'latency': Histogram(), 'calls': 0, 'bytes': 0})
+            entry['latency'].observe(seconds)
+            entry['calls'] += 1
+            entry['bytes'] += size
+
+    def record_cache(self, name, hits, misses):
+        with self._lock:
+            self.caches[name] = {'hits': hits, 'misses': misses,
+                                 'hitRatio': round(hits / (hits + misses), 3) if hits + misses else 0.0}
+
+    @contextmanager
+    def stage(self, name, profile_dir=None):
+        """
+        Time a stage, record the tracemalloc peak while it ran (shared with any stage running
+        at the same time) and, with profile_dir, dump its cProfile stats to <profile_dir>/<name>.prof
+        """
+        tracing = tracemalloc.is_tracing()
+        with self._lock:
+            if tracing and self._active_stages == 0:
+                self._memory_peak = max(self._memory_peak, tracemalloc.get_traced_memory()[1])
+                tracemalloc.reset_peak()
+            self._active_stages += 1
+        profile = None
+        if profile_dir is not None:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError as e:
+                # Some Python versions allow only one active profiler per process
+                logger.warning(f"Not profiling stage '{name}': {e}")
+                profile = None
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            profile_path = None
+            if profile is not None:
+                profile.disable()
+                os.makedirs(profile_dir, exist_ok=True)
+                profile_path = os.path.join(profile_dir, f"{name}.prof")
+                profile.dump_stats(profile_path)
+            with self._lock:
+                self._active_stages -= 1
+                entry = self.stages.setdefault(name, {'calls': 0, 'wallSeconds': 0.0, 'memoryPeakBytes': None})
+                entry['calls'] += 1
+                entry['wallSeconds'] = round(entry['wallSeconds'] + duration, 6)
+                if tracing:
+                    entry['memoryPeakBytes'] = max(entry['memoryPeakBytes'] or 0, tracemalloc.get_traced_memory()[1])
+                if profile_path is not None:
+                    entry['profile'] = profile_path
+
+    def report(self, script=None):
+        """The run report as a JSON-serializable dict"""
+        with self._lock:
+            report = {
+                'script': script,
+                'startedAt': datetime.fromtimestamp(self.started, timezone.utc).isoformat(timespec='seconds'),
+                'wallSeconds': round(time.time() - self.started, 3),
+                'memoryPeakBytes': max(self._memory_peak, tracemalloc.get_traced_memory()[1])
+                if tracemalloc.is_tracing() else None,
+                'stages': {name: dict(entry) for name, entry in self.stages.items()},
+                'http': {endpoint: {**{key: value for key, value in entry.items() if key != 'latency'},
+                                    'latency': entry['latency'].to_dict()}
+                         for endpoint, entry in sorted(self.http.items())},
+                'rtdb': {operation: {'calls': entry['calls'], 'bytes': entry['bytes'],
+                                     'latency': entry['latency'].to_dict()}
+                         for operation, entry in sorted(self.rtdb.items())},
+                'caches': dict(self.caches),
+            }
+        report['totals'] = {
+            'httpRequests': sum(entry['requests'] for entry in report['http'].values()),
+            'httpBytes': sum(entry['bytes'] for entry in report['http'].values()),
+            'httpRetries': sum(entry['retries'] for entry in report['http'].values()),
+            'rtdbCalls': sum(entry['calls'] for entry in report['rtdb'].values()),
+            'rtdbBytes': sum(entry['bytes'] for entry in report['rtdb'].values()),
+        }
+        return report
+
+    def write_report(self, path=REPORT_FILE, script=None):
+        report = self.report(script)
+        with atomic_open(path) as f:
+            json.dump(report, f, indent=2)
+        return report
+
+    def write_prometheus(self, path=PROMETHEUS_FILE, script=None):
+        """Write the run in the Prometheus text exposition format, atomically as the textfile collector expects"""
+        with atomic_open(path) as f:
+            f.write(prometheus_text(self.report(script)))
+
+
+def _label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{key}="{_label_value(value)}"' for key, value in labels.items()) + '}'
+
+
+def _histogram_samples(labels, histogram):
+    samples = [('_bucket', {**labels, 'le': bound}, count) for bound, count in histogram['buckets'].items()]
+    samples.append(('_sum', labels, histogram['sumSeconds']))
+    samples.append(('_count', labels, histogram['count']))
+    return samples
+
+
+def prometheus_text(report):
+    """A run report (RunMetrics.report) as Prometheus exposition text"""
+    script = report.get('script') or 'pipeline'
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        """samples: (name suffix, labels, value) tuples"""
+        full_name = f"{METRIC_PREFIX}_{name}"
+        lines.append(f"# HELP {full_name} {help_text}")
+        lines.append(f"# TYPE {full_name} {kind}")
+        for suffix, labels, value in samples:
+            lines.append(f"{full_name}{suffix}{_labels(script=script, **labels)} {value}")
+
+    started = datetime.fromisoformat(report['startedAt']).timestamp()
+    metric('run_timestamp_seconds', 'gauge', "When the run started", [('', {}, f"{started:.0f}")])
+    metric('run_duration_seconds', 'gauge', "Wall time of the run", [('', {}, report['wallSeconds'])])
+    if report['memoryPeakBytes'] is not None:
+        metric('memory_peak_bytes', 'gauge', "tracemalloc peak of the run", [('', {}, report['memoryPeakBytes'])])
+    metric('stage_duration_seconds', 'gauge', "Wall time of each stage",
+           [('', {'stage': stage}, entry['wallSeconds']) for stage, entry in report['stages'].items()])
+    metric('stage_memory_peak_bytes', 'gauge', "tracemalloc peak while each stage ran",
+           [('', {'stage': stage}, entry['memoryPeakBytes']) for stage, entry in report['stages'].items()
+            if entry['memoryPeakBytes'] is not None])
+    metric('http_request_duration_seconds', 'histogram', "NHL API request latency per endpoint",
+           [sample for endpoint, entry in report['http'].items()
+            for sample in _histogram_samples({'endpoint': endpoint}, entry['latency'])])
+    metric('http_requests_total', 'counter', "NHL API requests per endpoint and status",
+           [('', {'endpoint': endpoint, 'status': status}, count)
+            for endpoint, entry in report['http'].items() for status, count in sorted(entry['statuses'].items())])
+    metric('http_response_bytes_total', 'counter', "Decoded NHL API response bytes per endpoint",
+           [('', {'endpoint': endpoint}, entry['bytes']) for endpoint, entry in report['http'].items()])
+    metric('http_retries_total', 'counter', "Retried NHL API requests per endpoint",
+           [('', {'endpoint': endpoint}, entry['retries']) for endpoint, entry in report['http'].items()])
+    metric('rtdb_operation_duration_seconds', 'histogram', "Realtime Database call latency per operation",
+           [sample for operation, entry in report['rtdb'].items()
+            for sample in _histogram_samples({'operation': operation}, entry['latency'])])
+    metric('rtdb_bytes_total', 'counter', "Approximate JSON bytes per Realtime Database operation",
+           [('', {'operation': operation}, entry['bytes']) for operation, entry in report['rtdb'].items()])
+    metric('cache_hit_ratio', 'gauge', "Hit ratio of each cache",
+           [('', {'cache': cache}, entry['hitRatio']) for cache, entry in report['caches'].items()])
+    return '\n'.join(lines) + '\n'
+
+
+# The process-wide registry
+METRICS = RunMetrics()
+
+
+def add_metrics_args(parser):
+    """Add the instrumentation options shared by the pipeline scripts"""
+    parser.add_argument("--metrics-report", default=REPORT_FILE,
+                        help=f"Where to write the JSON run report (default: {REPORT_FILE})")
+    parser.add_argument("--prometheus-textfile", default=PROMETHEUS_FILE,
+                        help=f"Where to write the Prometheus textfile (default: {PROMETHEUS_FILE})")
+    parser.add_argument("--profile", nargs='?', const=PROFILE_DIR, default=None, metavar="DIR",
+                        help=f"Dump cProfile stats per stage to DIR/<stage>.prof (default DIR: {PROFILE_DIR})")
+    parser.add_argument("--no-trace-memory", action="store_true",
+                        help="Do not track memory peaks with tracemalloc")
+
+
+def start_run(args):
+    """Start measuring a run configured by add_metrics_args options"""
+    METRICS.reset()
+    if not args.no_trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def record_run_caches(cache=None, provider=None, fingerprints=None):
+    """Hit ratios of the landing cache, the per-run stats provider and the stage fingerprints"""
+    if cache is not None:
+        stats = cache.stats()
+        METRICS.record_cache('landing', stats['hits'], stats['misses'])
+    if provider is not None:
+        # Players served from the run (reused or seeded by club stats) instead of requested
+        METRICS.record_cache('provider', provider.reused + provider.seeded, provider.requests_made)
+    if fingerprints is not None and fingerprints.status:
+        hits = sum(1 for status in fingerprints.status.values() if status == 'hit')
+        METRICS.record_cache('fingerprints', hits, len(fingerprints.status) - hits)
+
+
+def finish_run(args, script):
+    """Write the JSON report and Prometheus textfile for the run, and log where the time went"""
+    report = METRICS.write_report(args.metrics_report, script)
+    METRICS.write_prometheus(args.prometheus_textfile, script)
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+    totals = report['totals']
+    logger.info(f"Run metrics: {report['wallSeconds']:.2f}s, {totals['httpRequests']} HTTP requests "
+                f"({totals['httpBytes']} bytes, {totals['httpRetries']} retries), {totals['rtdbCalls']} RTDB calls; "
+                f"report in {args.metrics_report}")
+    for endpoint, entry in report['http'].items():
+        latency = entry['latency']
+        logger.info(f"  {endpoint}: {entry['requests']} requests, p50 {latency['p50Seconds'] * 1000:.0f} ms, "
+                    f"p95 {latency['p95Seconds'] * 1000:.0f} ms, {entry['bytes']} bytes")
+    return report
@@ -0,0 +1,368 @@
+import time
+import random
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import METRICS, endpoint_label
+
+logger = logging.getLogger(__name__)
+
+NHL_API_BASE_URL = "https://api-web.nhle.com/v1"
+
+# Number of concurrent requests used by the bulk fetchers
+DEFAULT_WORKERS = 8
+# Seconds to wait for the NHL API before giving up on a single request
+DEFAULT_TIMEOUT = 10
+
+# Game states the NHL API uses once a game is over
+FINISHED_GAME_STATES = ('OFF', 'FINAL')
+
+# Default request budget for a RateLimiter: requests per second and the burst allowed on top
+DEFAULT_RATE = 20.0
+DEFAULT_BURST = 10
+# Retries per request for throttled (429) and server error responses, and network errors
+DEFAULT_RETRIES = 3
+# Backoff before retry n is about DEFAULT_BACKOFF * 2**n seconds, plus jitter
+DEFAULT_BACKOFF = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class RateLimiter:
+    """
+    Token bucket shared by every thread of a client: on average `rate` requests per second,
+    with up to `burst` sent back to back.
+
+    The rate adapts to the API. A 429 halves it and pauses every caller for the Retry-After
+    time; each successful request then raises it a little until it is back at the configured
+    rate, so the client settles just under whatever the API actually allows.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST, min_rate=1.0, clock=time.monotonic, sleep=time.sleep):
+        self.max_rate = float(rate)
+        self.rate = self.max_rate
+        self.min_rate = min(float(min_rate), self.max_rate)
+        self.burst = max(1, int(burst))
+        self.throttled_count = 0
+        self.waited = 0.0
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(self.burst)
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Block until a request may be sent"""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            # Take the token now, going into debt if need be, so waiting callers are served in order
+            self._tokens -= 1
+            wait = max(0.0, self._paused_until - now, -self._tokens / self.rate)
+            self.waited += wait
+        if wait > 0:
+            self._sleep(wait)
+
+    def throttled(self, retry_after=None):
+        """The API answered 429: slow down, and hold every caller for retry_after seconds if given"""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            self.throttled_count += 1
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = min(self._tokens, 0.0)
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+
+    def succeeded(self):
+        """A request went through: creep back towards the configured rate"""
+        if self.rate < self.max_rate:
+            with self._lock:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or an HTTP date), or None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt, backoff=DEFAULT_BACKOFF):
+    """Exponential backoff with jitter, so concurrent workers do not retry in lockstep"""
+    delay = backoff * (2 ** attempt)
+    return delay + random.uniform(0, delay)
+
+
+class RateLimitedSession(requests.Session):
+    """
+    A Session that takes a token from a shared RateLimiter before every request and retries
+    429/5xx responses and network errors, honoring Retry-After and otherwise backing off with jitter.
+    """
+
+    def __init__(self, limiter=None, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, sleep=time.sleep):
+        super().__init__()
+        self.limiter = limiter
+        self.retries = retries
+        self.backoff = backoff
+        self.requests_sent = 0
+        self.retried = 0
+        self._sleep = sleep
+        self._count_lock = threading.Lock()
+
+    def request(self, method, url, *args, **kwargs):
+        endpoint = endpoint_label(url)
+        attempt = 0
+        while True:
+            if self.limiter is not None:
+                self.limiter.acquire()
+            with self._count_lock:
+                self.requests_sent += 1
+            start = time.perf_counter()
+            try:
+                response = super().request(method, url, *args, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                METRICS.observe_http(endpoint, time.perf_counter() - start)
+                if attempt >= self.retries:
+                    raise
+                METRICS.count_retry(endpoint)
+                self._retry_wait(attempt)
+                attempt += 1
+                continue
+            # Without stream=True the body has been read by now
+            size = len(response.content) if not kwargs.get('stream') else 0
+            METRICS.observe_http(endpoint, time.perf_counter() - start, size, response.status_code)
+
+            if response.status_code not in RETRY_STATUSES or attempt >= self.retries:
+                if self.limiter is not None and response.status_code != 429:
+                    self.limiter.succeeded()
+                return response
+
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            response.close()
+            METRICS.count_retry(endpoint)
+            if response.status_code == 429 and self.limiter is not None:
+                # The limiter holds every worker, not just this one
+                self._count_retry()
+                self.limiter.throttled(retry_after if retry_after is not None else backoff_delay(attempt, self.backoff))
+            else:
+                self._retry_wait(attempt, retry_after)
+            attempt += 1
+
+    def _count_retry(self):
+        with self._count_lock:
+            self.retried += 1
+
+    def _retry_wait(self, attempt, retry_after=None):
+        self._count_retry()
+        self._sleep(retry_after if retry_after is not None else backoff_delay(attempt, self.backoff))
+
+
+def create_session(pool_size=DEFAULT_WORKERS, limiter=None, retries=DEFAULT_RETRIES):
+    """
+    Create a Session with a keep-alive connection pool big enough for pool_size workers.
+    Throttled and failed requests are retried; pass a RateLimiter to cap the request rate.
+    """
+    session = RateLimitedSession(limiter, retries)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def parse_api_datetime(value):
+    """Parse an NHL API UTC timestamp such as '2025-04-20T23:00:00Z' into an aware datetime"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def _get_landing_response(player_id, session, timeout, headers=None):
+    """GET the landing endpoint, returning the response or None on a network error"""
+    stats_url = f"{NHL_API_BASE_URL}/player/{player_id}/landing"
+    http = session or requests
+    try:
+        return http.get(stats_url, timeout=timeout, headers=headers or None)
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"Failed to fetch stats for player {player_id}. Error: {e}")
+        return None
+
+
+def fetch_landing(player_id, session=None, timeout=DEFAULT_TIMEOUT, cache=None):
+    """
+    Fetch the /player/{id}/landing payload for a single player.
+    Returns the decoded JSON, or None if the request failed, did not return 200 or its
+    body was not valid JSON. When a LandingCache is given, fresh entries are served without a request, stale
+    ones are revalidated with ETag/If-Modified-Since, and the trimmed payload is returned.
+    """
+    headers = None
+    if cache is not None:
+        cached = cache.lookup(player_id)
+        if cached is not None:
+            return cached
+        headers = cache.conditional_headers(player_id)
+
+    response = _get_landing_response(player_id, session, timeout, headers)
+
+    if response is not None and response.status_code == 304 and cache is not None:
+        return cache.revalidated(player_id)
+
+    data = None
+    if response is not None and response.status_code == 200:
+        try:
+            data = response.json()
+        except ValueError as e:
+            # A truncated body or an HTML error page served with a 200
+            logger.warning(f"Failed to decode stats for player {player_id}. Error: {e}")
+    elif response is not None:
+        logger.warning(f"Failed to fetch stats for player {player_id}. Status code: {response.status_code}")
+
+    if data is None:
+        if cache is not None:
+            # Stale data beats zeros when the API is having a bad day
+            return cache.fallback(player_id)
+        return None
+
+    if cache is not None:
+        return cache.store(player_id, data, response.headers)
+    return data
+
+
+def fetch_landings(player_ids, workers=DEFAULT_WORKERS, timeout=DEFAULT_TIMEOUT, session=None, cache=None,
+                   on_result=None):
+    """
+    Fetch /landing payloads for many players over a shared connection pool.
+    Up to `workers` requests are in flight at once. The returned list is aligned
+    with `player_ids`, so callers see the same ordering as a sequential loop.
+    on_result(player_id, data), if given, is called from the worker as each fetch finishes.
+    """
+    player_ids = list(player_ids)
+    workers = max(1, int(workers))
+
+    def fetch(player_id):
+        data = fetch_landing(player_id, session, timeout, cache)
+        if on_result is not None:
+            on_result(player_id, data)
+        return data
+
+    owns_session = session is None
+    if owns_session:
+        session = create_session(workers)
+
+    try:
+        if workers == 1 or len(player_ids) <= 1:
+            return [fetch(player_id) for player_id in player_ids]
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # executor.map yields results in submission order regardless of completion order
+            return list(executor.map(fetch, player_ids))
+    finally:
+        if owns_session:
+            session.close()
+
+
+def fetch_schedule(date, session=None, timeout=DEFAULT_TIMEOUT):
+    """Fetch the schedule week that starts at `date` (YYYY-MM-DD string or date)"""
+    if not isinstance(date, str):
+        date = date.strftime('%Y-%m-%d')
+    http = session or requests
+    response = http.get(f"{NHL_API_BASE_URL}/schedule/{date}", timeout=timeout)
+    response.raise_for_status()
+    return response.json()
+
+
+def fetch_boxscore(game_id, session=None, timeout=DEFAULT_TIMEOUT):
+    """Fetch one game's boxscore: its state, clock and a stat line per player"""
+    http = session or requests
+    response = http.get(f"{NHL_API_BASE_URL}/gamecenter/{game_id}/boxscore", timeout=timeout)
+    response.raise_for_status()
+    return response.json()
+
+
+def fetch_play_by_play(game_id, session=None, timeout=DEFAULT_TIMEOUT):
+    """Fetch every play of one game, including penalties with their type and the player who took them"""
+    http = session or requests
+    response = http.get(f"{NHL_API_BASE_URL}/gamecenter/{game_id}/play-by-play", timeout=timeout)
+    response.raise_for_status()
+    return response.json()
+
+
+def fetch_playoff_carousel(season, session=None, timeout=DEFAULT_TIMEOUT):
+    """
+    Fetch a season's playoff series by round, each with both teams' wins and the wins needed.
+    Returns None before the playoffs start (the API answers 404).
+    """
+    http = session or requests
+    response = http.get(f"{NHL_API_BASE_URL}/playoff-series/carousel/{season}/", timeout=timeout)
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return response.json()
+
+
+def fetch_finished_games(start_date, end_date, session=None, timeout=DEFAULT_TIMEOUT):
+    """
+    Return every game that is finished and was scheduled between start_date and
+    end_date (inclusive date objects). Walks the schedule one week per request.
+    """
+    finished_games = []
+    current = start_date
+    while current <= end_date:
+        schedule = fetch_schedule(current, session, timeout)
+        for day in schedule.get('gameWeek', []):
+            day_date = datetime.strptime(day.get('date'), '%Y-%m-%d').date()
+            if day_date < start_date or day_date > end_date:
+                continue
+            for game in day.get('games', []):
+                if game.get('gameState') in FINISHED_GAME_STATES:
+                    finished_games.append(game)
+
+        next_start = schedule.get('nextStartDate')
+        if next_start:
+            next_date = datetime.strptime(next_start, '%Y-%m-%d').date()
+        else:
+            next_date = current + timedelta(days=7)
+        if next_date <= current:
+            break
+        current = next_date
+    return finished_games
+
+
+def latest_game_start_by_team(games):
+    """Map each team abbreviation to the start time of its most recent game in `games`"""
+    latest = {}
+    for game in games:
+        start_time = parse_api_datetime(game.get('startTimeUTC'))
+        if start_time is None:
+            continue
+        for side in ('homeTeam', 'awayTeam'):
+            team = game.get(side, {}).get('abbrev')
+            if team and (team not in latest or start_time > latest[team]):
+                latest[team] = start_time
+    return latest
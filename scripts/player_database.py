@@ -0,0 +1,136 @@
+import os
+import json
+import logging
+from datetime import datetime, timezone
+
+from check_active_games import get_teams_that_played
+from data_io import atomic_open, iter_records
+
+logger = logging.getLogger(__name__)
+
+# What the last rebuild of each player file changed, and when it ran
+DELTA_REPORT_FILE = os.path.join('data', 'player-database-delta.json')
+
+# Fields that come from the team roster; everything else in a player entry is a stat
+ROSTER_FIELDS = ("id", "fullName", "firstName", "lastName", "positionCode", "position",
+                 "teamAbbreviation", "jerseyNumber")
+
+
+def load_player_index(path, with_stats=True):
+    """
+    {player ID: entry} for an existing player file (.json or .jsonl). Without stats only each
+    player's team is kept, which is all diffing needs.
+    """
+    try:
+        return {player['id']: (player if with_stats else {'teamAbbreviation': player.get('teamAbbreviation')})
+                for player in iter_records(path) if isinstance(player, dict) and player.get('id')}
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+class RosterDelta:
+    """
+    Classifies current player entries against an existing player file one at a time, so
+    a rebuild can stream through the pool. See diff_players for the categories.
+    """
+
+    def __init__(self, existing_by_id, stale_teams=None):
+        self.existing_by_id = existing_by_id
+        self.stale_teams = stale_teams
+        self.delta = {"added": [], "moved": [], "stale": [], "unchanged": [], "removed": []}
+        self._seen = set()
+
+    def add(self, player):
+        """Record one current entry; returns True if its stats must be fetched again"""
+        player_id = player['id']
+        self._seen.add(player_id)
+        previous = self.existing_by_id.get(player_id)
+        team = player.get('teamAbbreviation')
+        if previous is None:
+            self.delta["added"].append(player_id)
+        elif previous.get('teamAbbreviation') != team:
+            self.delta["moved"].append((player_id, previous.get('teamAbbreviation'), team))
+        elif self.stale_teams is None or team in self.stale_teams:
+            self.delta["stale"].append(player_id)
+        else:
+            self.delta["unchanged"].append(player_id)
+            return False
+        return True
+
+    def finish(self):
+        """The complete delta, with the existing players that were not seen as removed"""
+        self.delta["removed"] = [player_id for player_id in self.existing_by_id if player_id not in self._seen]
+        return self.delta
+
+
+def diff_players(existing_players, current_players, stale_teams=None):
+    """
+    Compare the current roster entries with an existing player file by player ID.
+
+    Returns {"added", "moved", "stale", "unchanged", "removed"}: lists of player IDs, except
+    "moved", which holds (id, old team, new team). Players on a team in `stale_teams` have
+    played since the file was written and need fresh stats; None means every team is stale.
+    """
+    tracker = RosterDelta({player.get('id'): player for player in existing_players if player.get('id')}, stale_teams)
+    for player in current_players:
+        tracker.add(player)
+    return tracker.finish()
+
+
+def ids_to_refetch(delta):
+    """Player IDs whose stats must be fetched again: new, moved and stale players"""
+    return delta["added"] + [player_id for player_id, _, _ in delta["moved"]] + delta["stale"]
+
+
+def carry_forward_stats(player, previous):
+    """Copy the stat fields of a player's previous entry onto its current roster entry"""
+    player.update({key: value for key, value in previous.items() if key not in ROSTER_FIELDS})
+    return player
+
+
+def load_delta_report(path=DELTA_REPORT_FILE):
+    """{output file name: last delta report}; empty if there is none"""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def stale_teams_since_last_build(output_file, report_path=DELTA_REPORT_FILE, today=None):
+    """
+    Teams that finished a game since output_file was last built, from the date in its delta report.
+    None (treat every team as stale) when there is no report or the schedule lookup fails.
+    """
+    previous = load_delta_report(report_path).get(os.path.basename(output_file))
+    if not previous or not previous.get('generatedAt'):
+        logger.info(f"No previous build recorded for {output_file}, refetching every player")
+        return None
+    built_on = datetime.fromisoformat(previous['generatedAt']).date()
+    today = today or datetime.now(timezone.utc).date()
+    try:
+        # Games on the build day may have finished after it ran, so include that day
+        return get_teams_that_played(built_on, today)
+    except Exception as e:
+        logger.warning(f"Schedule lookup failed ({e}), refetching every player")
+        return None
+
+
+def write_delta_report(output_file, delta, requests_made, report_path=DELTA_REPORT_FILE, generated_at=None):
+    """Record what a rebuild of output_file changed, next to the reports of the other player files"""
+    report = load_delta_report(report_path)
+    report[os.path.basename(output_file)] = {
+        "generatedAt": (generated_at or datetime.now(timezone.utc)).isoformat(timespec='seconds'),
+        "requests": requests_made,
+        "added": delta["added"],
+        "moved": [{"id": player_id, "from": old_team, "to": new_team} for player_id, old_team, new_team in delta["moved"]],
+        "removed": delta["removed"],
+        "refetched": len(ids_to_refetch(delta)),
+        "reused": len(delta["unchanged"]),
+    }
+    with atomic_open(report_path) as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"{os.path.basename(output_file)}: {len(delta['added'])} added, {len(delta['moved'])} moved, "
+                f"{len(delta['removed'])} removed, {len(ids_to_refetch(delta))} refetched, "
+                f"{len(delta['unchanged'])} reused")
+    return report
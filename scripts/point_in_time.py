@@ -0,0 +1,77 @@
+import logging
+from bisect import bisect_left
+from datetime import datetime, timezone
+
+import numpy as np
+
+from boxscores import GORDIE_HOWE_FIELD, LINE_FIELDS
+from nhl_api import parse_api_datetime
+from scoring_rules import DEFAULT_SCORING
+
+logger = logging.getLogger(__name__)
+
+# Cumulative columns kept per player
+TOTAL_FIELDS = LINE_FIELDS + (GORDIE_HOWE_FIELD,)
+# Ledger games recorded without a start time count as starting at this UTC time of their game day
+DEFAULT_START_TIME_UTC = "23:00:00"
+
+
+def parse_drafted_at(value):
+    """A draftedAt value from the Realtime Database (milliseconds since the epoch) as an aware datetime"""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value / 1000, tz=timezone.utc)
+    return parse_api_datetime(str(value))
+
+
+def game_start(entry):
+    """When a ledger game started"""
+    return parse_api_datetime(entry.get('startTimeUTC')) or \
+        parse_api_datetime(f"{entry['date']}T{DEFAULT_START_TIME_UTC}Z")
+
+
+class PointInTimeStats:
+    """
+    Every player's playoff game log as cumulative totals ordered by game start time, so a
+    player's stats as of any moment are one binary search away. A game counts as played
+    before a moment if it had started by then.
+    """
+
+    def __init__(self, game_logs):
+        """game_logs: {player ID: [(game start datetime, stat line)]}"""
+        self._starts = {}
+        self._cumulative = {}
+        for player_id, games in game_logs.items():
+            games = sorted(games, key=lambda game: game[0])
+            self._starts[player_id] = [start.timestamp() for start, _ in games]
+            lines = np.array([[line.get(field, 0) for field in TOTAL_FIELDS] for _, line in games], dtype=np.int64)
+            self._cumulative[player_id] = np.cumsum(lines.reshape(len(games), len(TOTAL_FIELDS)), axis=0)
+
+    @classmethod
+    def from_ledger(cls, ledger, season=None):
+        """Game logs for every player in a BoxscoreLedger, without any request"""
+        game_logs = {}
+        for game_id, entry in ledger.games.items():
+            if season is not None and not game_id.startswith(season[:4]):
+                continue
+            start = game_start(entry)
+            gordie_howe = set(entry.get('gordieHowe', []))
+            for player_id, line in entry['lines'].items():
+                if player_id in gordie_howe:
+                    line = dict(line, **{GORDIE_HOWE_FIELD: 1})
+                game_logs.setdefault(player_id, []).append((start, line))
+        logger.info(f"Point-in-time stats for {len(game_logs)} players from {len(ledger.games)} ledger games")
+        return cls(game_logs)
+
+    def stats_as_of(self, player_id, when):
+        """{stat: total} over the player's games that started before `when`"""
+        player_id = str(player_id)
+        played = bisect_left(self._starts.get(player_id, []), when.timestamp())
+        if not played:
+            return dict.fromkeys(TOTAL_FIELDS, 0)
+        return dict(zip(TOTAL_FIELDS, self._cumulative[player_id][played - 1].tolist()))
+
+    def points_as_of(self, player_id, when, rules=DEFAULT_SCORING):
+        """Fantasy points scored with `rules` before `when`"""
+        return rules.score(self.stats_as_of(player_id, when))
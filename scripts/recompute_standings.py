@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+import os
+import json
+import time
+import argparse
+import logging
+from datetime import datetime
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+
+from snapshots import list_snapshots
+from data_io import atomic_open
+from history_store import HISTORY_DIR, HistoryStore
+from standings_history import load_snapshot_history, load_standings_history, write_chart_series
+from calculate_standings import calculate_standings_from_players, format_standings
+from scoring_rules import DEFAULT_SCORING, SCORING_RULES_FILE, default_rules
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def recompute_day(day_rows, rules=DEFAULT_SCORING):
+    """Standings for one (date, updatedstats rows) pair; runs in a worker process"""
+    day, rows = day_rows
+    return day, format_standings(calculate_standings_from_players(rows, rules))
+
+
+def recompute_all(stats_snapshots, workers=None, rules=DEFAULT_SCORING):
+    """{date: formatted standings} for every updatedstats snapshot, computed across a process pool"""
+    recompute = partial(recompute_day, rules=rules)
+    if workers == 1 or len(stats_snapshots) < 2:
+        return dict(map(recompute, stats_snapshots))
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(stats_snapshots) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return dict(executor.map(recompute, stats_snapshots, chunksize=chunksize))
+
+
+def rank_changes(old_standings, new_standings):
+    """[(team, old rank, new rank, old points, new points)] for teams whose rank or points changed"""
+    old_by_team = {entry["Team"]: entry for entry in old_standings or []}
+    new_by_team = {entry["Team"]: entry for entry in new_standings}
+    changes = []
+    for team in list(new_by_team) + [team for team in old_by_team if team not in new_by_team]:
+        old = old_by_team.get(team, {})
+        new = new_by_team.get(team, {})
+        if (old.get("Rank"), old.get("Total Points")) != (new.get("Rank"), new.get("Total Points")):
+            changes.append((team, old.get("Rank"), new.get("Rank"), old.get("Total Points"), new.get("Total Points")))
+    return changes
+
+
+def print_rank_diff(changed, existing, recomputed):
+    """Print the rank/points changes for every changed date"""
+    for day in changed:
+        print(f"\n{day:%Y-%m-%d}")
+        for team, old_rank, new_rank, old_points, new_points in rank_changes(existing.get(day), recomputed[day]):
+            print(f"  {team:<30} rank {old_rank} -> {new_rank}  points {old_points} -> {new_points}")
+
+
+def write_recomputed(changed, recomputed, data_dir='data', history_dir=HISTORY_DIR):
+    """
+    Write the standings file of every changed date and replace those dates in the standings history.
+    A date's existing file is overwritten in place (including legacy standings-MonDD.json names).
+    """
+    existing_paths = dict(list_snapshots('standings', data_dir))
+    for day in changed:
+        path = existing_paths.get(day, os.path.join(data_dir, f"standings-{day:%Y%m%d}.json"))
+        with atomic_open(path) as f:
+            json.dump(recomputed[day], f, indent=4)
+
+    store = HistoryStore('standings', history_dir)
+    stored = dict(store.iter_snapshots())
+    stored.update({day: recomputed[day] for day in changed})
+    store.rewrite(sorted(stored.items()))
+
+    # latest-standings.json follows the newest date
+    latest_day = max(stored)
+    if latest_day in changed:
+        with atomic_open(os.path.join(data_dir, 'latest-standings.json')) as f:
+            json.dump(recomputed[latest_day], f, indent=4)
+
+
+def _parse_date(value):
+    return datetime.strptime(value, '%Y%m%d').date()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Recompute standings for every stored updatedstats snapshot with the current scoring")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--history-dir", default=HISTORY_DIR)
+    parser.add_argument("--start", type=_parse_date, help="First date to recompute (YYYYMMDD)")
+    parser.add_argument("--end", type=_parse_date, help="Last date to recompute (YYYYMMDD)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes (default: one per CPU)")
+    parser.add_argument("--scoring-rules", default=SCORING_RULES_FILE,
+                        help=f"Rules file whose \"default\" entry is used (default: {SCORING_RULES_FILE})")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Only report which dates would change")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    start_time = time.perf_counter()
+
+    stats_snapshots = [(day, rows) for day, rows in load_snapshot_history('updatedstats', args.data_dir, args.history_dir)
+                       if (args.start is None or day >= args.start) and (args.end is None or day <= args.end)]
+    existing = dict(load_snapshot_history('standings', args.data_dir, args.history_dir))
+    recomputed = recompute_all(stats_snapshots, args.workers, default_rules(args.scoring_rules))
+    changed = sorted(day for day, standings in recomputed.items() if existing.get(day) != standings)
+
+    print_rank_diff(changed, existing, recomputed)
+    print(f"\nRecomputed {len(recomputed)} dates in {time.perf_counter() - start_time:.2f}s, "
+          f"{len(changed)} changed")
+
+    if changed and not args.dry_run:
+        write_recomputed(changed, recomputed, args.data_dir, args.history_dir)
+        write_chart_series(load_standings_history(args.data_dir, args.history_dir, include_players=False),
+                           os.path.join(args.data_dir, 'standings-series.json'))
+        print(f"Wrote standings for {len(changed)} dates")
+    return changed
+
+
+if __name__ == "__main__":
+    main()
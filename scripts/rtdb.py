@@ -0,0 +1,149 @@
+import json
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+# The only parts of a league node the scripts read. Everything else (chat, presence,
+# draftStatus, draftQueues, ...) can grow without bound and is never downloaded.
+LEAGUE_CHILDREN = ('draftedPlayers', 'playoffRound', 'scoringRules')
+# Concurrent per-league reads
+DEFAULT_READ_WORKERS = 8
+
+
+def _payload_size(value):
+    return len(json.dumps(value, separators=(',', ':')).encode('utf-8'))
+
+
+class RtdbStats:
+    """Round trips and approximate JSON bytes read/written through a CountingReference"""
+
+    def __init__(self):
+        self.round_trips = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self._lock = threading.Lock()
+
+    def record(self, bytes_read=0, bytes_written=0):
+        with self._lock:
+            self.round_trips += 1
+            self.bytes_read += bytes_read
+            self.bytes_written += bytes_written
+
+    def log_summary(self):
+        logger.info(f"Realtime Database: {self.round_trips} round trips, "
+                    f"{self.bytes_read} bytes read, {self.bytes_written} bytes written")
+
+
+class CountingReference:
+    """Wraps a firebase_admin db.Reference (or InMemoryReference) and counts its traffic"""
+
+    def __init__(self, reference, stats=None):
+        self.reference = reference
+        self.stats = stats or RtdbStats()
+
+    @property
+    def path(self):
+        return self.reference.path
+
+    def child(self, path):
+        return CountingReference(self.reference.child(path), self.stats)
+
+    def get(self, shallow=False):
+        start = time.perf_counter()
+        value = self.reference.get(shallow=shallow)
+        size = _payload_size(value)
+        METRICS.observe_rtdb('get', time.perf_counter() - start, size)
+        self.stats.record(bytes_read=size)
+        return value
+
+    def update(self, value):
+        start = time.perf_counter()
+        self.reference.update(value)
+        size = _payload_size(value)
+        METRICS.observe_rtdb('update', time.perf_counter() - start, size)
+        self.stats.record(bytes_written=size)
+
+    def set(self, value):
+        start = time.perf_counter()
+        self.reference.set(value)
+        size = _payload_size(value)
+        METRICS.observe_rtdb('set', time.perf_counter() - start, size)
+        self.stats.record(bytes_written=size)
+
+
+class InMemoryReference:
+    """
+    Local stand-in for firebase_admin's db.Reference over a plain dict, for tests and offline runs.
+    Supports child(), get(shallow=...), set() and multi-path update() like the real client.
+    """
+
+    def __init__(self, data=None, path='/'):
+        self._root = data if data is not None else {}
+        self.path = path
+
+    def _parts(self, path=None):
+        return [part for part in (path if path is not None else self.path).split('/') if part]
+
+    def child(self, path):
+        return InMemoryReference(self._root, '/' + '/'.join(self._parts() + self._parts(path)))
+
+    def get(self, shallow=False):
+        node = self._root
+        for part in self._parts():
+            if not isinstance(node, dict) or part not in node:
+                return None
+            node = node[part]
+        if shallow and isinstance(node, dict):
+            return {key: True for key in node}
+        return json.loads(json.dumps(node))
+
+    def _write(self, parts, value):
+        if not parts:
+            self._root.clear()
+            self._root.update(value or {})
+            return
+        node = self._root
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+        if value is None:
+            node.pop(parts[-1], None)
+        else:
+            node[parts[-1]] = json.loads(json.dumps(value))
+
+    def set(self, value):
+        self._write(self._parts(), value)
+
+    def update(self, value):
+        # Keys may be nested paths ("a/b/c"), all applied together as in a multi-path update
+        for key, child_value in value.items():
+            self._write(self._parts() + self._parts(key), child_value)
+
+
+def read_leagues(database, children=LEAGUE_CHILDREN, workers=DEFAULT_READ_WORKERS):
+    """
+    Read only the parts of every league the scripts use: a shallow listing of the league IDs,
+    then each league's `children` nodes. Returns {league_id: {child: value}} shaped like the
+    full leagues tree, or None if there are no leagues.
+    """
+    league_ids = database.child('leagues').get(shallow=True)
+    if not league_ids:
+        return None
+    paths = [(league_id, child) for league_id in league_ids for child in children]
+
+    def read(league_child):
+        league_id, child = league_child
+        return database.child(f'leagues/{league_id}/{child}').get()
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        values = list(executor.map(read, paths))
+
+    leagues = {league_id: {} for league_id in league_ids}
+    for (league_id, child), value in zip(paths, values):
+        if value is not None:
+            leagues[league_id][child] = value
+    return leagues
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+import os
+import json
+import argparse
+import logging
+import time
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from nhl_api import DEFAULT_WORKERS, DEFAULT_TIMEOUT
+from landing_cache import open_landing_cache
+from stats_provider import PlayerStatsProvider
+from fetch_stats import (DRAFTED_PLAYERS_FILE, STAT_FIELDS, build_updated_stats, fetched_stats, incremental_requested,
+                         load_drafted_players, load_incremental_context, seed_club_stats, select_carry_forward,
+                         updated_stats_fingerprint, write_updated_stats)
+from calculate_standings import calculate_standings_from_players, format_standings, write_standings_outputs
+from league_standings import build_ownership_index, compute_all_league_standings, fetch_index_stats, write_league_outputs
+from standings_history import load_standings_history, write_chart_series
+from bundles import write_bundles
+from boxscores import GORDIE_HOWE_FIELD, update_ledger
+from fingerprints import FingerprintStore, fingerprint
+from metrics import METRICS, add_metrics_args, finish_run, record_run_caches, start_run
+from checkpoint import DEFAULT_MAX_AGE, CheckpointJournal, checkpoint_path
+from club_stats import current_season
+from point_in_time import PointInTimeStats
+from scoring_rules import default_rules, rules_for_leagues
+from rtdb import CountingReference, RtdbStats, read_leagues
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def run_stages(stages, max_workers=4, profile_dir=None):
+    """
+    Run stages as a dependency graph.
+    `stages` maps a stage name to (dependency names, function). Each function is called with the
+    results of its dependencies as keyword arguments, and a stage starts as soon as all of its
+    dependencies have finished, so independent stages run concurrently. Every stage is measured
+    in METRICS, and with profile_dir its cProfile stats are dumped there.
+    Returns (results by stage name, timings as (name, start offset, duration) in completion order).
+    """
+    pending = dict(stages)
+    results = {}
+    timings = []
+    running = {}
+    pipeline_start = time.perf_counter()
+
+    def run_stage(name, func, kwargs):
+        start = time.perf_counter()
+        with METRICS.stage(name, profile_dir):
+            result = func(**kwargs)
+        return result, start - pipeline_start, time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending or running:
+            ready = [name for name, (deps, _) in pending.items() if all(dep in results for dep in deps)]
+            for name in ready:
+                deps, func = pending.pop(name)
+                kwargs = {dep: results[dep] for dep in deps}
+                running[executor.submit(run_stage, name, func, kwargs)] = name
+
+            if not running:
+                raise RuntimeError(f"Stages with unsatisfiable dependencies: {sorted(pending)}")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    result, start, duration = future.result()
+                except Exception:
+                    logger.error(f"Stage '{name}' failed")
+                    print_timing_table(timings)
+                    raise
+                results[name] = result
+                timings.append((name, start, duration))
+
+    return results, timings
+
+
+def print_timing_table(timings):
+    """Print how long each stage took and when it started relative to the pipeline start"""
+    name_width = max([len(name) for name, _, _ in timings] + [len("Stage")])
+    print(f"\n{'Stage'.ljust(name_width)}  {'Start':>8}  {'Duration':>9}")
+    print(f"{'-' * name_width}  {'-' * 8}  {'-' * 9}")
+    for name, start, duration in timings:
+        print(f"{name.ljust(name_width)}  {start:>7.2f}s  {duration:>8.2f}s")
+    if timings:
+        total = max(start + duration for _, start, duration in timings)
+        print(f"{'total'.ljust(name_width)}  {'':>8}  {total:>8.2f}s")
+
+
+def load_previous_drafted_players():
+    """The drafted player list from the last run, used to start fetching before Firebase answers"""
+    try:
+        with open(DRAFTED_PLAYERS_FILE, 'r') as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def load_league_outputs(paths):
+    """{league_id: (rows, standings)} from the per-league files write_league_outputs wrote"""
+    league_results = {}
+    for rows_path, standings_path in zip(paths[::2], paths[1::2]):
+        with open(rows_path, 'r') as f:
+            rows = json.load(f)
+        with open(standings_path, 'r') as f:
+            league_results[os.path.basename(os.path.dirname(rows_path))] = (rows, json.load(f))
+    return league_results
+
+
+def build_stages(args, provider, rtdb_stats=None, fingerprints=None):
+    """
+    Describe the daily pipeline: update_playerlist -> fetch_stats -> calculate_standings.
+    The output stages check the fingerprint of their inputs in `fingerprints`; on a hit they
+    return the outputs of the run that recorded it instead of computing them again.
+    """
+    fingerprints = fingerprints or FingerprintStore(path=None)
+    use_incremental = incremental_requested(args)
+
+    def firebase():
+        # Imported here so --skip-playerlist runs do not need firebase_admin installed
+        from update_playerlist import initialize_firebase
+        return CountingReference(initialize_firebase(), rtdb_stats)
+
+    def leagues(firebase):
+        # Only the league nodes the pipeline uses, not chat/presence/draft state
+        return read_leagues(firebase)
+
+    def drafted_players(firebase, leagues, ledger):
+        from update_playerlist import collect_drafted_players
+        # With the ledger, pre-acquisition points are the player's points when they were drafted
+        point_in_time = PointInTimeStats.from_ledger(ledger, current_season()) if ledger is not None else None
+        try:
+            output_data, updated_count, skipped_count = collect_drafted_players(firebase, provider, leagues,
+                                                                                point_in_time)
+        except Exception as e:
+            # Same behaviour as running update_playerlist.py on its own: keep going with the last file
+            logger.error(f"Error processing drafted players, using the existing {DRAFTED_PLAYERS_FILE}: {e}")
+            return None
+        logger.info(f"Pre-acquisition stats: {updated_count} players updated, {skipped_count} skipped")
+        return output_data
+
+    def incremental_context():
+        return load_incremental_context() if use_incremental else None
+
+    def ledger():
+        # One boxscore per game finished since the last run replaces the per-player fetches
+        return update_ledger(session=provider.session, timeout=provider.timeout) if args.ledger else None
+
+    def ledger_totals(ledger):
+        return ledger.totals(current_season()) if ledger is not None else None
+
+    def warm_stats(incremental_context):
+        if args.ledger:
+            return 0
+        # Start fetching players from the last known drafted list while Firebase is being read;
+        # the provider makes sure none of them is requested twice
+        previous = [(pid, entry) for pid, entry in load_previous_drafted_players().items() if isinstance(entry, dict)]
+        carried = select_carry_forward(previous, incremental_context)
+        to_fetch = [(pid, entry) for pid, entry in previous if pid not in carried]
+        if not args.no_club_stats:
+            seed_club_stats(provider, to_fetch)
+        provider.prefetch([pid for pid, _ in to_fetch])
+        return len(previous) - len(carried)
+
+    def updated_stats(drafted_players, incremental_context, warm_stats, ledger_totals):
+        if drafted_players is None:
+            # No leagues in Firebase (or --skip-playerlist): use the existing drafted player file
+            drafted_players = load_drafted_players()
+        # With the ledger every input is known up front; fetched stats are only known once fetched
+        if ledger_totals is not None and \
+                fingerprints.check('updated_stats', updated_stats_fingerprint(drafted_players, ledger_totals)):
+            return fingerprints.load_output('updated_stats')
+        rows = build_updated_stats(drafted_players, provider, incremental_context,
+                                   use_club_stats=not args.no_club_stats, ledger_totals=ledger_totals)
+        if ledger_totals is None:
+            fingerprints.check('updated_stats', updated_stats_fingerprint(drafted_players, fetched_stats(rows)))
+        return rows
+
+    def standings(updated_stats):
+        rules = default_rules()
+        if fingerprints.check('standings', fingerprint(updated_stats, rules)):
+            return fingerprints.load_output('standings')
+        return format_standings(calculate_standings_from_players(updated_stats, rules))
+
+    def league_standings(leagues, drafted_players, updated_stats, ledger_totals):
+        # Every league is scored from the same per-player stats; nothing is fetched per league
+        index = build_ownership_index(leagues)
+        known_stats = {str(row["Player ID"]): row for row in updated_stats}
+        if ledger_totals is not None:
+            known_stats.update({player_id: ledger_totals.get(player_id, {}) for player_id in index
+                                if player_id not in known_stats})
+        stats_by_player = fetch_index_stats(index, provider, known_stats)
+        rules_by_league = rules_for_leagues(leagues)
+        scored_fields = STAT_FIELDS + (GORDIE_HOWE_FIELD,)
+        league_stats = {player_id: {field: stats_by_player.get(player_id, {}).get(field) for field in scored_fields}
+                        for player_id in index}
+        if fingerprints.check('league_standings', fingerprint(index, league_stats, rules_by_league)):
+            return load_league_outputs(fingerprints.outputs('league_standings'))
+        return compute_all_league_standings(index, stats_by_player, rules_by_league)
+
+    stages = {
+        'incremental_context': ([], incremental_context),
+        'ledger': ([], ledger),
+        'ledger_totals': (['ledger'], ledger_totals),
+        'warm_stats': (['incremental_context'], warm_stats),
+        'updated_stats': (['drafted_players', 'incremental_context', 'warm_stats', 'ledger_totals'], updated_stats),
+        'standings': (['updated_stats'], standings),
+        'league_standings': (['leagues', 'drafted_players', 'updated_stats', 'ledger_totals'], league_standings),
+    }
+    if args.skip_playerlist:
+        stages['leagues'] = ([], lambda: None)
+        stages['drafted_players'] = ([], lambda: None)
+    else:
+        stages['firebase'] = ([], firebase)
+        stages['leagues'] = (['firebase'], leagues)
+        stages['drafted_players'] = (['firebase', 'leagues', 'ledger'], drafted_players)
+    return stages
+
+
+def write_outputs(results, skip_playerlist, fingerprints=None):
+    """
+    Write every output file once, in the same formats the individual scripts produce.
+    Stages whose fingerprint hit are not written again, and their fingerprints are recorded
+    for the stages that were.
+    """
+    fingerprints = fingerprints or FingerprintStore(path=None)
+    run_date = datetime.now()
+    if not skip_playerlist and results['drafted_players'] is not None:
+        from update_playerlist import write_drafted_players
+        write_drafted_players(results['drafted_players'])
+
+    if fingerprints.hit('updated_stats'):
+        stats_file = os.path.basename(fingerprints.outputs('updated_stats')[0])
+    else:
+        stats_file = write_updated_stats(results['updated_stats'], run_date)
+        fingerprints.record('updated_stats', [os.path.join('data', stats_file)])
+    if fingerprints.hit('standings'):
+        standings_file = fingerprints.outputs('standings')[0]
+    else:
+        standings_file = write_standings_outputs(results['standings'], fingerprints, run_date)
+        # Today's standings are in the history now, so the chart data includes them
+        write_chart_series(load_standings_history(include_players=False))
+    if not fingerprints.hit('league_standings'):
+        league_dirs = write_league_outputs(results['league_standings'], run_date)
+        date_str = run_date.strftime("%Y%m%d")
+        fingerprints.record('league_standings', [
+            os.path.join(league_dir, f"{prefix}-{date_str}.json")
+            for league_dir in league_dirs for prefix in ('updatedstats', 'standings')])
+
+    if all(fingerprints.hit(stage) for stage in ('updated_stats', 'standings', 'league_standings')):
+        logger.info("Every output stage hit its fingerprint; nothing was written")
+    else:
+        # The front end loads these through data/manifest.json
+        write_bundles(results['updated_stats'], results['standings'], results['league_standings'], run_date)
+    fingerprints.save()
+    return stats_file, standings_file
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run update_playerlist, fetch_stats and calculate_standings in one process")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only refetch players whose NHL team played since the previous updatedstats snapshot")
+    parser.add_argument("--skip-playerlist", action="store_true",
+                        help="Do not read Firebase; use the existing playerlist_drafted_with_pre_acq_stats.json")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"Number of concurrent NHL API requests (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT,
+                        help=f"Per-request timeout in seconds (default: {DEFAULT_TIMEOUT})")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Ignore the on-disk landing cache and fetch every player")
+    parser.add_argument("--no-club-stats", action="store_true",
+                        help="Fetch every player's /landing data instead of one club stats listing per NHL team")
+    parser.add_argument("--ledger", action="store_true",
+                        help="Take stats from the boxscore ledger (one request per new game) instead of per player")
+    parser.add_argument("--force", action="store_true",
+                        help="Compute and write every stage even if its inputs match the previous run's fingerprint")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip players an interrupted earlier run already fetched (see --resume-max-age)")
+    parser.add_argument("--resume-max-age", type=float, default=DEFAULT_MAX_AGE.total_seconds() / 3600,
+                        help=f"Hours a fetch from an interrupted run stays usable (default: {DEFAULT_MAX_AGE.total_seconds() / 3600:g})")
+    add_metrics_args(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.makedirs('data', exist_ok=True)
+    start_run(args)
+
+    with METRICS.stage('landing_cache', args.profile):
+        cache = open_landing_cache(args.no_cache)
+    # Every finished fetch is journaled so an interrupted or cancelled run can be resumed
+    journal = CheckpointJournal(checkpoint_path('run_pipeline'))
+    provider = PlayerStatsProvider(cache, workers=args.workers, timeout=args.timeout, journal=journal)
+    if args.resume:
+        provider.resume(timedelta(hours=args.resume_max_age))
+    else:
+        journal.clear()
+    rtdb_stats = RtdbStats()
+    fingerprints = FingerprintStore(force=args.force)
+    try:
+        results, timings = run_stages(build_stages(args, provider, rtdb_stats, fingerprints),
+                                      profile_dir=args.profile)
+
+        write_start = time.perf_counter()
+        with METRICS.stage('write_outputs', args.profile):
+            write_outputs(results, args.skip_playerlist, fingerprints)
+        start_offset = max(start + duration for _, start, duration in timings)
+        timings.append(('write_outputs', start_offset, time.perf_counter() - write_start))
+    finally:
+        provider.close()
+
+    provider.log_summary()
+    if cache is not None:
+        cache.save()
+        cache.log_summary()
+    if not args.skip_playerlist:
+        rtdb_stats.log_summary()
+    fingerprints.log_summary()
+    # The outputs are final, so nothing is left to resume
+    journal.clear()
+    record_run_caches(cache, provider, fingerprints)
+    finish_run(args, 'run_pipeline')
+
+    print_timing_table(timings)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import os
+import json
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Stat columns a scoring rule can give points for, as named in updatedstats-*.json
+SCORING_COLUMNS = ("Goals", "Assists", "Wins", "Shutouts",
+                   "Points for Gordie Howe Hattricks", "Points for Conn Smythe")
+# Points per unit of each stat unless a league overrides it
+DEFAULT_RULES = {
+    "Goals": 1,
+    "Assists": 1,
+    "Wins": 2,
+    "Shutouts": 1,
+    "Points for Gordie Howe Hattricks": 1,
+    "Points for Conn Smythe": 1,
+}
+# Optional local rules: {"default": {...}, "<leagueId>": {...}}. A league's scoringRules node in
+# Firebase takes precedence over its entry here.
+SCORING_RULES_FILE = os.path.join('data', 'scoring_rules.json')
+
+
+class ScoringRules:
+    """
+    A compiled scoring spec: one weight per entry of SCORING_COLUMNS.
+
+    The spec maps stat names to points per unit. Stats it leaves out keep their
+    DEFAULT_RULES weight, so a league only lists what it changes.
+    """
+
+    def __init__(self, spec=None):
+        if spec is not None and not isinstance(spec, dict):
+            raise ValueError(f"Scoring rules must be an object of stat name -> points, got {spec!r}")
+        spec = dict(spec or {})
+        unknown = sorted(set(spec) - set(SCORING_COLUMNS))
+        if unknown:
+            raise ValueError(f"Unknown stats in scoring rules: {unknown}; expected some of {list(SCORING_COLUMNS)}")
+        for stat, weight in spec.items():
+            if isinstance(weight, bool) or not isinstance(weight, (int, float)):
+                raise ValueError(f"Scoring rule for '{stat}' must be a number, got {weight!r}")
+        self.spec = {stat: spec.get(stat, DEFAULT_RULES[stat]) for stat in SCORING_COLUMNS}
+        self.weights = np.array([self.spec[stat] for stat in SCORING_COLUMNS])
+
+    def score(self, stats):
+        """Points for one stat line ({stat name: value}); missing stats count as 0"""
+        return sum(stats.get(stat, 0) * weight for stat, weight in self.spec.items() if weight)
+
+    def __eq__(self, other):
+        return isinstance(other, ScoringRules) and self.spec == other.spec
+
+    def __repr__(self):
+        return f"ScoringRules({self.spec})"
+
+
+DEFAULT_SCORING = ScoringRules()
+
+_compiled = {}
+
+
+def compile_rules(spec):
+    """ScoringRules for a spec; identical specs share one compiled instance"""
+    if not spec:
+        return DEFAULT_SCORING
+    key = json.dumps(spec, sort_keys=True)
+    if key not in _compiled:
+        _compiled[key] = ScoringRules(spec)
+    return _compiled[key]
+
+
+def load_rules_file(path=SCORING_RULES_FILE):
+    """The local rules file as {"default": spec, leagueId: spec}; empty if it does not exist"""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def default_rules(rules_file=SCORING_RULES_FILE):
+    """Rules for the combined standings: the local file's "default" entry, else DEFAULT_RULES"""
+    return compile_rules(load_rules_file(rules_file).get('default'))
+
+
+def rules_for_leagues(leagues_snapshot, rules_file=SCORING_RULES_FILE):
+    """
+    {league_id: ScoringRules} for every league. Each league uses its own scoringRules node,
+    then its entry in the local rules file, then the file's "default" entry.
+    """
+    local_rules = load_rules_file(rules_file)
+    rules = {}
+    for league_id, league_data in (leagues_snapshot or {}).items():
+        spec = league_data.get('scoringRules') if isinstance(league_data, dict) else None
+        if spec is None:
+            spec = local_rules.get(league_id, local_rules.get('default'))
+        try:
+            rules[league_id] = compile_rules(spec)
+        except ValueError as e:
+            logger.error(f"Invalid scoring rules for league {league_id}, using the defaults: {e}")
+            rules[league_id] = DEFAULT_SCORING
+    custom = sum(1 for league_rules in rules.values() if league_rules != DEFAULT_SCORING)
+    if custom:
+        logger.info(f"{custom} of {len(rules)} leagues use custom scoring rules")
+    return rules
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+import os
+import re
+import json
+import argparse
+import logging
+import unicodedata
+from datetime import datetime, timezone
+
+import requests
+
+from nhl_api import DEFAULT_TIMEOUT, fetch_playoff_carousel
+from club_stats import current_season
+from data_io import atomic_open, iter_records
+from bundles import bundle_files, write_bundle
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# One index per player file: data/search/<file name>/index.json and its shards/
+SEARCH_DIR = os.path.join('data', 'search')
+INDEX_FILE = 'index.json'
+SHARDS_DIR = 'shards'
+PLAYER_FILES = (os.path.join('data', 'nhl_players.json'), os.path.join('data', 'nhl_playoff_players.json'))
+# Columns of the record shards, in order; everything the draft centre's player table shows
+RECORD_FIELDS = ("id", "fullName", "position", "teamAbbreviation", "gamesPlayed",
+                 "goals", "assists", "points", "wins", "shutouts")
+# Queries shorter than a trigram are matched against name token prefixes of these lengths
+PREFIX_LENGTHS = (1, 2)
+# Presorted orderings and their direction; ties are broken by name
+ORDERINGS = {"points": "desc", "goals": "desc", "fullName": "asc"}
+# Documents per ordering shard
+ORDER_PAGE_SIZE = 200
+INDEX_VERSION = 1
+
+_TOKEN_SEPARATORS = re.compile(r"[\s\-'.]+")
+
+
+def normalize_name(name):
+    """Lowercase with accents removed and whitespace collapsed; player-search.js normalizes queries the same way"""
+    decomposed = unicodedata.normalize('NFD', name or '')
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return ' '.join(stripped.lower().split())
+
+
+def name_tokens(normalized):
+    return [token for token in _TOKEN_SEPARATORS.split(normalized) if token]
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def shard_key(term):
+    """The shard a prefix or trigram lives in: its first character, or '_' for anything but a-z/0-9"""
+    first = term[0]
+    return first if 'a' <= first <= 'z' or '0' <= first <= '9' else '_'
+
+
+def eliminated_teams(carousel, pool_teams):
+    """
+    Teams out of the playoffs according to a playoff carousel: every team that lost a series
+    and, once the playoffs have started, every team in the pool that did not make them
+    """
+    playoff_teams, eliminated = set(), set()
+    for playoff_round in (carousel or {}).get('rounds', []):
+        for series in playoff_round.get('series', []):
+            seeds = (series.get('topSeed') or {}, series.get('bottomSeed') or {})
+            needed = series.get('neededToWin', 4)
+            for seed, opponent in (seeds, seeds[::-1]):
+                if seed.get('abbrev'):
+                    playoff_teams.add(seed['abbrev'])
+                    if opponent.get('wins', 0) >= needed:
+                        eliminated.add(seed['abbrev'])
+    if not playoff_teams:
+        return set()
+    return eliminated | (set(pool_teams) - playoff_teams)
+
+
+def lookup_eliminated_teams(pool_teams, season=None, session=None, timeout=DEFAULT_TIMEOUT):
+    """eliminated_teams from the NHL API; nobody is excluded if the carousel can not be read"""
+    try:
+        carousel = fetch_playoff_carousel(season or current_season(), session, timeout)
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"Could not read the playoff carousel, no team is excluded from the search index: {e}")
+        return set()
+    return eliminated_teams(carousel, pool_teams)
+
+
+def _order_key(field, direction):
+    def key(item):
+        doc, player = item
+        if direction == 'asc':
+            return (normalize_name(player.get(field)) if field == 'fullName' else player.get(field), doc)
+        value = player.get(field)
+        # Missing stats sort last, as in the draft centre's own sort
+        value = value if isinstance(value, (int, float)) else float('-inf')
+        return (-value, normalize_name(player.get('fullName')), doc)
+    return key
+
+
+def build_search_index(players, eliminated=()):
+    """
+    The index of every player not on an eliminated team, as unwritten shard contents.
+    Players are numbered (documents) by team then name, so each team's record shard holds
+    one contiguous range of documents and every table refers to players by document number.
+    """
+    kept = [player for player in players
+            if isinstance(player, dict) and player.get('id') and player.get('teamAbbreviation') not in eliminated]
+    kept.sort(key=lambda player: (player.get('teamAbbreviation') or '', normalize_name(player.get('fullName')),
+                                  player['id']))
+
+    teams, records = {}, {}
+    prefixes, grams, positions = {}, {}, {}
+    for doc, player in enumerate(kept):
+        team = player.get('teamAbbreviation') or ''
+        start, _ = teams.get(team, (doc, doc))
+        teams[team] = (start, doc + 1)
+        records.setdefault(team, []).append([player.get(field) for field in RECORD_FIELDS])
+        positions.setdefault(player.get('position') or 'N/A', []).append(doc)
+
+        name = normalize_name(player.get('fullName'))
+        for prefix in {token[:length] for token in name_tokens(name) for length in PREFIX_LENGTHS if len(token) >= length}:
+            prefixes.setdefault(shard_key(prefix), {}).setdefault(prefix, []).append(doc)
+        for gram in trigrams(name):
+            grams.setdefault(shard_key(gram), {}).setdefault(gram, []).append(doc)
+
+    orders = {}
+    for field, direction in ORDERINGS.items():
+        ordered = [doc for doc, _ in sorted(enumerate(kept), key=_order_key(field, direction))]
+        orders[field] = [ordered[i:i + ORDER_PAGE_SIZE] for i in range(0, len(ordered), ORDER_PAGE_SIZE)]
+
+    return {"count": len(kept), "teams": teams, "records": records, "prefix": prefixes, "trigram": grams,
+            "positions": positions, "orders": orders}
+
+
+def index_entries(index):
+    """Every shard entry an index.json refers to"""
+    entries = [team['shard'] for team in index.get('teams', {}).values()]
+    entries += list(index.get('prefix', {}).values()) + list(index.get('trigram', {}).values())
+    entries += [facet['shard'] for facet in index.get('facets', {}).values()]
+    entries += [page for order in index.get('orders', {}).values() for page in order['pages']]
+    return entries
+
+
+def _load_index(path):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _prune_shards(keep_indexes, shards_dir):
+    """Delete shards none of `keep_indexes` refers to (the previous index is kept for clients that just loaded it)"""
+    keep = set()
+    for index in keep_indexes:
+        for entry in index_entries(index):
+            keep |= bundle_files(entry, shards_dir)
+    removed = 0
+    if os.path.isdir(shards_dir):
+        for name in os.listdir(shards_dir):
+            path = os.path.normpath(os.path.join(shards_dir, name))
+            if path not in keep and os.path.isfile(path):
+                os.remove(path)
+                removed += 1
+    return removed
+
+
+def write_search_index(players, index_dir, eliminated=(), source=None):
+    """
+    Write the shards of a player pool's search index and point index_dir/index.json at them.
+    Shards are content-hashed like the stats bundles, so unchanged ones keep their names.
+    """
+    built = build_search_index(players, eliminated)
+    shards_dir = os.path.join(index_dir, SHARDS_DIR)
+    index = {
+        "version": INDEX_VERSION,
+        "generatedAt": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        "source": source,
+        "count": built["count"],
+        "fields": list(RECORD_FIELDS),
+        "excludedTeams": sorted(eliminated),
+        "prefixLengths": list(PREFIX_LENGTHS),
+        "teams": {team: {"docs": list(docs), "shard": write_bundle(f"records-{team or 'none'}", built["records"][team], shards_dir)}
+                  for team, docs in sorted(built["teams"].items())},
+        "prefix": {key: write_bundle(f"prefix-{key}", table, shards_dir) for key, table in sorted(built["prefix"].items())},
+        "trigram": {key: write_bundle(f"trigram-{key}", table, shards_dir) for key, table in sorted(built["trigram"].items())},
+        "facets": {"position": {"counts": {position: len(docs) for position, docs in sorted(built["positions"].items())},
+                                "shard": write_bundle("facet-position", built["positions"], shards_dir)}},
+        "orders": {field: {"direction": ORDERINGS[field],
+                           "pages": [write_bundle(f"order-{field}-{page}", docs, shards_dir)
+                                     for page, docs in enumerate(built["orders"][field])]}
+                   for field in ORDERINGS},
+    }
+
+    index_path = os.path.join(index_dir, INDEX_FILE)
+    previous = _load_index(index_path)
+    with atomic_open(index_path) as f:
+        json.dump(index, f, indent=2)
+    removed = _prune_shards([index, previous], shards_dir)
+    shard_bytes = sum(entry['bytes'] for entry in index_entries(index))
+    logger.info(f"Search index {index_path}: {index['count']} players in {len(index_entries(index))} shards "
+                f"({shard_bytes} bytes), excluded teams {index['excludedTeams']}, removed {removed} old shard files")
+    return index
+
+
+def index_dir_for(player_file, search_dir=SEARCH_DIR):
+    """data/search/<player file name without .json>"""
+    return os.path.join(search_dir, os.path.splitext(os.path.basename(player_file))[0])
+
+
+def build_index_for_file(player_file, search_dir=SEARCH_DIR, exclude_eliminated=True, session=None,
+                         timeout=DEFAULT_TIMEOUT):
+    """Index a player database file (nhl_players.json or nhl_playoff_players.json)"""
+    players = list(iter_records(player_file))
+    pool_teams = {player.get('teamAbbreviation') for player in players if isinstance(player, dict)} - {None, ''}
+    eliminated = lookup_eliminated_teams(pool_teams, session=session, timeout=timeout) if exclude_eliminated else set()
+    return write_search_index(players, index_dir_for(player_file, search_dir), eliminated,
+                              source=os.path.basename(player_file))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build the draft centre's sharded player search indexes")
+    parser.add_argument("player_files", nargs="*", default=None,
+                        help="Player database files to index (default: whichever of nhl_players.json and "
+                             "nhl_playoff_players.json exist)")
+    parser.add_argument("--search-dir", default=SEARCH_DIR, help=f"Output directory (default: {SEARCH_DIR})")
+    parser.add_argument("--keep-eliminated", action="store_true",
+                        help="Index players of teams that are out of the playoffs too")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT,
+                        help=f"Timeout for the playoff carousel request in seconds (default: {DEFAULT_TIMEOUT})")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    player_files = args.player_files or [path for path in PLAYER_FILES if os.path.exists(path)]
+    return [build_index_for_file(path, args.search_dir, not args.keep_eliminated, timeout=args.timeout)
+            for path in player_files]
+
+
+if __name__ == "__main__":
+    main()
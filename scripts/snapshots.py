@@ -0,0 +1,53 @@
+import os
+import re
+import glob
+from datetime import datetime
+
+# Snapshots from the start of the 2025 playoffs were named like 'updatedstats-Apr20.json'
+# before the scripts switched to 'updatedstats-YYYYMMDD.json'. Those names carry no year.
+LEGACY_SNAPSHOT_YEAR = 2025
+
+_DATED_NAME = re.compile(r'-(\d{8})\.json$')
+_LEGACY_NAME = re.compile(r'-([A-Z][a-z]{2})(\d{2})\.json$')
+
+
+def snapshot_date(path, legacy_year=LEGACY_SNAPSHOT_YEAR):
+    """Return the date encoded in a snapshot filename, or None if it has no recognizable date"""
+    name = os.path.basename(path)
+    match = _DATED_NAME.search(name)
+    if match:
+        try:
+            return datetime.strptime(match.group(1), '%Y%m%d').date()
+        except ValueError:
+            return None
+    match = _LEGACY_NAME.search(name)
+    if match:
+        try:
+            return datetime.strptime(f"{legacy_year}{match.group(1)}{match.group(2)}", '%Y%b%d').date()
+        except ValueError:
+            return None
+    return None
+
+
+def list_snapshots(prefix, data_dir='data'):
+    """
+    List dated snapshot files such as data/updatedstats-*.json as (date, path) pairs, oldest first.
+    Dates come from the filenames rather than modification times, which a git checkout resets.
+    When both naming styles exist for the same day the YYYYMMDD file wins.
+    """
+    by_date = {}
+    for path in glob.glob(os.path.join(data_dir, f'{prefix}-*.json')):
+        day = snapshot_date(path)
+        if day is None:
+            continue
+        if day not in by_date or _DATED_NAME.search(os.path.basename(path)):
+            by_date[day] = path
+    return sorted(by_date.items())
+
+
+def latest_snapshot(prefix, data_dir='data', before=None):
+    """Return the newest (date, path) snapshot, optionally only those dated strictly before `before`"""
+    snapshots = list_snapshots(prefix, data_dir)
+    if before is not None:
+        snapshots = [(day, path) for day, path in snapshots if day < before]
+    return snapshots[-1] if snapshots else (None, None)
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+import os
+import json
+import argparse
+import logging
+from datetime import datetime
+
+import numpy as np
+
+from snapshots import list_snapshots
+from history_store import HISTORY_DIR, HistoryStore
+from calculate_standings import load_player_columns, score_player_columns
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Chart.js line chart data for the league page
+SERIES_FILE = os.path.join('data', 'standings-series.json')
+
+
+def load_snapshot_history(kind, data_dir='data', history_dir=HISTORY_DIR):
+    """
+    (date, rows) pairs for every stored day, oldest first.
+    Days are read from the history log; daily <kind>-*.json files fill in any day it does not have,
+    so this also works on a tree with only the daily files.
+    """
+    snapshots = dict(HistoryStore(kind, history_dir).iter_snapshots())
+    for day, path in list_snapshots(kind, data_dir):
+        if day not in snapshots:
+            with open(path, 'r') as f:
+                snapshots[day] = json.load(f)
+    return sorted(snapshots.items())
+
+
+class SnapshotSeries:
+    """
+    Values per key (team or player) on every snapshot date, as one dates x keys array.
+
+    A key missing from a snapshot keeps its previous value (`fill` before it first appears),
+    so every row is the as-of state on that date. Date lookups are binary searches, and the
+    change between two dates is a difference of two rows.
+    """
+
+    def __init__(self, dates, keys, values):
+        self.dates = list(dates)
+        self.keys = list(keys)
+        self.values = values
+        self._ordinals = np.array([day.toordinal() for day in self.dates], dtype=np.int64)
+        self._key_index = {key: i for i, key in enumerate(self.keys)}
+
+    @classmethod
+    def from_snapshots(cls, dated_values, fill=0.0, forward_fill=True):
+        """Build from (date, {key: value}) pairs sorted by date. Without forward_fill, missing values are NaN."""
+        keys = list(dict.fromkeys(key for _, values in dated_values for key in values))
+        key_index = {key: i for i, key in enumerate(keys)}
+        values = np.full((len(dated_values), len(keys)), np.nan)
+        for row, (_, day_values) in enumerate(dated_values):
+            columns = [key_index[key] for key in day_values]
+            values[row, columns] = list(day_values.values())
+        if not forward_fill:
+            return cls([day for day, _ in dated_values], keys, values)
+        # Forward-fill keys missing from a snapshot with their last known value
+        known = ~np.isnan(values)
+        last_known = np.maximum.accumulate(np.where(known, np.arange(len(values))[:, None], -1), axis=0)
+        filled = np.where(last_known >= 0, values[np.maximum(last_known, 0), np.arange(len(keys))], fill)
+        return cls([day for day, _ in dated_values], keys, filled)
+
+    def index_as_of(self, day):
+        """Index of the last snapshot on or before `day`, or None if there is none"""
+        position = int(np.searchsorted(self._ordinals, day.toordinal(), side='right')) - 1
+        return position if position >= 0 else None
+
+    def value(self, key, day):
+        """Value for one key as of a date (None before the first snapshot or for an unknown key)"""
+        row = self.index_as_of(day)
+        column = self._key_index.get(key)
+        if row is None or column is None:
+            return None
+        return _plain(self.values[row, column])
+
+    def change(self, key, start, end):
+        """How much a key's value changed between the as-of states of two dates"""
+        column = self._key_index.get(key)
+        end_row = self.index_as_of(end)
+        if column is None or end_row is None:
+            return None
+        start_row = self.index_as_of(start)
+        start_value = self.values[start_row, column] if start_row is not None else 0
+        return _plain(self.values[end_row, column] - start_value)
+
+    def snapshot(self, day):
+        """{key: value} for every key as of a date"""
+        row = self.index_as_of(day)
+        if row is None:
+            return {}
+        return {key: _plain(value) for key, value in zip(self.keys, self.values[row])}
+
+    def series(self, key, start=None, end=None):
+        """[(date, value)] for one key over the snapshot dates in [start, end]"""
+        column = self._key_index.get(key)
+        if column is None:
+            return []
+        first, last = self._window(start, end)
+        return [(self.dates[row], _plain(self.values[row, column])) for row in range(first, last)]
+
+    def _window(self, start=None, end=None):
+        first = 0 if start is None else int(np.searchsorted(self._ordinals, start.toordinal(), side='left'))
+        last = len(self.dates) if end is None else int(np.searchsorted(self._ordinals, end.toordinal(), side='right'))
+        return first, last
+
+
+def _plain(value):
+    """NumPy number to int/float/None for JSON output"""
+    if np.isnan(value):
+        return None
+    return int(value) if float(value).is_integer() else float(value)
+
+
+class StandingsHistory:
+    """Team points and ranks, and player fantasy points, on every snapshot date"""
+
+    def __init__(self, standings_snapshots, stats_snapshots=()):
+        self.points = SnapshotSeries.from_snapshots(
+            [(day, {entry["Team"]: entry["Total Points"] for entry in rows}) for day, rows in standings_snapshots])
+        # Ranks are not forward-filled: a team absent from a snapshot has no rank that day
+        self.ranks = SnapshotSeries.from_snapshots(
+            [(day, {entry["Team"]: entry["Rank"] for entry in rows}) for day, rows in standings_snapshots],
+            forward_fill=False)
+        self.player_points = SnapshotSeries.from_snapshots(
+            [(day, _player_points(rows)) for day, rows in stats_snapshots])
+
+    @property
+    def dates(self):
+        return self.points.dates
+
+    def standings_as_of(self, day):
+        """[(rank, team, points)] for the last snapshot on or before `day`, best rank first"""
+        ranks = {team: rank for team, rank in self.ranks.snapshot(day).items() if rank is not None}
+        points = self.points.snapshot(day)
+        return sorted((rank, team, points[team]) for team, rank in ranks.items())
+
+    def points_gained(self, team, start, end):
+        """Points a team gained between the standings of two dates"""
+        return self.points.change(team, start, end)
+
+    def rank_over_time(self, team, start=None, end=None):
+        """[(date, rank)] for one team"""
+        return self.ranks.series(team, start, end)
+
+    def player_points_gained(self, player_id, start, end):
+        """Fantasy points a player earned between two dates"""
+        return self.player_points.change(str(player_id), start, end)
+
+    def chart_series(self, start=None, end=None):
+        """Chart.js line chart data: one points dataset per team plus the matching ranks"""
+        first, last = self.points._window(start, end)
+        return {
+            "labels": [day.strftime('%Y-%m-%d') for day in self.dates[first:last]],
+            "datasets": [
+                {
+                    "label": team,
+                    "data": [_plain(value) for value in self.points.values[first:last, column]],
+                    "ranks": [_plain(value) for value in self.ranks.values[first:last, column]],
+                }
+                for column, team in enumerate(self.points.keys)
+            ],
+        }
+
+
+def _player_points(rows):
+    """{Player ID: fantasy points} for one updatedstats snapshot"""
+    _, columns = load_player_columns(rows)
+    return dict(zip((str(player_id) for player_id in columns["player"]),
+                    score_player_columns(columns).tolist()))
+
+
+def load_standings_history(data_dir='data', history_dir=HISTORY_DIR, include_players=True):
+    """Build a StandingsHistory from the history logs and/or the daily files"""
+    standings = load_snapshot_history('standings', data_dir, history_dir)
+    stats = load_snapshot_history('updatedstats', data_dir, history_dir) if include_players else []
+    return StandingsHistory(standings, stats)
+
+
+def write_chart_series(history, path=SERIES_FILE):
+    """Write the league page's standings chart data"""
+    with open(path, 'w') as f:
+        json.dump(history.chart_series(), f, separators=(',', ':'))
+    logger.info(f"Wrote standings series for {len(history.dates)} dates to {path}")
+    return path
+
+
+def _parse_date(value):
+    return datetime.strptime(value, '%Y%m%d').date()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Query standings and player points over time")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--history-dir", default=HISTORY_DIR)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    as_of_parser = subparsers.add_parser("as-of", help="Standings as of a date")
+    as_of_parser.add_argument("date", type=_parse_date, help="YYYYMMDD")
+
+    gained_parser = subparsers.add_parser("gained", help="Points a team gained between two dates")
+    gained_parser.add_argument("team")
+    gained_parser.add_argument("start", type=_parse_date, help="YYYYMMDD")
+    gained_parser.add_argument("end", type=_parse_date, help="YYYYMMDD")
+
+    rank_parser = subparsers.add_parser("ranks", help="A team's rank on every date")
+    rank_parser.add_argument("team")
+
+    series_parser = subparsers.add_parser("series", help="Write the chart data for the league page")
+    series_parser.add_argument("--out", default=SERIES_FILE)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    history = load_standings_history(args.data_dir, args.history_dir, include_players=False)
+    if args.command == "as-of":
+        for rank, team, points in history.standings_as_of(args.date):
+            print(f"{rank:>3}  {team:<30} {points}")
+    elif args.command == "gained":
+        print(history.points_gained(args.team, args.start, args.end))
+    elif args.command == "ranks":
+        for day, rank in history.rank_over_time(args.team):
+            print(f"{day:%Y-%m-%d}  {rank}")
+    else:
+        write_chart_series(history, args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import os
+import json
+import logging
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from nhl_api import DEFAULT_WORKERS, DEFAULT_TIMEOUT, create_session, fetch_landing
+from landing_cache import REPO_ROOT, trim_landing
+from checkpoint import DEFAULT_MAX_AGE
+
+logger = logging.getLogger(__name__)
+
+# Landing data fetched earlier in the same pipeline run (e.g. by update_playerlist.py)
+# is handed to later stages (fetch_stats.py) through this file.
+DEFAULT_RUN_FILE = os.path.join(REPO_ROOT, '.cache', 'nhl', 'run-landings.json')
+# Environment variable naming the current pipeline run; the workflows set it to the GitHub run ID
+RUN_ID_ENV = 'PIPELINE_RUN_ID'
+
+
+class PlayerStatsProvider:
+    """
+    Per-run source of player landing data shared by every stage.
+
+    Each NHL player ID is requested at most once per run: concurrent callers asking
+    for the same player wait on the single in-flight request, and later callers get
+    the stored result. Results can be persisted for the next stage of the same run.
+    """
+
+    def __init__(self, cache=None, workers=DEFAULT_WORKERS, timeout=DEFAULT_TIMEOUT, run_id=None, journal=None):
+        self.cache = cache
+        # Optional CheckpointJournal that every successful fetch is recorded in
+        self.journal = journal
+        self.workers = max(1, int(workers))
+        self.timeout = timeout
+        self.run_id = run_id if run_id is not None else os.environ.get(RUN_ID_ENV)
+        self.session = create_session(self.workers)
+        self.requests_made = 0
+        self.reused = 0
+        self.seeded = 0
+        self._results = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def get(self, player_id):
+        """Return the trimmed landing payload for a player (None if it could not be fetched)"""
+        key = str(player_id)
+        with self._lock:
+            if key in self._results:
+                self.reused += 1
+                return self._results[key]
+            event = self._in_flight.get(key)
+            is_owner = event is None
+            if is_owner:
+                event = threading.Event()
+                self._in_flight[key] = event
+
+        if not is_owner:
+            event.wait()
+            with self._lock:
+                self.reused += 1
+                return self._results.get(key)
+
+        data = None
+        try:
+            data = fetch_landing(key, self.session, self.timeout, self.cache)
+            if data is not None:
+                data = trim_landing(data)
+                if self.journal is not None:
+                    self.journal.record(key, data)
+        finally:
+            with self._lock:
+                self.requests_made += 1
+                self._results[key] = data
+                del self._in_flight[key]
+            event.set()
+        return data
+
+    def prefetch(self, player_ids):
+        """Fetch every not-yet-known player concurrently"""
+        unique_ids = list(dict.fromkeys(str(pid) for pid in player_ids))
+        with self._lock:
+            missing = [pid for pid in unique_ids if pid not in self._results]
+            self.reused += len(unique_ids) - len(missing)
+        if not missing:
+            return
+        if self.workers == 1 or len(missing) == 1:
+            for player_id in missing:
+                self.get(player_id)
+            return
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            list(executor.map(self.get, missing))
+
+    def get_many(self, player_ids):
+        """Return landing payloads aligned with player_ids, fetching any that are missing"""
+        player_ids = [str(pid) for pid in player_ids]
+        self.prefetch(player_ids)
+        with self._lock:
+            return [self._results.get(player_id) for player_id in player_ids]
+
+    def missing(self, player_ids):
+        """The player IDs that have not been fetched or seeded yet"""
+        with self._lock:
+            return [str(pid) for pid in player_ids if str(pid) not in self._results]
+
+    def seed(self, landings_by_id):
+        """Use payloads obtained elsewhere (e.g. club stats) for players not fetched yet"""
+        with self._lock:
+            for player_id, data in landings_by_id.items():
+                if str(player_id) not in self._results:
+                    self._results[str(player_id)] = data
+                    self.seeded += 1
+
+    def resume(self, max_age=DEFAULT_MAX_AGE):
+        """Reuse the fetches an interrupted earlier run recorded in the journal within max_age"""
+        if self.journal is None:
+            return 0
+        completed = self.journal.load(max_age)
+        with self._lock:
+            for player_id, data in completed.items():
+                self._results.setdefault(player_id, data)
+        logger.info(f"Resuming: {len(completed)} players already fetched in the last {max_age}")
+        return len(completed)
+
+    def load_run(self, path=DEFAULT_RUN_FILE):
+        """Reuse results an earlier stage of the same run saved. Does nothing without a run ID."""
+        if not self.run_id:
+            return 0
+        try:
+            with open(path, 'r') as f:
+                saved = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return 0
+        if saved.get('runId') != self.run_id:
+            return 0
+        with self._lock:
+            for player_id, data in saved.get('players', {}).items():
+                self._results.setdefault(player_id, data)
+        loaded = len(saved.get('players', {}))
+        logger.info(f"Reusing landing data for {loaded} players fetched earlier in run {self.run_id}")
+        return loaded
+
+    def save_run(self, path=DEFAULT_RUN_FILE):
+        """Persist successful results for later stages of this run. Does nothing without a run ID."""
+        if not self.run_id:
+            return
+        with self._lock:
+            players = {pid: data for pid, data in self._results.items() if data is not None}
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'runId': self.run_id, 'players': players}, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    def close(self):
+        self.session.close()
+        if self.journal is not None:
+            self.journal.close()
+
+    def log_summary(self):
+        logger.info(f"Stats provider: {self.requests_made} players loaded from the API or cache, "
+                    f"{self.seeded} from club stats, {self.reused} repeat lookups served from this run")
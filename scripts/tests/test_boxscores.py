@@ -0,0 +1,145 @@
+import os
+import sys
+import tempfile
+import unittest
+from datetime import date
+from unittest.mock import patch
+
+SCRIPTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+import boxscores
+from boxscores import GORDIE_HOWE_FIELD, BoxscoreLedger, ingest_finished_games, ledger_start_date
+from calculate_standings import calculate_standings_from_players
+from fetch_stats import build_updated_stats
+from stats_provider import PlayerStatsProvider
+
+
+def skater(player_id, goals=0, assists=0, pim=0):
+    return {"playerId": player_id, "goals": goals, "assists": assists, "pim": pim}
+
+
+def boxscore(game_id, home_skaters, state="OFF"):
+    return {
+        "id": game_id, "gameState": state, "gameDate": "2025-05-01",
+        "homeTeam": {"abbrev": "EDM"}, "awayTeam": {"abbrev": "LAK"},
+        "playerByGameStats": {
+            "homeTeam": {"forwards": home_skaters, "defense": [],
+                         "goalies": [{"playerId": 8479973, "toi": "60:00", "goalsAgainst": 0, "decision": "W"}]},
+            "awayTeam": {"forwards": [], "defense": [],
+                         "goalies": [{"playerId": 8476883, "toi": "60:00", "goalsAgainst": 3, "decision": "L"}]},
+        },
+    }
+
+
+FIGHT = {"typeDescKey": "penalty", "details": {"descKey": "fighting", "committedByPlayerId": 8477934}}
+ROUGHING = {"typeDescKey": "penalty", "details": {"descKey": "roughing", "committedByPlayerId": 8478402}}
+
+BOXSCORES = {
+    2024030121: boxscore(2024030121, [skater(8477934, 1, 1, 5), skater(8478402, 1, 2, 2)]),
+    2024030122: boxscore(2024030122, [skater(8477934, 0, 1, 0), skater(8478402, 2, 0, 0)]),
+    2024030123: boxscore(2024030123, [skater(8478402, 1, 0, 0)], state="LIVE"),
+}
+SCHEDULE = [
+    {"id": 2024030121, "gameType": 3, "gameDate": "2025-04-21"},
+    {"id": 2024030122, "gameType": 3, "gameDate": "2025-04-23"},
+    {"id": 2024030123, "gameType": 3, "gameDate": "2025-04-25"},
+    {"id": 2024020999, "gameType": 2, "gameDate": "2025-04-15"},
+]
+
+
+class TestBoxscoreLedger(unittest.TestCase):
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.path = os.path.join(tmp_dir.name, 'ledger.jsonl')
+        self.requests = []
+
+        def fetch_boxscore(game_id, session=None, timeout=None):
+            self.requests.append(("boxscore", game_id))
+            return BOXSCORES[game_id]
+
+        def fetch_play_by_play(game_id, session=None, timeout=None):
+            self.requests.append(("play-by-play", game_id))
+            return {"plays": [FIGHT, ROUGHING]}
+
+        for name, fake in (("fetch_boxscore", fetch_boxscore), ("fetch_play_by_play", fetch_play_by_play),
+                           ("fetch_finished_games", lambda *args: SCHEDULE)):
+            patcher = patch.object(boxscores, name, side_effect=fake)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def ingest(self):
+        ledger = BoxscoreLedger(self.path)
+        return ledger, ingest_finished_games(ledger, date(2025, 4, 1), date(2025, 4, 25))
+
+    def test_finished_games_are_ingested_once(self):
+        ledger, added = self.ingest()
+        self.assertEqual(added, 2)
+        # Play-by-play only for the game with a goal, assist and five penalty minutes on one line
+        self.assertEqual(self.requests, [("boxscore", 2024030121), ("play-by-play", 2024030121),
+                                         ("boxscore", 2024030122), ("boxscore", 2024030123)])
+        self.assertEqual(ledger.games["2024030121"]["gordieHowe"], ["8477934"])
+
+        self.requests.clear()
+        reloaded, added = self.ingest()
+        self.assertEqual(added, 0)
+        # The game from two days ago is checked for corrections; the older one is not fetched again
+        self.assertEqual(self.requests, [("boxscore", 2024030122), ("boxscore", 2024030123)])
+        self.assertEqual(len(reloaded), 2)
+        with open(self.path, 'r') as f:
+            self.assertEqual(len(f.readlines()), 2)
+
+    def test_games_are_ingested_once_official(self):
+        with patch.dict(BOXSCORES, {2024030122: dict(BOXSCORES[2024030122], gameState="FINAL")}):
+            ledger, added = self.ingest()
+        self.assertEqual((added, "2024030122" in ledger), (1, False))
+        ledger, added = self.ingest()
+        self.assertEqual((added, "2024030122" in ledger), (1, True))
+
+    def test_corrected_boxscore_replaces_the_stored_line(self):
+        self.ingest()
+        # The NHL credits Hyman with a second assist after the game
+        corrected = boxscore(2024030122, [skater(8477934, 0, 2, 0), skater(8478402, 2, 0, 0)])
+        with patch.dict(BOXSCORES, {2024030122: corrected}):
+            ledger, added = self.ingest()
+        self.assertEqual(added, 1)
+        self.assertEqual(ledger.games["2024030122"]["lines"]["8477934"]["Assists"], 2)
+
+        reloaded = BoxscoreLedger(self.path)
+        self.assertEqual(len(reloaded), 2)
+        self.assertEqual(reloaded.totals()["8477934"]["Assists"], 3)
+
+    def test_totals_come_from_the_game_lines(self):
+        ledger, _ = self.ingest()
+        totals = ledger.totals("20242025")
+        self.assertEqual({field: totals["8478402"][field] for field in ("Games Played", "Goals", "Assists")},
+                         {"Games Played": 2, "Goals": 3, "Assists": 2})
+        self.assertEqual(totals["8478402"][GORDIE_HOWE_FIELD], 0)
+        self.assertEqual(totals["8477934"][GORDIE_HOWE_FIELD], 1)
+        self.assertEqual((totals["8479973"]["Wins"], totals["8479973"]["Shutouts"]), (2, 2))
+        self.assertEqual(ledger.totals("20252026"), {})
+
+    def test_start_date(self):
+        ledger, _ = self.ingest()
+        self.assertEqual(ledger_start_date(ledger, date(2025, 5, 2)), date(2025, 4, 21))
+        self.assertEqual(ledger_start_date(BoxscoreLedger(self.path + '.new'), date(2025, 5, 2)), date(2025, 4, 1))
+        self.assertEqual(ledger_start_date(ledger, date(2026, 5, 2)), date(2026, 4, 1))
+
+    def test_updated_stats_from_the_ledger_score_the_bonus(self):
+        ledger, _ = self.ingest()
+        players = {"8477934": {"Player": "Zach Hyman", "Team": "A", "NHL Team": "EDM", "Position": "LW"},
+                   "8478398": {"Player": "Kyle Connor", "Team": "A", "NHL Team": "WPG", "Position": "LW"}}
+        provider = PlayerStatsProvider()
+        rows = build_updated_stats(players, provider, ledger_totals=ledger.totals())
+        self.assertEqual(provider.requests_made, 0)
+        self.assertEqual((rows[0]["Goals"], rows[0]["Assists"], rows[0][GORDIE_HOWE_FIELD]), (1, 2, 1))
+        self.assertEqual((rows[1]["Goals"], rows[1][GORDIE_HOWE_FIELD]), (0, 0))
+        (_, team), = calculate_standings_from_players(rows)
+        self.assertEqual(team["Total Points"], 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import sys
+import gzip
+import json
+import tempfile
+import unittest
+from datetime import datetime
+
+SCRIPTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+from bundles import load_latest_outputs, minified_json, write_bundles
+
+ROWS = [{"Player": "Connor McDavid", "Player ID": "8478402", "Team": "A", "Goals": 6, "Assists": 20}]
+STANDINGS = [{"Team": "A", "Points": 26}]
+
+
+class TestBundles(unittest.TestCase):
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.data_dir = tmp_dir.name
+        self.manifest_path = os.path.join(self.data_dir, 'manifest.json')
+        self.bundles_dir = os.path.join(self.data_dir, 'bundles')
+
+    def write(self, rows, league_results=None, day=17):
+        return write_bundles(rows, STANDINGS, league_results, datetime(2025, 6, day),
+                             self.manifest_path, self.bundles_dir)
+
+    def read(self, entry, suffix=''):
+        with open(os.path.join(self.data_dir, entry["path"] + suffix), 'rb') as f:
+            return f.read()
+
+    def test_manifest_points_at_minified_bundles(self):
+        manifest = self.write(ROWS, {"league1": (ROWS, STANDINGS)})
+        with open(self.manifest_path, 'r') as f:
+            self.assertEqual(json.load(f), manifest)
+        self.assertEqual(manifest["date"], "20250617")
+
+        entry = manifest["leagues"]["league1"]
+        self.assertTrue(entry["path"].startswith("bundles/league-league1."))
+        payload = self.read(entry)
+        self.assertEqual(payload, minified_json({"date": "20250617", "stats": ROWS, "standings": STANDINGS}))
+        self.assertEqual(entry["bytes"], len(payload))
+        self.assertEqual(gzip.decompress(self.read(entry, '.gz')), payload)
+        self.assertEqual(json.loads(self.read(manifest["default"]))["stats"], ROWS)
+
+    def test_unchanged_data_keeps_its_name(self):
+        first = self.write(ROWS)
+        self.assertEqual(self.write(ROWS)["default"], first["default"])
+
+    def test_bundles_of_the_previous_manifest_are_kept_one_run(self):
+        first = self.write(ROWS)
+        second = self.write(ROWS + [{"Player ID": "1", "Goals": 1}])
+        self.assertNotEqual(first["default"]["path"], second["default"]["path"])
+        self.assertTrue(os.path.exists(os.path.join(self.data_dir, first["default"]["path"])))
+        self.write([])
+        self.assertFalse(os.path.exists(os.path.join(self.data_dir, first["default"]["path"])))
+        self.assertFalse(os.path.exists(os.path.join(self.data_dir, first["default"]["path"] + '.gz')))
+
+    def test_latest_outputs_are_read_from_the_snapshots(self):
+        league_dir = os.path.join(self.data_dir, 'leagues', 'league1')
+        os.makedirs(league_dir)
+        for directory in (self.data_dir, league_dir):
+            for name, data in (("updatedstats-20250616.json", []), ("updatedstats-20250617.json", ROWS),
+                               ("standings-20250617.json", STANDINGS)):
+                with open(os.path.join(directory, name), 'w') as f:
+                    json.dump(data, f)
+
+        run_date, rows, standings, league_results = load_latest_outputs(
+            self.data_dir, os.path.join(self.data_dir, 'leagues'))
+        self.assertEqual((run_date, rows, standings), (datetime(2025, 6, 17), ROWS, STANDINGS))
+        self.assertEqual(league_results, {"league1": (ROWS, STANDINGS)})
+
+
+if __name__ == '__main__':
+    unittest.main()
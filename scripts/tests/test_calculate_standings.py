@@ -1,6 +1,8 @@
 import unittest
 import json
 import os
+import tempfile
+from datetime import datetime
 from unittest.mock import patch, mock_open
 
 # Adjust sys.path to allow direct import of the script under test
@@ -10,7 +12,8 @@ if SCRIPTS_DIR not in sys.path:
     sys.path.insert(0, SCRIPTS_DIR)
 
 # Assuming calculate_standings is the main logic function in calculate_standings.py
-from calculate_standings import calculate_standings
+import calculate_standings as calculate_standings_module
+from calculate_standings import calculate_standings, calculate_standings_from_players, calculate_league_standings, format_standings, write_standings
 
 class TestCalculateStandings(unittest.TestCase):
 
@@ -183,5 +186,89 @@ class TestCalculateStandings(unittest.TestCase):
         self.assertEqual(standings[0][1]["Skaters"]["Count"], 1)
         self.assertEqual(standings[0][1]["Goalies"]["Count"], 1)
 
+class TestFlatStatsRows(unittest.TestCase):
+    """Rows in the updatedstats-*.json format written by fetch_stats.py"""
+
+    def _row(self, player_id, team, position="C", **stats):
+        row = {"Player": f"Player {player_id}", "Player ID": player_id, "NHL Team": "EDM",
+               "Position": position, "Team": team, "playoffRoundDrafted": 1,
+               "Points Before Acquiring": 0, "preAcqRound": 0,
+               "Goals": 0, "Assists": 0, "Wins": 0, "Shutouts": 0}
+        row.update(stats)
+        return row
+
+    def test_points_before_acquiring_always_subtracted(self):
+        """The flat rows already carry the pre-acquisition points for the acquisition round."""
+        players = [self._row("1", "Team A", Goals=4, Assists=4, **{"Points Before Acquiring": 7})]
+        standings = calculate_standings_from_players(players)
+        self.assertEqual(standings[0][1]["Total Points"], 1)
+        self.assertEqual(standings[0][1]["Skaters"]["Points"], 1)
+
+    def test_formatted_output_and_tie_order(self):
+        """Ties keep the order teams first appear in and formatted values are plain ints."""
+        players = [
+            self._row("1", "Team A", Goals=2),
+            self._row("2", "Team B", position="G", Wins=1, Shutouts=1),
+            self._row("3", "Team C", Goals=1, Assists=1),
+            self._row("4", "Team B", Assists=1),
+        ]
+        formatted = format_standings(calculate_standings_from_players(players))
+        self.assertEqual([entry["Team"] for entry in formatted], ["Team B", "Team A", "Team C"])
+        self.assertEqual(formatted[0], {"Rank": 1, "Team": "Team B", "Total Points": 4, "Players": 2,
+                                        "Goals": 0, "Assists": 1, "Wins": 1, "Shutouts": 1})
+        self.assertEqual(json.loads(json.dumps(formatted)), formatted)
+
+    def test_goalie_without_position(self):
+        """Rows without a position are counted as goalies when they only have goalie stats."""
+        players = [self._row("1", "Team A", position=None, Wins=2), self._row("2", "Team A", position=None, Goals=1)]
+        stats = calculate_standings_from_players(players)[0][1]
+        self.assertEqual(stats["Goalies"], {"Points": 4, "Count": 1})
+        self.assertEqual(stats["Skaters"], {"Points": 1, "Count": 1})
+
+    def test_league_standings_match_single_league_calls(self):
+        """Scoring several leagues in one pass gives the same result as scoring each league."""
+        rows_by_league = {
+            "league1": [self._row("1", "Team A", Goals=3), self._row("2", "Team B", position="G", Wins=2)],
+            "league2": [self._row("1", "Team A", Goals=3), self._row("3", "Team Z", Assists=1)],
+            "empty": [],
+        }
+        results = calculate_league_standings(rows_by_league)
+        for league_id, rows in rows_by_league.items():
+            self.assertEqual(results[league_id], calculate_standings_from_players(rows))
+
+
+class TestWriteStandings(unittest.TestCase):
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        cwd = os.getcwd()
+        os.chdir(tmp_dir.name)
+        self.addCleanup(os.chdir, cwd)
+        os.makedirs('data')
+        with open('data/latest-standings.json', 'w') as f:
+            json.dump([{"Team": "Alpha", "Total Points": 10}], f)
+
+    def test_failed_write_keeps_the_previous_latest_standings(self):
+        real_dump = json.dump
+
+        # The dated file is written, then the disk fills up halfway through latest-standings.json
+        def dump_then_fail(data, file, **kwargs):
+            dump_then_fail.calls += 1
+            if dump_then_fail.calls == 2:
+                file.write('[{"Team": "Al')
+                raise OSError("No space left on device")
+            real_dump(data, file, **kwargs)
+        dump_then_fail.calls = 0
+
+        with patch.object(calculate_standings_module.json, 'dump', side_effect=dump_then_fail), \
+                self.assertRaises(OSError):
+            write_standings([{"Team": "Alpha", "Total Points": 12}], datetime(2025, 5, 20))
+
+        with open('data/latest-standings.json', 'r') as f:
+            self.assertEqual(json.load(f), [{"Team": "Alpha", "Total Points": 10}])
+        self.assertEqual(sorted(os.listdir('data')), ['latest-standings.json', 'standings-20250520.json'])
+
+
 if __name__ == '__main__':
     unittest.main()
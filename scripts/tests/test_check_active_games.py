@@ -0,0 +1,103 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from datetime import date
+from unittest.mock import patch
+
+SCRIPTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+import check_active_games
+import fingerprints
+from check_active_games import build_team_index, pipeline_gate, set_output
+from fingerprints import FingerprintStore
+
+DRAFTED = {
+    "8478402": {"Player": "Connor McDavid", "NHL Team": "EDM"},
+    "8477934": {"Player": "Leon Draisaitl", "NHL Team": "EDM"},
+    "8478398": {"Player": "Kyle Connor", "NHL Team": "WPG"},
+    "8470000": {"Player": "Retired Player", "NHL Team": "N/A"},
+}
+
+
+def game(game_id, home, away):
+    return {"id": game_id, "homeTeam": {"abbrev": home}, "awayTeam": {"abbrev": away}}
+
+
+class TestPipelineGate(unittest.TestCase):
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.data_dir = tmp_dir.name
+        self.drafted_file = os.path.join(self.data_dir, 'drafted.json')
+        with open(self.drafted_file, 'w') as f:
+            json.dump(DRAFTED, f)
+        with open(os.path.join(self.data_dir, 'updatedstats-20250520.json'), 'w') as f:
+            json.dump([], f)
+        self.calls = []
+
+    def gate(self, games):
+        def fetch_finished_games(start_date, end_date, session=None):
+            self.calls.append((start_date, end_date))
+            return games
+        with patch.object(check_active_games, 'fetch_finished_games', side_effect=fetch_finished_games):
+            return pipeline_gate(date(2025, 5, 22), self.data_dir, self.drafted_file)
+
+    def test_team_index_skips_players_without_a_team(self):
+        self.assertEqual(build_team_index(DRAFTED), {"EDM": ["8478402", "8477934"], "WPG": ["8478398"]})
+
+    def test_runs_when_an_owned_team_played(self):
+        result = self.gate([game(2024030311, "EDM", "DAL"), game(2024030221, "FLA", "TOR")])
+        self.assertTrue(result["run"])
+        self.assertEqual(self.calls, [(date(2025, 5, 20), date(2025, 5, 22))])
+        self.assertEqual((result["games"], result["teams"], result["players"]), ([2024030311], ["EDM"], 2))
+
+    def test_skips_when_only_unowned_teams_played(self):
+        result = self.gate([game(2024030221, "FLA", "TOR")])
+        self.assertFalse(result["run"])
+        self.assertEqual(result["games"], [])
+
+    def test_runs_without_a_snapshot(self):
+        os.remove(os.path.join(self.data_dir, 'updatedstats-20250520.json'))
+        self.assertTrue(self.gate([])["run"])
+        self.assertEqual(self.calls, [])
+
+    def test_a_fingerprint_hit_moves_the_start_forward(self):
+        fingerprints_file = os.path.join(self.data_dir, 'fingerprints.json')
+        with patch.object(fingerprints, 'date') as today:
+            today.today.return_value = date(2025, 5, 20)
+            store = FingerprintStore(fingerprints_file)
+            store.check('updated_stats', 'abc')
+            store.record('updated_stats', [os.path.join(self.data_dir, 'updatedstats-20250520.json')])
+            store.save()
+            # The next day's run has the same inputs, so it writes no new snapshot
+            today.today.return_value = date(2025, 5, 21)
+            store = FingerprintStore(fingerprints_file)
+            self.assertTrue(store.check('updated_stats', 'abc'))
+            store.save()
+
+        result = self.gate([])
+        self.assertEqual(self.calls, [(date(2025, 5, 21), date(2025, 5, 22))])
+        self.assertEqual(result["since"], "2025-05-21")
+
+    def test_unreadable_fingerprint_file_falls_back_to_the_snapshot(self):
+        with open(os.path.join(self.data_dir, 'fingerprints.json'), 'w') as f:
+            f.write('{')
+        self.gate([])
+        self.assertEqual(self.calls, [(date(2025, 5, 20), date(2025, 5, 22))])
+
+    def test_step_outputs_go_to_the_actions_file(self):
+        output_file = os.path.join(self.data_dir, 'github_output')
+        with patch.dict(os.environ, {'GITHUB_OUTPUT': output_file}):
+            set_output('should_run', 'false')
+            set_output('reason', 'nothing finished')
+        with open(output_file, 'r') as f:
+            self.assertEqual(f.read(), "should_run=false\nreason=nothing finished\n")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+SCRIPTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+import nhl_api
+import stats_provider
+from checkpoint import CheckpointJournal
+from stats_provider import PlayerStatsProvider
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = datetime(2025, 5, 20, 12, 0, tzinfo=timezone.utc)
+
+    def __call__(self):
+        return self.now
+
+
+class TestCheckpointJournal(unittest.TestCase):
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.path = os.path.join(tmp_dir.name, 'checkpoints', 'job.jsonl')
+        self.clock = FakeClock()
+
+    def test_recorded_fetches_survive_a_new_journal(self):
+        journal = CheckpointJournal(self.path, self.clock)
+        journal.record("1", {"goals": 1})
+        journal.record(2, {"goals": 2})
+        journal.record("1", {"goals": 3})
+        journal.close()
+        self.assertEqual(CheckpointJournal(self.path, self.clock).load(),
+                         {"1": {"goals": 3}, "2": {"goals": 2}})
+
+    def test_old_entries_and_partial_lines_are_ignored(self):
+        journal = CheckpointJournal(self.path, self.clock)
+        journal.record("1", {"goals": 1})
+        self.clock.now += timedelta(hours=13)
+        journal.record("2", {"goals": 2})
+        journal.close()
+        with open(self.path, 'a') as f:
+            f.write('{"id":"3","at":"2025-05-21')
+        self.assertEqual(journal.load(timedelta(hours=12)), {"2": {"goals": 2}})
+        self.assertEqual(len(journal.load(timedelta(days=2))), 2)
+
+    def test_clear_removes_the_journal(self):
+        journal = CheckpointJournal(self.path, self.clock)
+        self.assertEqual(journal.load(), {})
+        journal.record("1", None)
+        journal.clear()
+        self.assertFalse(os.path.exists(self.path))
+        journal.clear()
+
+
+class TestResume(unittest.TestCase):
+
+    def setUp(self):
+        self.calls = []
+        self.calls_lock = threading.Lock()
+
+        def fake_fetch_landing(player_id, session, timeout, cache):
+            with self.calls_lock:
+                self.calls.append(player_id)
+            return {"featuredStats": {}, "position": "C", "currentTeamAbbrev": "EDM"}
+
+        patcher = patch.object(stats_provider, 'fetch_landing', side_effect=fake_fetch_landing)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.path = os.path.join(tmp_dir.name, 'fetch_stats.jsonl')
+
+    def test_resumed_run_skips_finished_players(self):
+        interrupted = PlayerStatsProvider(workers=2, journal=CheckpointJournal(self.path))
+        interrupted.get_many(["1", "2"])
+        interrupted.close()
+
+        resumed = PlayerStatsProvider(workers=2, journal=CheckpointJournal(self.path))
+        self.assertEqual(resumed.resume(), 2)
+        results = resumed.get_many(["1", "2", "3"])
+        resumed.close()
+        self.assertEqual(sorted(self.calls), ["1", "2", "3"])
+        self.assertEqual(results[0]["currentTeamAbbrev"], "EDM")
+        self.assertEqual(sorted(CheckpointJournal(self.path).load()), ["1", "2", "3"])
+
+    def test_fetch_landings_reports_each_result(self):
+        finished = {}
+        with patch.object(nhl_api, 'fetch_landing', side_effect=lambda player_id, *args: {"id": player_id}):
+            nhl_api.fetch_landings(["1", "2", "3"], workers=2, session=object(),
+                                   on_result=finished.__setitem__)
+        self.assertEqual(finished, {"1": {"id": "1"}, "2": {"id": "2"}, "3": {"id": "3"}})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import os
+import sys
+import json
+import threading
+import unittest
+from datetime import date
+from unittest.mock import MagicMock, patch
+
+SCRIPTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+import club_stats
+from club_stats import current_season, fetch_club_landings, landings_from_club_stats
+from fetch_stats import build_updated_stats, parse_player_stats
+from stats_provider import PlayerStatsProvider
+from update_playoff_playerlist import parse_playoff_stats
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), 'r') as f:
+        return json.load(f)
+
+
+class FixtureSession:
+    """Answers NHL API requests from recorded responses in tests/fixtures; anything else is a 404"""
+
+    def __init__(self):
+        self.requested_paths = []
+        self._lock = threading.Lock()
+
+    def get(self, url, timeout=None, headers=None):
+        path = url.split('/v1/', 1)[1]
+        with self._lock:
+            self.requested_paths.append(path)
+        parts = path.split('/')
+        if parts[0] == 'club-stats':
+            name = f"club-stats-{parts[1]}-{parts[2]}-{parts[3]}.json"
+        else:
+            name = f"landing-{parts[1]}.json"
+        response = MagicMock()
+        response.headers = {}
+        if os.path.exists(os.path.join(FIXTURES_DIR, name)):
+            response.status_code = 200
+            response.json.return_value = load_fixture(name)
+        else:
+            response.status_code = 404
+        return response
+
+    def close(self):
+        pass
+
+
+def drafted(player_id, name, team, position):
+    return {"Player": name, "NHL Team": team, "Position": position, "Team": "Fantasy", "playoffRoundDrafted": 1}
+
+
+class TestClubStats(unittest.TestCase):
+
+    def test_current_season(self):
+        self.assertEqual(current_season(date(2025, 5, 20)), "20242025")
+        self.assertEqual(current_season(date(2025, 10, 8)), "20252026")
+
+    def test_club_stats_read_like_landing_payloads(self):
+        landings = landings_from_club_stats(load_fixture("club-stats-EDM-20242025-3.json"), "EDM")
+        self.assertEqual(len(landings), 5)
+        self.assertEqual(parse_player_stats(landings["8478402"]),
+                         {"Games Played": 17, "Goals": 6, "Assists": 20, "Wins": 0, "Shutouts": 0})
+        self.assertEqual(parse_player_stats(landings["8479973"]),
+                         {"Games Played": 14, "Goals": 0, "Assists": 0, "Wins": 6, "Shutouts": 3})
+
+        goalie = parse_playoff_stats(landings["8479973"])
+        self.assertEqual((goalie["wins"], goalie["otLosses"]), (6, 0))
+        self.assertNotIn("points", goalie)
+        skater = parse_playoff_stats(landings["8475786"])
+        self.assertEqual((skater["points"], skater["pim"]), (11, 12))
+
+    def test_failed_teams_are_skipped(self):
+        session = FixtureSession()
+        landings = fetch_club_landings({"EDM", "FLA", "N/A"}, season="20242025", session=session)
+        self.assertEqual(sorted(session.requested_paths), ["club-stats/EDM/20242025/3", "club-stats/FLA/20242025/3"])
+        self.assertIn("8478402", landings)
+
+    def test_updated_stats_use_one_request_per_team(self):
+        players = {
+            "8478402": drafted("8478402", "Connor McDavid", "EDM", "C"),
+            "8479973": drafted("8479973", "Stuart Skinner", "EDM", "G"),
+            # Not in the club listing: falls back to /landing
+            "8476454": drafted("8476454", "Ryan Nugent-Hopkins", "EDM", "C"),
+        }
+        provider = PlayerStatsProvider(workers=2)
+        provider.session = FixtureSession()
+        with patch.object(club_stats, "current_season", return_value="20242025"):
+            rows = build_updated_stats(players, provider, use_club_stats=True)
+
+        self.assertEqual(sorted(provider.session.requested_paths),
+                         ["club-stats/EDM/20242025/3", "player/8476454/landing"])
+        by_id = {row["Player ID"]: row for row in rows}
+        self.assertEqual((by_id["8478402"]["Goals"], by_id["8478402"]["Assists"]), (6, 20))
+        self.assertEqual((by_id["8479973"]["Wins"], by_id["8479973"]["Shutouts"]), (6, 3))
+        self.assertEqual((by_id["8476454"]["Goals"], by_id["8476454"]["Assists"]), (5, 13))
+        self.assertEqual(list(by_id), list(players))
+
+    def test_without_club_stats_every_player_is_fetched(self):
+        provider = PlayerStatsProvider(workers=2)
+        provider.session = FixtureSession()
+        build_updated_stats({"8476454": drafted("8476454", "Ryan Nugent-Hopkins", "EDM", "C")}, provider)
+        self.assertEqual(provider.session.requested_paths, ["player/8476454/landing"])
+
+
+if __name__ == '__main__':
+    unittest.main()
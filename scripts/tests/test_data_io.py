@@ -0,0 +1,81 @@
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+
+SCRIPTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+from data_io import (JsonArrayWriter, JsonlWriter, atomic_open, batched, iter_jsonl, iter_records,
+                     jsonl_path, jsonl_to_json)
+
+PLAYERS = [
+    {"id": 8478402, "fullName": "Connor McDavid", "teamAbbreviation": "EDM", "goals": 26, "nested": {"a": [1, 2]}},
+    {"id": 8479973, "fullName": "Stuart Skinner", "teamAbbreviation": "EDM", "wins": 6, "savePercentage": 0.895},
+]
+
+
+class TestDataIo(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def path(self, name):
+        return os.path.join(self.tmp, name)
+
+    def test_array_writer_matches_json_dump(self):
+        for indent in (2, 4):
+            for records in (PLAYERS, PLAYERS[:1], []):
+                with JsonArrayWriter(self.path("out.json"), indent=indent) as writer:
+                    for record in records:
+                        writer.write(record)
+                with open(self.path("out.json")) as f:
+                    self.assertEqual(f.read(), json.dumps(records, indent=indent))
+
+    def test_jsonl_round_trip_and_conversion(self):
+        with JsonlWriter(self.path("players.jsonl")) as writer:
+            for record in PLAYERS:
+                writer.write(record)
+        self.assertEqual(writer.count, 2)
+        with open(self.path("players.jsonl")) as f:
+            self.assertEqual(len(f.read().splitlines()), 2)
+
+        records = iter_jsonl(self.path("players.jsonl"))
+        self.assertEqual(next(records), PLAYERS[0])
+        records.close()
+
+        self.assertEqual(jsonl_to_json(self.path("players.jsonl")), 2)
+        with open(self.path("players.json")) as f:
+            self.assertEqual(json.load(f), PLAYERS)
+        self.assertEqual(list(iter_records(self.path("players.json"))), PLAYERS)
+        self.assertEqual(jsonl_path(self.path("players.json")), self.path("players.jsonl"))
+
+    def test_failed_write_keeps_the_previous_file(self):
+        with open(self.path("out.json"), "w") as f:
+            f.write("[]")
+        with self.assertRaises(RuntimeError):
+            with JsonArrayWriter(self.path("out.json")) as writer:
+                writer.write(PLAYERS[0])
+                raise RuntimeError("fetch failed")
+        with open(self.path("out.json")) as f:
+            self.assertEqual(f.read(), "[]")
+        self.assertEqual(os.listdir(self.tmp), ["out.json"])
+
+    def test_atomic_files_are_world_readable(self):
+        with atomic_open(self.path("report.json")) as f:
+            f.write("{}")
+        self.assertEqual(os.stat(self.path("report.json")).st_mode & 0o777, 0o644)
+
+    def test_batched(self):
+        self.assertEqual(list(batched(iter(range(5)), 2)), [[0, 1], [2, 3], [4]])
+        self.assertEqual(list(batched([], 3)), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
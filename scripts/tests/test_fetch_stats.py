@@ -0,0 +1,101 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from datetime import date
+from unittest.mock import patch
+
+SCRIPTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+import nhl_api
+import requests
+from fetch_stats import load_incremental_context, select_carry_forward
+
+ENTRIES = [
+    ("8478402", {"Player": "Connor McDavid", "NHL Team": "EDM"}),
+    ("8478398", {"Player": "Kyle Connor", "NHL Team": "WPG"}),
+    ("8477934", {"Player": "Leon Draisaitl", "NHL Team": "EDM"}),
+    ("8479973", {"Player": "Stuart Skinner", "NHL Team": "FLA"}),
+]
+
+PREVIOUS = {
+    "8478402": {"Player ID": "8478402", "Goals": 5, "Assists": 17, "Wins": 0, "Shutouts": 0},
+    "8478398": {"Player ID": "8478398", "Goals": 3, "Assists": 4, "Wins": 0, "Shutouts": 0},
+    "8479973": {"Player ID": "8479973", "Goals": 0, "Assists": 0, "Wins": 4, "Shutouts": 1},
+}
+
+
+def game(day, home, away, state='OFF'):
+    return day, {"homeTeam": {"abbrev": home}, "awayTeam": {"abbrev": away}, "gameState": state}
+
+
+# One schedule week around a snapshot written on 2025-05-20 and a run on 2025-05-22
+SCHEDULE_GAMES = [
+    game('2025-05-19', 'NYR', 'CAR'),
+    game('2025-05-20', 'FLA', 'TOR'),
+    game('2025-05-21', 'EDM', 'DAL', 'FINAL'),
+    game('2025-05-22', 'VGK', 'COL', 'LIVE'),
+    game('2025-05-23', 'WPG', 'STL', 'FUT'),
+]
+
+
+def schedule_week(start, session=None, timeout=None):
+    days = {}
+    for day, scheduled in SCHEDULE_GAMES:
+        days.setdefault(day, []).append(scheduled)
+    return {"gameWeek": [{"date": day, "games": games} for day, games in sorted(days.items())]}
+
+
+class TestSelectCarryForward(unittest.TestCase):
+
+    def test_players_whose_team_played_are_refetched(self):
+        carried = select_carry_forward(ENTRIES, ({"EDM", "DAL"}, PREVIOUS))
+        self.assertEqual(set(carried), {"8478398", "8479973"})
+        self.assertEqual(carried["8479973"], {"Goals": 0, "Assists": 0, "Wins": 4, "Shutouts": 1})
+
+    def test_players_missing_from_the_snapshot_are_refetched(self):
+        # Draisaitl's team did not play either, but there is nothing to carry forward for him
+        carried = select_carry_forward(ENTRIES, (set(), PREVIOUS))
+        self.assertNotIn("8477934", carried)
+        self.assertEqual(set(carried), {"8478402", "8478398", "8479973"})
+
+    def test_nothing_is_carried_without_a_context(self):
+        self.assertEqual(select_carry_forward(ENTRIES, None), {})
+
+
+class TestLoadIncrementalContext(unittest.TestCase):
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        cwd = os.getcwd()
+        os.chdir(tmp_dir.name)
+        self.addCleanup(os.chdir, cwd)
+        os.makedirs('data')
+        with open('data/updatedstats-20250520.json', 'w') as f:
+            json.dump(list(PREVIOUS.values()), f)
+
+    def test_games_from_the_snapshot_day_to_today_count(self):
+        with patch.object(nhl_api, 'fetch_schedule', side_effect=schedule_week) as fetch_schedule:
+            teams_played, previous_players = load_incremental_context(date(2025, 5, 22))
+        fetch_schedule.assert_called_once_with(date(2025, 5, 20), None, nhl_api.DEFAULT_TIMEOUT)
+        # The snapshot day's games finished after it was written; unfinished and out-of-range games do not count
+        self.assertEqual(teams_played, {"FLA", "TOR", "EDM", "DAL"})
+        self.assertEqual(set(previous_players), set(PREVIOUS))
+
+        carried = select_carry_forward(ENTRIES, (teams_played, previous_players))
+        self.assertEqual(set(carried), {"8478398"})
+
+    def test_schedule_failure_refetches_everyone(self):
+        with patch.object(nhl_api, 'fetch_schedule', side_effect=requests.exceptions.ConnectionError):
+            self.assertIsNone(load_incremental_context(date(2025, 5, 22)))
+
+    def test_snapshot_newer_than_today_is_ignored(self):
+        self.assertIsNone(load_incremental_context(date(2025, 5, 19)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+SCRIPTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+import calculate_standings
+from fingerprints import FINGERPRINTS_FILE, FingerprintStore, fingerprint
+from scoring_rules import DEFAULT_SCORING, compile_rules
+
+PLAYERS = [
+    {"Player": "Connor McDavid", "Player ID": "8478402", "Team": "Alpha", "Position": "C",
+     "Points Before Acquiring": 0, "Goals": 5, "Assists": 17, "Wins": 0, "Shutouts": 0},
+    {"Player": "Stuart Skinner", "Player ID": "8479973", "Team": "Beta", "Position": "G",
+     "Points Before Acquiring": 0, "Goals": 0, "Assists": 0, "Wins": 4, "Shutouts": 1},
+]
+
+
+class TestFingerprint(unittest.TestCase):
+
+    def test_key_order_does_not_matter(self):
+        self.assertEqual(fingerprint({"a": 1, "b": [1, 2]}, {"x"}), fingerprint({"b": [1, 2], "a": 1}, {"x"}))
+        self.assertNotEqual(fingerprint({"a": 1}), fingerprint({"a": 2}))
+
+    def test_scoring_rules_are_part_of_the_fingerprint(self):
+        self.assertEqual(fingerprint(PLAYERS, DEFAULT_SCORING), fingerprint(PLAYERS, compile_rules({"Goals": 1})))
+        self.assertNotEqual(fingerprint(PLAYERS, DEFAULT_SCORING), fingerprint(PLAYERS, compile_rules({"Goals": 2})))
+
+
+class TestFingerprintStore(unittest.TestCase):
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.path = os.path.join(tmp_dir.name, 'fingerprints.json')
+        self.output = os.path.join(tmp_dir.name, 'standings-20250520.json')
+        with open(self.output, 'w') as f:
+            json.dump([], f)
+
+    def record(self, value):
+        store = FingerprintStore(self.path)
+        self.assertFalse(store.check('standings', value))
+        store.record('standings', [self.output])
+        store.save()
+
+    def test_hit_after_recording(self):
+        self.record('abc')
+        store = FingerprintStore(self.path)
+        self.assertTrue(store.check('standings', 'abc'))
+        self.assertEqual(store.load_output('standings'), [])
+        self.assertFalse(store.check('updated_stats', 'abc'))
+        self.assertEqual(store.status, {'standings': 'hit', 'updated_stats': 'miss'})
+
+    def test_miss_when_inputs_change_outputs_vanish_or_forced(self):
+        self.record('abc')
+        self.assertFalse(FingerprintStore(self.path).check('standings', 'abd'))
+        self.assertFalse(FingerprintStore(self.path, force=True).check('standings', 'abc'))
+        os.remove(self.output)
+        self.assertFalse(FingerprintStore(self.path).check('standings', 'abc'))
+
+    def test_in_memory_store_always_misses(self):
+        store = FingerprintStore(None)
+        store.check('standings', 'abc')
+        store.record('standings', [self.output])
+        store.save()
+        self.assertFalse(store.check('standings', 'abc'))
+        self.assertFalse(os.path.exists(self.path))
+
+
+class TestCalculateStandingsSkipsUnchangedInputs(unittest.TestCase):
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        cwd = os.getcwd()
+        os.chdir(tmp_dir.name)
+        self.addCleanup(os.chdir, cwd)
+        os.makedirs('data')
+        with open('data/updatedstats-20250520.json', 'w') as f:
+            json.dump(PLAYERS, f)
+
+    def main(self):
+        return calculate_standings.main(['--metrics-report', 'report.json', '--prometheus-textfile', 'metrics.prom'])
+
+    def test_second_run_writes_nothing(self):
+        first = self.main()
+        with open(FINGERPRINTS_FILE, 'r') as f:
+            self.assertEqual(json.load(f)['standings']['outputs'], [first, 'data/latest-standings.json'])
+
+        with patch.object(calculate_standings, 'write_standings', return_value=first) as write_standings:
+            self.assertEqual(self.main(), first)
+            write_standings.assert_not_called()
+
+            with open('data/scoring_rules.json', 'w') as f:
+                json.dump({"default": {"Wins": 3}}, f)
+            self.main()
+            write_standings.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
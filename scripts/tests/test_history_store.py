@@ -0,0 +1,132 @@
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+from datetime import date
+from unittest.mock import patch
+
+SCRIPTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+import history_store
+from history_store import (HistoryStore, apply_delta, encode_delta, export_snapshots,
+                           import_snapshots, prune_daily_files)
+from snapshots import latest_snapshot
+
+
+def stats_row(player_id, goals=0, team="Team A"):
+    return {"Player": f"Player {player_id}", "Player ID": player_id, "Team": team,
+            "Goals": goals, "Assists": 0, "Wins": 0, "Shutouts": 0}
+
+
+class TestDeltaEncoding(unittest.TestCase):
+
+    def test_round_trip(self):
+        previous = [stats_row("1"), stats_row("2"), stats_row("3")]
+        rows = [stats_row("3"), stats_row("1", goals=2), stats_row("4")]
+        delta = encode_delta(previous, rows, "Player ID")
+        self.assertEqual(delta["update"], {"1": {"Goals": 2}})
+        self.assertEqual(delta["remove"], ["2"])
+        self.assertEqual(delta["order"], ["3", "1", "4"])
+        self.assertEqual(apply_delta(previous, delta, "Player ID"), rows)
+
+    def test_identical_day_is_empty(self):
+        rows = [stats_row("1"), stats_row("2")]
+        self.assertEqual(encode_delta(rows, [dict(row) for row in rows], "Player ID"), {})
+
+    def test_reordered_fields_stored_whole(self):
+        previous = [stats_row("1")]
+        reordered = dict(reversed(list(stats_row("1").items())))
+        delta = encode_delta(previous, [reordered], "Player ID")
+        self.assertEqual(list(apply_delta(previous, delta, "Player ID")[0]), list(reordered))
+
+    def test_duplicate_keys_need_full_snapshot(self):
+        self.assertIsNone(encode_delta([], [stats_row("1"), stats_row("1")], "Player ID"))
+
+
+class TestHistoryStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.history_dir = os.path.join(self.tmp_dir, "history")
+        self.data_dir = os.path.join(self.tmp_dir, "data")
+        os.makedirs(self.data_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write_daily(self, kind, day, rows):
+        with open(os.path.join(self.data_dir, f"{kind}-{day:%Y%m%d}.json"), "w") as f:
+            json.dump(rows, f, indent=4)
+
+    def test_append_and_read_back(self):
+        store = HistoryStore("updatedstats", self.history_dir)
+        days = [date(2025, 5, day) for day in range(1, 8)]
+        with patch.object(history_store, "KEYFRAME_INTERVAL", 3):
+            for goals, day in enumerate(days):
+                store.append(day, [stats_row("1", goals=goals), stats_row("2")])
+
+        reopened = HistoryStore("updatedstats", self.history_dir)
+        self.assertEqual(reopened.dates(), days)
+        self.assertEqual(reopened.snapshot(days[5]), [stats_row("1", goals=5), stats_row("2")])
+        self.assertEqual(sum("rows" in entry for entry in reopened.entries()), 3)
+        self.assertIsNone(reopened.snapshot(date(2025, 6, 1)))
+
+    def test_same_date_appended_again_supersedes(self):
+        store = HistoryStore("standings", self.history_dir)
+        store.append(date(2025, 5, 1), [{"Rank": 1, "Team": "A", "Total Points": 1}])
+        store.append(date(2025, 5, 1), [{"Rank": 1, "Team": "A", "Total Points": 3}])
+        self.assertEqual(dict(store.iter_snapshots())[date(2025, 5, 1)][0]["Total Points"], 3)
+        self.assertEqual(store.latest()[1][0]["Total Points"], 3)
+
+    def test_compact_rolls_up_old_days_to_weekly(self):
+        store = HistoryStore("updatedstats", self.history_dir)
+        store.rewrite([(date(2025, 4, day), [stats_row("1", goals=day)]) for day in range(1, 31)])
+        dropped = store.compact(keep_daily_days=7)
+        kept = store.dates()
+        self.assertEqual(dropped, 30 - len(kept))
+        self.assertTrue(all(date(2025, 4, day) in kept for day in range(23, 31)))
+        # Before the cutoff only the last day of each ISO week remains (Sundays here)
+        self.assertEqual([day for day in kept if day < date(2025, 4, 23)],
+                         [date(2025, 4, 6), date(2025, 4, 13), date(2025, 4, 20), date(2025, 4, 22)])
+        self.assertEqual(store.snapshot(date(2025, 4, 13)), [stats_row("1", goals=13)])
+
+    def test_import_export_and_prune(self):
+        days = [date(2025, 5, 1), date(2025, 5, 2), date(2025, 5, 3)]
+        for goals, day in enumerate(days):
+            self.write_daily("updatedstats", day, [stats_row("1", goals=goals), stats_row("2")])
+        import_snapshots(self.data_dir, self.history_dir, kinds=("updatedstats",))
+
+        out_dir = os.path.join(self.tmp_dir, "export")
+        written = export_snapshots("updatedstats", out_dir, self.history_dir, start=days[1])
+        self.assertEqual([os.path.basename(path) for path in written],
+                         ["updatedstats-20250502.json", "updatedstats-20250503.json"])
+        for path in written:
+            with open(path) as exported, open(os.path.join(self.data_dir, os.path.basename(path))) as original:
+                self.assertEqual(exported.read(), original.read())
+
+        # A daily file edited after the import is not reproduced and must survive pruning
+        self.write_daily("updatedstats", days[0], [stats_row("1", goals=9)])
+        deleted = prune_daily_files("updatedstats", self.data_dir, self.history_dir, keep_days=0, today=date(2025, 5, 3))
+        self.assertEqual([os.path.basename(path) for path in deleted], ["updatedstats-20250502.json"])
+
+        # Re-importing keeps the pruned day
+        import_snapshots(self.data_dir, self.history_dir, kinds=("updatedstats",))
+        self.assertEqual(HistoryStore("updatedstats", self.history_dir).dates(), days)
+
+    def test_prune_keeps_the_newest_daily_file(self):
+        # Off-season: every file is past the window, but the gate and --incremental read the newest one
+        days = [date(2025, 6, 1), date(2025, 6, 2)]
+        for day in days:
+            self.write_daily("updatedstats", day, [stats_row("1")])
+        import_snapshots(self.data_dir, self.history_dir, kinds=("updatedstats",))
+        deleted = prune_daily_files("updatedstats", self.data_dir, self.history_dir, today=date(2025, 10, 1))
+        self.assertEqual([os.path.basename(path) for path in deleted], ["updatedstats-20250601.json"])
+        self.assertEqual(latest_snapshot("updatedstats", self.data_dir)[0], days[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+import os
+import json
+import tempfile
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+# Adjust sys.path to allow direct import of the module under test
+import sys
+SCRIPTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+from landing_cache import LandingCache
+from nhl_api import fetch_landing
+
+LANDING = {
+    "playerId": 8478402,
+    "position": "C",
+    "currentTeamAbbrev": "EDM",
+    "featuredStats": {"playoffs": {"subSeason": {"gamesPlayed": 3, "goals": 1, "assists": 4}}},
+    "careerTotals": {"regularSeason": {"gamesPlayed": 700}},
+}
+
+
+def _response(status_code, payload=None, headers=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.json.return_value = payload
+    response.headers = headers or {}
+    return response
+
+
+class TestLandingCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = LandingCache(os.path.join(self.tmp_dir.name, 'landing.json'))
+        self.cache.team_last_game = {}
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_store_trims_payload(self):
+        trimmed = self.cache.store("8478402", LANDING)
+        self.assertNotIn("careerTotals", trimmed)
+        self.assertEqual(trimmed["featuredStats"], LANDING["featuredStats"])
+
+    def test_served_from_cache_when_team_has_not_played(self):
+        session = MagicMock()
+        session.get.return_value = _response(200, LANDING)
+        fetch_landing("8478402", session=session, cache=self.cache)
+        fetch_landing("8478402", session=session, cache=self.cache)
+        self.assertEqual(session.get.call_count, 1)
+        self.assertEqual(self.cache.hits, 1)
+        self.assertEqual(self.cache.misses, 1)
+
+    def test_stale_after_team_finishes_a_game(self):
+        self.cache.store("8478402", LANDING)
+        entry = self.cache.entries["8478402"]
+        self.cache.team_last_game = {"EDM": datetime.now(timezone.utc) - timedelta(hours=1)}
+        self.assertFalse(self.cache.is_fresh(entry))
+        # Games by other teams do not affect the entry
+        self.cache.team_last_game = {"FLA": datetime.now(timezone.utc) - timedelta(hours=1)}
+        self.assertTrue(self.cache.is_fresh(entry))
+
+    def test_unknown_schedule_means_stale(self):
+        self.cache.store("8478402", LANDING)
+        self.cache.team_last_game = None
+        self.assertFalse(self.cache.is_fresh(self.cache.entries["8478402"]))
+
+    def test_revalidates_with_etag(self):
+        self.cache.store("8478402", LANDING, {"ETag": '"abc"'})
+        self.cache.team_last_game = None  # force revalidation
+        session = MagicMock()
+        session.get.return_value = _response(304)
+        data = fetch_landing("8478402", session=session, cache=self.cache)
+        self.assertEqual(session.get.call_args.kwargs["headers"], {"If-None-Match": '"abc"'})
+        self.assertEqual(data["currentTeamAbbrev"], "EDM")
+        self.assertEqual(self.cache.revalidations, 1)
+
+    def test_eviction_and_round_trip(self):
+        self.cache.store("1", LANDING)
+        self.cache.store("2", LANDING)
+        self.cache.entries["1"]["fetchedAt"] = (datetime.now(timezone.utc) - timedelta(days=30)).isoformat()
+        self.cache.save()
+        with open(self.cache.path) as f:
+            self.assertEqual(list(json.load(f)["entries"]), ["2"])
+        reloaded = LandingCache(self.cache.path).load()
+        self.assertIn("2", reloaded.entries)
+
+
+if __name__ == '__main__':
+    unittest.main()
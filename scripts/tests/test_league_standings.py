@@ -0,0 +1,78 @@
+import unittest
+import os
+
+# Adjust sys.path to allow direct import of the module under test
+import sys
+SCRIPTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+from league_standings import build_ownership_index, compute_all_league_standings, fetch_index_stats
+
+LEAGUES = {
+    "league-a": {
+        "name": "League A",
+        "draftedPlayers": {
+            "k1": {"playerId": "100", "Player": "Skater One", "Team": "Alpha", "Position": "C", "playoffRoundDrafted": 1},
+            "k2": {"playerId": "200", "Player": "Goalie Two", "Team": "Bravo", "Position": "G", "playoffRoundDrafted": 1},
+            "k3": {"Player": "BANKED PICK", "Team": "Bravo", "isBankedPick": True},
+        },
+    },
+    "league-b": {
+        "draftedPlayers": {
+            "k9": {"playerId": "100", "Player": "Skater One", "Team": "Zulu", "Position": "C",
+                   "playoffRoundDrafted": 2, "preAcqRound": 2, "pointsBeforeAcquiring": 3},
+        },
+    },
+    "league-c": {"presence": {"uid": True}},
+}
+
+STATS = {
+    "100": {"Goals": 4, "Assists": 5, "Wins": 0, "Shutouts": 0},
+    "200": {"Goals": 0, "Assists": 1, "Wins": 3, "Shutouts": 1},
+}
+
+
+class FakeProvider:
+    def __init__(self):
+        self.requested = []
+
+    def get_many(self, player_ids):
+        self.requested.extend(player_ids)
+        return [None for _ in player_ids]
+
+
+class TestLeagueStandings(unittest.TestCase):
+
+    def test_index_keeps_every_ownership(self):
+        index = build_ownership_index(LEAGUES)
+        self.assertEqual(sorted(index), ["100", "200"])
+        self.assertEqual([o["leagueId"] for o in index["100"]], ["league-a", "league-b"])
+        self.assertEqual(index["100"][1]["Team"], "Zulu")
+        self.assertEqual(index["100"][1]["pointsBeforeAcquiring"], 3)
+
+    def test_standings_per_league(self):
+        results = compute_all_league_standings(build_ownership_index(LEAGUES), STATS)
+        self.assertEqual(sorted(results), ["league-a", "league-b"])
+
+        _, league_a = results["league-a"]
+        self.assertEqual([(s["Team"], s["Total Points"]) for s in league_a], [("Alpha", 9), ("Bravo", 8)])
+
+        rows, league_b = results["league-b"]
+        self.assertEqual(league_b[0]["Team"], "Zulu")
+        self.assertEqual(league_b[0]["Total Points"], 6)  # 9 points minus 3 scored before acquisition
+        self.assertEqual(rows[0]["Points Before Acquiring"], 3)
+
+    def test_each_player_fetched_once_across_leagues(self):
+        provider = FakeProvider()
+        index = build_ownership_index(LEAGUES)
+        fetch_index_stats(index, provider)
+        self.assertEqual(sorted(provider.requested), ["100", "200"])
+
+        provider = FakeProvider()
+        fetch_index_stats(index, provider, known_stats={"100": STATS["100"]})
+        self.assertEqual(provider.requested, ["200"])
+
+
+if __name__ == '__main__':
+    unittest.main()
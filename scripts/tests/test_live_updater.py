@@ -0,0 +1,102 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from datetime import date, datetime, timezone
+
+SCRIPTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+from boxscores import player_lines
+from live_updater import (INTERMISSION_INTERVAL, PLAY_INTERVAL, LiveStandings, ReplayFeed, game_day,
+                          next_poll_interval, run)
+
+REPLAY_DIR = os.path.join(os.path.dirname(__file__), 'fixtures', 'replay-20250604')
+NOW = datetime(2025, 6, 5, 0, 10, tzinfo=timezone.utc)
+
+
+def row(player_id, team, nhl_team, position="C", **stats):
+    entry = {"Player ID": player_id, "Team": team, "NHL Team": nhl_team, "Position": position,
+             "Points Before Acquiring": 0, "Goals": 0, "Assists": 0, "Wins": 0, "Shutouts": 0}
+    entry.update(stats)
+    return entry
+
+
+class TestLiveUpdater(unittest.TestCase):
+
+    def setUp(self):
+        self.base_rows = [
+            row("8478402", "Alpha", "EDM", Goals=5, Assists=17),
+            row("8479973", "Beta", "EDM", "G", Wins=4, Shutouts=1),
+            row("8478398", "Beta", "WPG", Goals=5),
+        ]
+        league_rows = {"league1": [row("8478402", "Gamma", "EDM", Goals=5, Assists=17)]}
+        self.live = LiveStandings(self.base_rows, league_rows)
+
+    def test_game_day_rolls_over_after_late_games(self):
+        self.assertEqual(game_day(datetime(2025, 6, 5, 4, 0, tzinfo=timezone.utc)), date(2025, 6, 4))
+        self.assertEqual(game_day(datetime(2025, 6, 5, 12, 0, tzinfo=timezone.utc)), date(2025, 6, 5))
+
+    def test_wins_and_shutouts_wait_for_the_final(self):
+        feed = ReplayFeed(REPLAY_DIR)
+        live_lines = player_lines(feed.boxscore(2024030411))
+        self.assertEqual(live_lines["8479973"]["Wins"], 0)
+        self.assertNotIn("8475717", live_lines)
+
+        for _ in range(3):
+            final_lines = player_lines(feed.boxscore(2024030411))
+        self.assertEqual((final_lines["8479973"]["Wins"], final_lines["8479973"]["Shutouts"]), (1, 1))
+        self.assertEqual(final_lines["8475883"]["Wins"], 0)
+
+    def test_poll_interval_follows_the_game_state(self):
+        in_play = {"gameState": "LIVE", "clock": {"inIntermission": False}}
+        intermission = {"gameState": "LIVE", "clock": {"inIntermission": True, "secondsRemaining": 400}}
+        pregame = {"gameState": "FUT", "startTimeUTC": "2025-06-05T00:20:00Z"}
+        final = {"gameState": "OFF"}
+        self.assertEqual(next_poll_interval([in_play, intermission], NOW), PLAY_INTERVAL)
+        self.assertEqual(next_poll_interval([intermission, pregame], NOW), INTERMISSION_INTERVAL)
+        self.assertEqual(next_poll_interval([pregame, final], NOW), 600)
+        self.assertIsNone(next_poll_interval([final], NOW))
+
+    def test_replay_publishes_only_changes(self):
+        published, sleeps = [], []
+        feed = ReplayFeed(REPLAY_DIR)
+        publishes = run(feed, self.live, date(2025, 6, 4), lambda live: published.append(live.rows()),
+                        clock=lambda: NOW, sleep=sleeps.append)
+
+        # The intermission frame changes nothing; the game between unowned teams is never fetched
+        self.assertEqual(publishes, 3)
+        self.assertEqual(sleeps, [PLAY_INTERVAL, INTERMISSION_INTERVAL, PLAY_INTERVAL])
+        self.assertEqual(set(feed._positions), {2024030411})
+
+        by_id = {entry["Player ID"]: entry for entry in published[-1]}
+        self.assertEqual((by_id["8478402"]["Goals"], by_id["8478402"]["Assists"]), (6, 18))
+        self.assertEqual((by_id["8479973"]["Wins"], by_id["8479973"]["Shutouts"]), (5, 2))
+        self.assertIs(published[-1][2], self.base_rows[2])
+        self.assertEqual(self.base_rows[0]["Goals"], 5)
+
+        (league_row,), standings = self.live.league_results()["league1"]
+        self.assertEqual(league_row["Goals"], 6)
+        self.assertEqual(standings[0]["Total Points"], 24)
+
+    def test_replay_of_a_truncated_recording_stops(self):
+        # A --record session cut off before the final: the last frame is still in play
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            replay_dir = os.path.join(tmp_dir, 'replay')
+            shutil.copytree(REPLAY_DIR, replay_dir)
+            os.remove(os.path.join(replay_dir, '2024030411', '0004.json'))
+
+            sleeps = []
+            feed = ReplayFeed(replay_dir)
+            publishes = run(feed, self.live, date(2025, 6, 4), lambda live: None, clock=lambda: NOW,
+                            sleep=sleeps.append)
+
+        self.assertEqual(publishes, 2)
+        self.assertEqual(sleeps, [PLAY_INTERVAL, INTERMISSION_INTERVAL])
+        self.assertEqual(feed._positions, {2024030411: 3})
+
+
+if __name__ == '__main__':
+    unittest.main()
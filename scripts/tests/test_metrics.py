@@ -0,0 +1,98 @@
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+import unittest
+from unittest.mock import MagicMock, patch
+
+SCRIPTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+import requests
+from metrics import METRICS, Histogram, endpoint_label, prometheus_text
+from nhl_api import RateLimitedSession
+from rtdb import CountingReference, InMemoryReference
+from run_pipeline import run_stages
+
+
+def response(status_code, body=b'{}'):
+    fake = MagicMock()
+    fake.status_code = status_code
+    fake.content = body
+    fake.headers = {}
+    return fake
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        METRICS.reset()
+        self.addCleanup(METRICS.reset)
+
+    def test_endpoint_labels_group_urls(self):
+        self.assertEqual(endpoint_label("https://api-web.nhle.com/v1/player/8478402/landing"), "/v1/player/{id}/landing")
+        self.assertEqual(endpoint_label("https://api-web.nhle.com/v1/schedule/2025-05-01"), "/v1/schedule/{date}")
+        self.assertEqual(endpoint_label("https://api-web.nhle.com/v1/club-stats/EDM/20242025/3"),
+                         "/v1/club-stats/{team}/{id}/{id}")
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram(buckets=(0.1, 1.0))
+        for seconds in (0.05, 0.1, 0.5, 2.0):
+            histogram.observe(seconds)
+        summary = histogram.to_dict()
+        self.assertEqual(summary['buckets'], {'0.1': 2, '1.0': 3, '+Inf': 4})
+        self.assertEqual((summary['count'], summary['p50Seconds'], summary['maxSeconds']), (4, 0.5, 2.0))
+
+    def test_session_records_requests_bytes_and_retries(self):
+        session = RateLimitedSession(retries=2, backoff=0, sleep=lambda seconds: None)
+        side_effect = [response(503, b''), requests.exceptions.ConnectionError("reset"), response(200, b'{"a":1}')]
+        with patch.object(requests.Session, 'request', side_effect=side_effect):
+            session.get("https://api-web.nhle.com/v1/player/8478402/landing")
+
+        entry = METRICS.report()['http']['/v1/player/{id}/landing']
+        self.assertEqual((entry['requests'], entry['retries'], entry['bytes']), (3, 2, 7))
+        self.assertEqual(entry['statuses'], {'503': 1, 'error': 1, '200': 1})
+
+    def test_rtdb_calls_are_timed_per_operation(self):
+        database = CountingReference(InMemoryReference({"leagues": {"a": {"playoffRound": 2}}}))
+        database.child('leagues/a').get()
+        database.child('leagues/a').update({"playoffRound": 3})
+        rtdb = METRICS.report()['rtdb']
+        self.assertEqual((rtdb['get']['calls'], rtdb['update']['calls']), (1, 1))
+        self.assertEqual(rtdb['update']['bytes'], len('{"playoffRound":3}'))
+
+    def test_stages_record_time_memory_and_profiles(self):
+        tracemalloc.start()
+        self.addCleanup(tracemalloc.stop)
+        with tempfile.TemporaryDirectory() as profile_dir:
+            results, _ = run_stages({
+                'allocate': ([], lambda: len(bytearray(2_000_000))),
+                'double': (['allocate'], lambda allocate: allocate * 2),
+            }, profile_dir=profile_dir)
+            self.assertEqual(results['double'], 4_000_000)
+            self.assertTrue(os.path.exists(os.path.join(profile_dir, 'allocate.prof')))
+
+        stages = METRICS.report()['stages']
+        self.assertGreaterEqual(stages['allocate']['memoryPeakBytes'], 2_000_000)
+        self.assertEqual(stages['double']['calls'], 1)
+
+    def test_report_and_prometheus_textfile(self):
+        METRICS.observe_http('/v1/schedule/{date}', 0.2, 100, 200)
+        METRICS.record_cache('landing', 3, 1)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            report = METRICS.write_report(os.path.join(tmp_dir, 'report.json'), 'fetch_stats')
+            with open(os.path.join(tmp_dir, 'report.json'), 'r') as f:
+                self.assertEqual(json.load(f)['totals'], report['totals'])
+        self.assertEqual(report['caches']['landing']['hitRatio'], 0.75)
+
+        text = prometheus_text(report)
+        self.assertIn('# TYPE fantasy_hockey_http_request_duration_seconds histogram', text)
+        self.assertIn('fantasy_hockey_http_request_duration_seconds_bucket'
+                      '{script="fetch_stats",endpoint="/v1/schedule/{date}",le="0.25"} 1', text)
+        self.assertIn('fantasy_hockey_cache_hit_ratio{script="fetch_stats",cache="landing"} 0.75', text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,185 @@
+import unittest
+import os
+import random
+import time
+from unittest.mock import MagicMock, patch
+
+# Adjust sys.path to allow direct import of the module under test
+import sys
+SCRIPTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+import requests
+from nhl_api import RateLimiter, RateLimitedSession, fetch_landing, fetch_landings, parse_retry_after
+
+
+def _fake_response(status_code, payload=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.json.return_value = payload
+    return response
+
+
+class FakeSession:
+    """Stands in for requests.Session; answers with the player ID after a random delay."""
+
+    def __init__(self, failing_ids=()):
+        self.failing_ids = set(failing_ids)
+        self.requested_urls = []
+
+    def get(self, url, timeout=None, headers=None):
+        self.requested_urls.append(url)
+        player_id = url.rstrip('/').split('/')[-2]
+        time.sleep(random.uniform(0, 0.01))
+        if player_id in self.failing_ids:
+            return _fake_response(404)
+        return _fake_response(200, {"playerId": player_id})
+
+
+class TestFetchLandings(unittest.TestCase):
+
+    def test_results_follow_input_order(self):
+        """Concurrent results must line up with the requested IDs."""
+        player_ids = [str(8470000 + i) for i in range(40)]
+        session = FakeSession()
+        results = fetch_landings(player_ids, workers=8, session=session)
+        self.assertEqual([r["playerId"] for r in results], player_ids)
+        self.assertEqual(len(session.requested_urls), len(player_ids))
+
+    def test_single_worker_matches_concurrent_run(self):
+        player_ids = [str(8480000 + i) for i in range(10)]
+        sequential = fetch_landings(player_ids, workers=1, session=FakeSession())
+        concurrent = fetch_landings(player_ids, workers=4, session=FakeSession())
+        self.assertEqual(sequential, concurrent)
+
+    def test_failed_requests_yield_none(self):
+        session = FakeSession(failing_ids={"2"})
+        results = fetch_landings(["1", "2", "3"], workers=3, session=session)
+        self.assertEqual(results[0], {"playerId": "1"})
+        self.assertIsNone(results[1])
+        self.assertEqual(results[2], {"playerId": "3"})
+
+    def test_network_error_yields_none(self):
+        session = MagicMock()
+        session.get.side_effect = requests.exceptions.Timeout("timed out")
+        self.assertIsNone(fetch_landing("8478402", session=session, timeout=1))
+        session.get.assert_called_once()
+        self.assertEqual(session.get.call_args.kwargs["timeout"], 1)
+
+    def test_undecodable_body_yields_none(self):
+        session = FakeSession()
+        truncated = _fake_response(200)
+        truncated.json.side_effect = ValueError("Expecting ',' delimiter")
+        with patch.object(session, 'get', side_effect=lambda url, timeout=None, headers=None:
+                          truncated if "8478402" in url else _fake_response(200, {"playerId": "1"})):
+            results = fetch_landings(["8478402", "1"], workers=2, session=session)
+        self.assertEqual(results, [None, {"playerId": "1"}])
+
+
+
+class FakeClock:
+    """Monotonic clock that only moves when the code under test sleeps"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    def test_burst_then_steady_rate(self):
+        clock = FakeClock()
+        limiter = RateLimiter(rate=10, burst=5, clock=clock, sleep=clock.sleep)
+        for _ in range(25):
+            limiter.acquire()
+        # 5 requests go out at once, the other 20 at 10 per second
+        self.assertAlmostEqual(clock.now, 2.0)
+
+    def test_throttled_pauses_and_halves_the_rate(self):
+        clock = FakeClock()
+        limiter = RateLimiter(rate=10, burst=1, clock=clock, sleep=clock.sleep)
+        limiter.acquire()
+        limiter.throttled(retry_after=3)
+        self.assertEqual(limiter.rate, 5)
+        limiter.acquire()
+        self.assertGreaterEqual(clock.now, 3.0)
+
+        for _ in range(100):
+            limiter.succeeded()
+        self.assertEqual(limiter.rate, 10)
+
+    def test_rate_never_drops_below_minimum(self):
+        limiter = RateLimiter(rate=4, burst=1, min_rate=1)
+        for _ in range(10):
+            limiter.throttled()
+        self.assertEqual(limiter.rate, 1)
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after("7"), 7.0)
+        self.assertEqual(parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0.0)
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after("soon"))
+
+
+def _status_response(status_code, headers=None):
+    response = _fake_response(status_code, {"ok": status_code == 200})
+    response.headers = headers or {}
+    return response
+
+
+class TestRateLimitedSession(unittest.TestCase):
+
+    def test_retry_after_is_honored_on_429(self):
+        clock = FakeClock()
+        limiter = RateLimiter(rate=100, burst=10, clock=clock, sleep=clock.sleep)
+        session = RateLimitedSession(limiter, retries=3, sleep=clock.sleep)
+        responses = [_status_response(429, {"Retry-After": "2"}), _status_response(200)]
+        with patch.object(requests.Session, 'request', side_effect=responses) as request:
+            response = session.get("https://example.test/x")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(request.call_count, 2)
+        self.assertEqual(session.retried, 1)
+        self.assertEqual(limiter.throttled_count, 1)
+        self.assertGreaterEqual(clock.now, 2.0)
+
+    def test_server_errors_back_off_then_give_up(self):
+        clock = FakeClock()
+        session = RateLimitedSession(retries=2, backoff=0.5, sleep=clock.sleep)
+        responses = [_status_response(503) for _ in range(3)]
+        with patch.object(requests.Session, 'request', side_effect=responses) as request:
+            response = session.get("https://example.test/x")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(request.call_count, 3)
+        # Jittered exponential backoff: [0.5, 1.0) then [1.0, 2.0)
+        self.assertEqual(len(clock.sleeps), 2)
+        self.assertTrue(0.5 <= clock.sleeps[0] < 1.0)
+        self.assertTrue(1.0 <= clock.sleeps[1] < 2.0)
+
+    def test_network_errors_are_retried(self):
+        session = RateLimitedSession(retries=1, backoff=0, sleep=lambda seconds: None)
+        side_effect = [requests.exceptions.ConnectionError("reset"), _status_response(200)]
+        with patch.object(requests.Session, 'request', side_effect=side_effect):
+            self.assertEqual(session.get("https://example.test/x").status_code, 200)
+
+        side_effect = [requests.exceptions.Timeout("slow")] * 2
+        with patch.object(requests.Session, 'request', side_effect=side_effect):
+            with self.assertRaises(requests.exceptions.Timeout):
+                session.get("https://example.test/x")
+
+    def test_not_found_is_not_retried(self):
+        session = RateLimitedSession(retries=3, sleep=lambda seconds: None)
+        with patch.object(requests.Session, 'request', side_effect=[_status_response(404)]) as request:
+            self.assertEqual(session.get("https://example.test/x").status_code, 404)
+        self.assertEqual(request.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from datetime import date, datetime, timezone
+from unittest.mock import patch
+
+SCRIPTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+import player_database
+from player_database import (carry_forward_stats, diff_players, ids_to_refetch, load_delta_report,
+                             stale_teams_since_last_build, write_delta_report)
+
+
+def roster_entry(player_id, team, name="Player"):
+    return {"id": player_id, "fullName": name, "position": "C", "teamAbbreviation": team}
+
+
+EXISTING = [
+    {"id": 1, "fullName": "Stays", "position": "C", "teamAbbreviation": "TOR", "gamesPlayed": 10, "goals": 4},
+    {"id": 2, "fullName": "Traded", "position": "C", "teamAbbreviation": "MTL", "gamesPlayed": 8, "goals": 1},
+    {"id": 3, "fullName": "Played", "position": "C", "teamAbbreviation": "EDM", "gamesPlayed": 9, "goals": 2},
+    {"id": 4, "fullName": "Gone", "position": "C", "teamAbbreviation": "EDM", "gamesPlayed": 1, "goals": 0},
+]
+
+
+class TestDiffPlayers(unittest.TestCase):
+
+    def setUp(self):
+        self.current = [roster_entry(1, "TOR"), roster_entry(2, "OTT"), roster_entry(3, "EDM"), roster_entry(5, "TOR")]
+
+    def test_classifies_players(self):
+        delta = diff_players(EXISTING, self.current, stale_teams={"EDM"})
+        self.assertEqual(delta["added"], [5])
+        self.assertEqual(delta["moved"], [(2, "MTL", "OTT")])
+        self.assertEqual(delta["stale"], [3])
+        self.assertEqual(delta["unchanged"], [1])
+        self.assertEqual(delta["removed"], [4])
+        self.assertEqual(ids_to_refetch(delta), [5, 2, 3])
+
+    def test_unknown_stale_teams_refetch_everyone(self):
+        delta = diff_players(EXISTING, self.current, stale_teams=None)
+        self.assertEqual(sorted(ids_to_refetch(delta)), [1, 2, 3, 5])
+        self.assertEqual(delta["unchanged"], [])
+
+    def test_empty_existing_file_adds_everyone(self):
+        delta = diff_players([], self.current, stale_teams=set())
+        self.assertEqual(delta["added"], [1, 2, 3, 5])
+
+    def test_carry_forward_keeps_current_roster_fields(self):
+        player = carry_forward_stats(roster_entry(1, "TOR", name="Renamed"), EXISTING[0])
+        self.assertEqual(player["fullName"], "Renamed")
+        self.assertEqual(player["goals"], 4)
+        self.assertEqual(player["gamesPlayed"], 10)
+
+
+class TestDeltaReport(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.report = os.path.join(self.tmp, "delta.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_reports_are_kept_per_output_file(self):
+        delta = diff_players(EXISTING, [roster_entry(1, "TOR"), roster_entry(2, "OTT")], stale_teams=set())
+        built = datetime(2025, 5, 1, 12, tzinfo=timezone.utc)
+        write_delta_report("data/nhl_players.json", delta, 20, self.report, generated_at=built)
+        write_delta_report("data/nhl_playoff_players.json", delta, 5, self.report, generated_at=built)
+
+        report = load_delta_report(self.report)
+        self.assertEqual(set(report), {"nhl_players.json", "nhl_playoff_players.json"})
+        entry = report["nhl_players.json"]
+        self.assertEqual(entry["requests"], 20)
+        self.assertEqual(entry["moved"], [{"id": 2, "from": "MTL", "to": "OTT"}])
+        self.assertEqual(entry["removed"], [3, 4])
+        self.assertEqual((entry["refetched"], entry["reused"]), (1, 1))
+
+    def test_stale_teams_come_from_the_schedule_since_the_last_build(self):
+        self.assertIsNone(stale_teams_since_last_build("data/nhl_players.json", self.report))
+
+        delta = diff_players([], [], stale_teams=set())
+        write_delta_report("data/nhl_players.json", delta, 0, self.report,
+                           generated_at=datetime(2025, 5, 1, 12, tzinfo=timezone.utc))
+        with patch.object(player_database, "get_teams_that_played", return_value={"EDM"}) as lookup:
+            teams = stale_teams_since_last_build("data/nhl_players.json", self.report, today=date(2025, 5, 20))
+        self.assertEqual(teams, {"EDM"})
+        lookup.assert_called_once_with(date(2025, 5, 1), date(2025, 5, 20))
+
+        with patch.object(player_database, "get_teams_that_played", side_effect=OSError("offline")):
+            self.assertIsNone(stale_teams_since_last_build("data/nhl_players.json", self.report))
+
+
+if __name__ == '__main__':
+    unittest.main()
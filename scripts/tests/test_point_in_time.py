@@ -0,0 +1,68 @@
+import os
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timezone
+
+SCRIPTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+from boxscores import GORDIE_HOWE_FIELD, BoxscoreLedger
+from point_in_time import PointInTimeStats, parse_drafted_at
+from scoring_rules import ScoringRules
+
+
+def game(game_id, start, lines, gordie_howe=()):
+    return {"gameId": game_id, "date": start[:10], "startTimeUTC": start, "teams": ["EDM", "LAK"],
+            "lines": lines, "gordieHowe": list(gordie_howe)}
+
+
+def line(goals=0, assists=0, wins=0):
+    return {"Games Played": 1, "Goals": goals, "Assists": assists, "Wins": wins, "Shutouts": 0, "PIM": 0}
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+class TestPointInTimeStats(unittest.TestCase):
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        ledger = BoxscoreLedger(os.path.join(tmp_dir.name, 'ledger.jsonl'))
+        # Added out of order: the logs are sorted by start time
+        ledger.add(game(2024030123, "2025-04-25T02:00:00Z", {"8478402": line(1, 1)}, ["8478402"]))
+        ledger.add(game(2024030121, "2025-04-21T23:00:00Z", {"8478402": line(2, 0), "8479973": line(wins=1)}))
+        ledger.add(game(2024030122, "2025-04-23T23:30:00Z", {"8478402": line(0, 3)}))
+        # A game without a start time counts from 23:00 UTC on its day
+        ledger.add({"gameId": 2024030124, "date": "2025-04-27", "lines": {"8478402": line(1, 0)}})
+        # Last season's game is left out
+        ledger.add(game(2023030111, "2024-04-21T23:00:00Z", {"8478402": line(5, 5)}))
+        self.stats = PointInTimeStats.from_ledger(ledger, "20242025")
+
+    def test_stats_as_of_a_moment(self):
+        self.assertEqual(self.stats.stats_as_of("8478402", utc(2025, 4, 21, 22, 59))["Goals"], 0)
+        # A game counts once it has started
+        as_of = self.stats.stats_as_of("8478402", utc(2025, 4, 24))
+        self.assertEqual((as_of["Games Played"], as_of["Goals"], as_of["Assists"]), (2, 2, 3))
+        as_of = self.stats.stats_as_of(8478402, utc(2025, 5, 1))
+        self.assertEqual((as_of["Games Played"], as_of["Goals"], as_of[GORDIE_HOWE_FIELD]), (4, 4, 1))
+        self.assertEqual(self.stats.stats_as_of("8478402", utc(2025, 4, 27, 22, 0))["Games Played"], 3)
+        self.assertEqual(self.stats.stats_as_of("1", utc(2025, 5, 1))["Goals"], 0)
+
+    def test_points_use_the_league_rules(self):
+        drafted_at = parse_drafted_at(int(utc(2025, 4, 26).timestamp() * 1000))
+        self.assertEqual(self.stats.points_as_of("8478402", drafted_at), 8)
+        self.assertEqual(self.stats.points_as_of("8478402", drafted_at, ScoringRules({"Goals": 2})), 11)
+        self.assertEqual(self.stats.points_as_of("8479973", drafted_at), 2)
+
+    def test_parse_drafted_at(self):
+        self.assertEqual(parse_drafted_at(1744674082841), datetime(2025, 4, 14, 23, 41, 22, 841000, tzinfo=timezone.utc))
+        self.assertEqual(parse_drafted_at("2025-04-14T23:41:22Z"), utc(2025, 4, 14, 23, 41, 22))
+        self.assertIsNone(parse_drafted_at(None))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+from datetime import date
+
+SCRIPTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+from history_store import HistoryStore
+from recompute_standings import main, rank_changes, recompute_all
+
+
+def stats_rows(a_goals, b_goals):
+    return [
+        {"Player ID": "1", "Team": "A", "Goals": a_goals, "Assists": 0, "Wins": 0, "Shutouts": 0},
+        {"Player ID": "2", "Team": "B", "Goals": b_goals, "Assists": 0, "Wins": 0, "Shutouts": 0},
+    ]
+
+
+class TestRankChanges(unittest.TestCase):
+
+    def test_reports_rank_and_points_changes(self):
+        old = [{"Rank": 1, "Team": "A", "Total Points": 5}, {"Rank": 2, "Team": "B", "Total Points": 4},
+               {"Rank": 3, "Team": "C", "Total Points": 1}]
+        new = [{"Rank": 1, "Team": "B", "Total Points": 6}, {"Rank": 2, "Team": "A", "Total Points": 5},
+               {"Rank": 3, "Team": "C", "Total Points": 1}]
+        self.assertEqual(rank_changes(old, new), [("B", 2, 1, 4, 6), ("A", 1, 2, 5, 5)])
+
+    def test_new_date_lists_every_team(self):
+        new = [{"Rank": 1, "Team": "A", "Total Points": 5}]
+        self.assertEqual(rank_changes(None, new), [("A", None, 1, None, 5)])
+
+
+class TestRecompute(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.data_dir = os.path.join(self.tmp_dir, "data")
+        self.history_dir = os.path.join(self.tmp_dir, "history")
+        os.makedirs(self.data_dir)
+        self.stats = [(date(2025, 5, day), stats_rows(day, 3)) for day in range(1, 6)]
+        for day, rows in self.stats:
+            self.write(f"updatedstats-{day:%Y%m%d}.json", rows)
+        standings = recompute_all(self.stats, workers=1)
+        for day, rows in standings.items():
+            self.write(f"standings-{day:%Y%m%d}.json", rows)
+        # One stale day, stored under its legacy name
+        os.remove(os.path.join(self.data_dir, "standings-20250502.json"))
+        self.write("standings-May02.json", [{"Rank": 1, "Team": "B", "Total Points": 99, "Players": 1,
+                                             "Goals": 99, "Assists": 0, "Wins": 0, "Shutouts": 0}])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write(self, name, rows):
+        with open(os.path.join(self.data_dir, name), "w") as f:
+            json.dump(rows, f, indent=4)
+
+    def test_process_pool_matches_serial(self):
+        self.assertEqual(recompute_all(self.stats, workers=2), recompute_all(self.stats, workers=1))
+
+    def test_only_changed_dates_are_written(self):
+        untouched = os.path.join(self.data_dir, "standings-20250501.json")
+        before = os.stat(untouched).st_mtime_ns
+        args = ["--data-dir", self.data_dir, "--history-dir", self.history_dir, "--workers", "2"]
+
+        self.assertEqual(main(args + ["--dry-run"]), [date(2025, 5, 2)])
+        with open(os.path.join(self.data_dir, "standings-May02.json")) as f:
+            self.assertEqual(json.load(f)[0]["Total Points"], 99)
+
+        self.assertEqual(main(args), [date(2025, 5, 2)])
+        self.assertEqual(os.stat(untouched).st_mtime_ns, before)
+        self.assertFalse(os.path.exists(os.path.join(self.data_dir, "standings-20250502.json")))
+        with open(os.path.join(self.data_dir, "standings-May02.json")) as f:
+            self.assertEqual([(entry["Team"], entry["Total Points"]) for entry in json.load(f)], [("B", 3), ("A", 2)])
+        self.assertEqual(HistoryStore("standings", self.history_dir).snapshot(date(2025, 5, 2))[0]["Total Points"], 3)
+
+        # A second run finds nothing left to change
+        self.assertEqual(main(args), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
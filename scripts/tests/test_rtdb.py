@@ -0,0 +1,93 @@
+import os
+import sys
+import unittest
+
+SCRIPTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+from rtdb import CountingReference, InMemoryReference, read_leagues
+
+
+def sample_tree():
+    return {
+        "leagues": {
+            "L1": {
+                "name": "League One",
+                "playoffRound": 2,
+                "draftedPlayers": {
+                    "p1": {"playerId": 8478402, "FantasyTeam": "A", "playoffRoundDrafted": 1},
+                    "p2": {"playerId": 8471214, "FantasyTeam": "B", "playoffRoundDrafted": 2},
+                },
+                "chat": {"m1": {"text": "x" * 500}},
+                "presence": {"u1": True},
+            },
+            "L2": {
+                "name": "Empty League",
+                "chat": {"m1": {"text": "hello"}},
+            },
+        },
+        "users": {"u1": {"name": "someone"}},
+    }
+
+
+class TestInMemoryReference(unittest.TestCase):
+
+    def test_shallow_get_lists_keys(self):
+        db = InMemoryReference(sample_tree())
+        self.assertEqual(db.child('leagues').get(shallow=True), {"L1": True, "L2": True})
+        self.assertEqual(db.child('leagues/L1/playoffRound').get(shallow=True), 2)
+        self.assertIsNone(db.child('leagues/L3').get())
+
+    def test_get_returns_a_copy(self):
+        db = InMemoryReference(sample_tree())
+        players = db.child('leagues/L1/draftedPlayers').get()
+        players["p1"]["FantasyTeam"] = "changed"
+        self.assertEqual(db.child('leagues/L1/draftedPlayers/p1/FantasyTeam').get(), "A")
+
+    def test_multi_path_update(self):
+        db = InMemoryReference(sample_tree())
+        db.update({
+            "leagues/L1/draftedPlayers/p1/pointsBeforeAcquiring": 4,
+            "leagues/L1/draftedPlayers/p1/preAcqRound": 2,
+            "leagues/L1/presence": None,
+        })
+        p1 = db.child('leagues/L1/draftedPlayers/p1').get()
+        self.assertEqual(p1["pointsBeforeAcquiring"], 4)
+        self.assertEqual(p1["preAcqRound"], 2)
+        self.assertEqual(p1["FantasyTeam"], "A")
+        self.assertIsNone(db.child('leagues/L1/presence').get())
+
+
+class TestReadLeagues(unittest.TestCase):
+
+    def test_reads_only_league_children(self):
+        leagues = read_leagues(InMemoryReference(sample_tree()), workers=2)
+        self.assertEqual(set(leagues), {"L1", "L2"})
+        self.assertEqual(set(leagues["L1"]), {"draftedPlayers", "playoffRound"})
+        self.assertEqual(leagues["L1"]["playoffRound"], 2)
+        self.assertEqual(leagues["L2"], {})
+
+    def test_no_leagues(self):
+        self.assertIsNone(read_leagues(InMemoryReference({"users": {}})))
+
+    def test_counts_round_trips_and_bytes(self):
+        full = CountingReference(InMemoryReference(sample_tree()))
+        full.child('leagues').get()
+
+        targeted = CountingReference(InMemoryReference(sample_tree()))
+        read_leagues(targeted, children=('draftedPlayers', 'playoffRound'))
+        # One shallow listing plus one read per league and child
+        self.assertEqual(targeted.stats.round_trips, 1 + 2 * 2)
+        self.assertLess(targeted.stats.bytes_read, full.stats.bytes_read)
+
+    def test_update_counts_one_round_trip(self):
+        db = CountingReference(InMemoryReference(sample_tree()))
+        db.update({"leagues/L1/draftedPlayers/p1/preAcqRound": 2,
+                   "leagues/L1/draftedPlayers/p2/preAcqRound": 2})
+        self.assertEqual(db.stats.round_trips, 1)
+        self.assertGreater(db.stats.bytes_written, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import io
+import os
+import sys
+import threading
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import MagicMock, patch
+
+SCRIPTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+from metrics import METRICS
+import run_pipeline
+from run_pipeline import build_stages, parse_args, run_stages
+
+
+class TestRunStages(unittest.TestCase):
+
+    def setUp(self):
+        METRICS.reset()
+        self.addCleanup(METRICS.reset)
+
+    def test_dependency_results_are_passed_as_keyword_arguments(self):
+        results, timings = run_stages({
+            'total': (['players', 'rules'], lambda players, rules: sum(players) * rules),
+            'players': ([], lambda: [1, 2, 3]),
+            'rules': ([], lambda: 2),
+        })
+        self.assertEqual(results, {'players': [1, 2, 3], 'rules': 2, 'total': 12})
+        self.assertEqual(timings[-1][0], 'total')
+
+    def test_independent_stages_overlap(self):
+        # Each stage waits for the other to start; run one after the other, the barrier times out
+        barrier = threading.Barrier(2, timeout=5)
+        results, _ = run_stages({
+            'schedule': ([], lambda: barrier.wait() is not None),
+            'firebase': ([], lambda: barrier.wait() is not None),
+        }, max_workers=2)
+        self.assertEqual(results, {'schedule': True, 'firebase': True})
+
+    def test_unsatisfiable_dependencies_raise(self):
+        with self.assertRaises(RuntimeError) as raised:
+            run_stages({
+                'players': ([], lambda: []),
+                'standings': (['stats'], lambda stats: stats),
+            })
+        self.assertIn("['standings']", str(raised.exception))
+
+    def test_failing_stage_propagates_after_printing_timings(self):
+        def fail(players):
+            raise ValueError("NHL API down")
+
+        output = io.StringIO()
+        with redirect_stdout(output), self.assertRaises(ValueError):
+            run_stages({
+                'players': ([], lambda: [1]),
+                'stats': (['players'], fail),
+                'standings': (['stats'], lambda stats: stats),
+            })
+        table = output.getvalue()
+        self.assertIn('Stage', table)
+        self.assertIn('players', table)
+        self.assertNotIn('standings', table)
+
+
+class TestBuildStages(unittest.TestCase):
+
+    def incremental_context(self, argv):
+        _, stage = build_stages(parse_args(argv + ['--skip-playerlist']), MagicMock())['incremental_context']
+        with patch.object(run_pipeline, 'load_incremental_context', return_value=({"EDM"}, {})) as load:
+            return stage(), load
+
+    def test_incremental_context_is_loaded_for_fetched_stats(self):
+        context, load = self.incremental_context(['--incremental'])
+        self.assertEqual(context, ({"EDM"}, {}))
+        load.assert_called_once()
+
+    def test_ledger_runs_skip_the_incremental_schedule_lookup(self):
+        context, load = self.incremental_context(['--incremental', '--ledger'])
+        self.assertIsNone(context)
+        load.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+
+SCRIPTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+from scoring_rules import DEFAULT_SCORING, ScoringRules, compile_rules, default_rules, rules_for_leagues
+from calculate_standings import calculate_league_standings, calculate_standings_from_players, load_player_columns, score_player_columns
+
+
+ROWS = [
+    {"Player ID": "1", "Team": "A", "Position": "C", "Goals": 3, "Assists": 2, "Wins": 0, "Shutouts": 0},
+    {"Player ID": "2", "Team": "B", "Position": "G", "Goals": 0, "Assists": 1, "Wins": 2, "Shutouts": 1},
+    {"Player ID": "3", "Team": "B", "Position": "D", "Goals": 0, "Assists": 2, "Wins": 0, "Shutouts": 0,
+     "Points Before Acquiring": 1},
+]
+
+
+class TestScoringRules(unittest.TestCase):
+
+    def test_defaults(self):
+        self.assertEqual(DEFAULT_SCORING.score({"Goals": 1, "Assists": 2, "Wins": 3, "Shutouts": 1}), 10)
+
+    def test_spec_only_lists_overrides(self):
+        rules = ScoringRules({"Goals": 2})
+        self.assertEqual(rules.spec["Goals"], 2)
+        self.assertEqual(rules.spec["Wins"], 2)
+
+    def test_invalid_specs(self):
+        with self.assertRaises(ValueError):
+            ScoringRules({"Hits": 1})
+        with self.assertRaises(ValueError):
+            ScoringRules({"Goals": "2"})
+        with self.assertRaises(ValueError):
+            ScoringRules([1, 2])
+
+    def test_identical_specs_compile_once(self):
+        self.assertIs(compile_rules({"Goals": 2, "Assists": 1}), compile_rules({"Assists": 1, "Goals": 2}))
+        self.assertIs(compile_rules(None), DEFAULT_SCORING)
+
+    def test_single_player_and_bulk_scoring_agree(self):
+        rules = ScoringRules({"Goals": 3, "Wins": 1.5})
+        _, columns = load_player_columns(ROWS)
+        bulk = score_player_columns(columns, rules.weights).tolist()
+        single = [rules.score(row) - row.get("Points Before Acquiring", 0) for row in ROWS]
+        self.assertEqual(bulk, single)
+
+
+class TestRulesForLeagues(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.rules_file = os.path.join(self.tmp_dir, "scoring_rules.json")
+        with open(self.rules_file, "w") as f:
+            json.dump({"default": {"Goals": 2}, "fileLeague": {"Assists": 3}}, f)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_precedence(self):
+        leagues = {
+            "rtdbLeague": {"scoringRules": {"Shutouts": 4}},
+            "fileLeague": {},
+            "otherLeague": {},
+            "badLeague": {"scoringRules": {"Hits": 1}},
+        }
+        rules = rules_for_leagues(leagues, self.rules_file)
+        self.assertEqual(rules["rtdbLeague"].spec["Shutouts"], 4)
+        self.assertEqual(rules["rtdbLeague"].spec["Goals"], 1)
+        self.assertEqual(rules["fileLeague"].spec["Assists"], 3)
+        self.assertEqual(rules["otherLeague"].spec["Goals"], 2)
+        self.assertIs(rules["badLeague"], DEFAULT_SCORING)
+        self.assertEqual(default_rules(self.rules_file).spec["Goals"], 2)
+
+    def test_missing_file_uses_defaults(self):
+        rules = rules_for_leagues({"league": {}}, os.path.join(self.tmp_dir, "missing.json"))
+        self.assertIs(rules["league"], DEFAULT_SCORING)
+
+
+class TestLeagueScoring(unittest.TestCase):
+
+    def test_each_league_scored_with_its_rules_in_one_pass(self):
+        rules_by_league = {"custom": ScoringRules({"Goals": 5}), "half": ScoringRules({"Assists": 0.5})}
+        rows_by_league = {"custom": ROWS, "half": ROWS, "default": ROWS}
+        results = calculate_league_standings(rows_by_league, rules_by_league)
+        self.assertEqual(results["custom"], calculate_standings_from_players(ROWS, rules_by_league["custom"]))
+        self.assertEqual(results["half"], calculate_standings_from_players(ROWS, rules_by_league["half"]))
+        self.assertEqual(results["default"], calculate_standings_from_players(ROWS))
+        self.assertEqual(dict(results["custom"])["A"]["Total Points"], 17)
+        # Whole-number totals stay ints even though another league has fractional weights
+        self.assertIsInstance(dict(results["default"])["A"]["Total Points"], int)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+SCRIPTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+import requests
+import search_index
+from search_index import (INDEX_FILE, build_index_for_file, build_search_index, eliminated_teams, index_entries,
+                          normalize_name, write_search_index)
+
+PLAYERS = [
+    {"id": 8478402, "fullName": "Connor McDavid", "position": "C", "teamAbbreviation": "EDM", "points": 100, "goals": 26},
+    {"id": 8477934, "fullName": "Leon Draisaitl", "position": "C", "teamAbbreviation": "EDM", "points": 106, "goals": 52},
+    {"id": 8482116, "fullName": "Tim Stützle", "position": "C", "teamAbbreviation": "OTT", "points": 79, "goals": 24},
+    {"id": 8480801, "fullName": "Brady Tkachuk", "position": "LW", "teamAbbreviation": "OTT", "points": 55, "goals": 29},
+    {"id": 8479973, "fullName": "Stuart Skinner", "position": "G", "teamAbbreviation": "EDM", "wins": 26},
+    {"id": 8476453, "fullName": "Nikita Kucherov", "position": "RW", "teamAbbreviation": "TBL", "points": 121, "goals": 37},
+]
+
+CAROUSEL = {"rounds": [{"roundNumber": 1, "series": [
+    {"neededToWin": 4, "topSeed": {"abbrev": "TBL", "wins": 1}, "bottomSeed": {"abbrev": "FLA", "wins": 4}},
+    {"neededToWin": 4, "topSeed": {"abbrev": "EDM", "wins": 3}, "bottomSeed": {"abbrev": "LAK", "wins": 2}},
+]}]}
+
+
+def read_shard(index_dir, entry):
+    with open(os.path.join(index_dir, entry['path']), 'r') as f:
+        return json.load(f)
+
+
+class TestImports(unittest.TestCase):
+
+    def test_player_database_builders_do_not_need_the_standings_stack(self):
+        # The player database workflow installs requests and firebase-admin only
+        script = ("import sys, search_index, update_playoff_playerlist; "
+                  "print(sorted({'numpy', 'league_standings', 'calculate_standings', 'fetch_stats'} & set(sys.modules)))")
+        result = subprocess.run([sys.executable, '-c', script], cwd=SCRIPTS_DIR, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), '[]')
+
+
+class TestNames(unittest.TestCase):
+
+    def test_normalize_name_strips_accents_and_case(self):
+        self.assertEqual(normalize_name("  Tim  STÜTZLE "), "tim stutzle")
+        self.assertEqual(normalize_name(None), "")
+
+
+class TestEliminatedTeams(unittest.TestCase):
+
+    def test_series_losers_and_teams_that_missed_the_playoffs(self):
+        self.assertEqual(eliminated_teams(CAROUSEL, {"EDM", "TBL", "OTT"}), {"TBL", "OTT"})
+
+    def test_nobody_is_eliminated_before_the_playoffs(self):
+        self.assertEqual(eliminated_teams(None, {"EDM", "OTT"}), set())
+        self.assertEqual(eliminated_teams({"rounds": []}, {"EDM", "OTT"}), set())
+
+    def test_unreadable_carousel_excludes_nobody(self):
+        with patch.object(search_index, 'fetch_playoff_carousel', side_effect=requests.exceptions.ConnectionError):
+            self.assertEqual(search_index.lookup_eliminated_teams({"EDM"}, season="20242025"), set())
+
+
+class TestBuildSearchIndex(unittest.TestCase):
+
+    def test_documents_are_grouped_by_team(self):
+        built = build_search_index(PLAYERS)
+        self.assertEqual(built["teams"], {"EDM": (0, 3), "OTT": (3, 5), "TBL": (5, 6)})
+        self.assertEqual([row[1] for row in built["records"]["EDM"]],
+                         ["Connor McDavid", "Leon Draisaitl", "Stuart Skinner"])
+        self.assertEqual(built["prefix"]["m"]["mc"], [0])
+        self.assertEqual(built["trigram"]["s"]["stu"], [2, 4])
+
+    def test_orders_put_missing_stats_last(self):
+        orders = build_search_index(PLAYERS)["orders"]
+        self.assertEqual(orders["points"], [[5, 1, 0, 4, 3, 2]])
+        self.assertEqual(orders["fullName"], [[3, 0, 1, 5, 2, 4]])
+
+    def test_eliminated_teams_are_left_out(self):
+        built = build_search_index(PLAYERS, eliminated={"EDM", "TBL"})
+        self.assertEqual(built["count"], 2)
+        self.assertEqual(set(built["teams"]), {"OTT"})
+
+
+class TestWriteSearchIndex(unittest.TestCase):
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.index_dir = os.path.join(tmp_dir.name, 'nhl_players')
+
+    def test_index_points_at_shards(self):
+        index = write_search_index(PLAYERS, self.index_dir, eliminated={"TBL"}, source="nhl_players.json")
+        with open(os.path.join(self.index_dir, INDEX_FILE), 'r') as f:
+            self.assertEqual(json.load(f), index)
+
+        self.assertEqual((index["count"], index["excludedTeams"]), (5, ["TBL"]))
+        self.assertEqual(index["facets"]["position"]["counts"], {"C": 3, "G": 1, "LW": 1})
+        rows = read_shard(self.index_dir, index["teams"]["OTT"]["shard"])
+        self.assertEqual(dict(zip(index["fields"], rows[0]))["fullName"], "Brady Tkachuk")
+        self.assertEqual(read_shard(self.index_dir, index["prefix"]["d"])["dr"], [1])
+        self.assertEqual(index["orders"]["goals"]["direction"], "desc")
+
+    def test_stale_shards_are_pruned_after_one_rebuild(self):
+        first = write_search_index(PLAYERS, self.index_dir)
+        second = write_search_index(PLAYERS[:-1], self.index_dir)
+        self.assertTrue(os.path.exists(os.path.join(self.index_dir, first["teams"]["TBL"]["shard"]["path"])))
+        third = write_search_index(PLAYERS[:-2], self.index_dir)
+        self.assertFalse(os.path.exists(os.path.join(self.index_dir, first["teams"]["TBL"]["shard"]["path"])))
+        for entry in index_entries(second) + index_entries(third):
+            self.assertTrue(os.path.exists(os.path.join(self.index_dir, entry["path"])))
+
+    def test_build_index_for_file(self):
+        player_file = os.path.join(os.path.dirname(self.index_dir), 'nhl_playoff_players.json')
+        with open(player_file, 'w') as f:
+            json.dump(PLAYERS, f)
+        with patch.object(search_index, 'fetch_playoff_carousel', return_value=CAROUSEL):
+            index = build_index_for_file(player_file, os.path.dirname(self.index_dir))
+        self.assertEqual(index["excludedTeams"], ["OTT", "TBL"])
+        self.assertTrue(os.path.exists(os.path.join(os.path.dirname(self.index_dir), 'nhl_playoff_players', INDEX_FILE)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+from datetime import date
+
+SCRIPTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+from history_store import HistoryStore
+from standings_history import SnapshotSeries, StandingsHistory, load_standings_history
+
+
+def standings(*teams):
+    """Standings rows from (team, points) pairs given best first"""
+    return [{"Rank": rank, "Team": team, "Total Points": points}
+            for rank, (team, points) in enumerate(teams, 1)]
+
+
+STANDINGS = [
+    (date(2025, 5, 1), standings(("A", 5), ("B", 3))),
+    (date(2025, 5, 2), standings(("B", 8), ("A", 6))),
+    (date(2025, 5, 4), standings(("B", 9), ("C", 7))),
+]
+STATS = [
+    (date(2025, 5, 1), [{"Player ID": "1", "Team": "A", "Goals": 1, "Assists": 1}]),
+    (date(2025, 5, 4), [{"Player ID": "1", "Team": "A", "Goals": 2, "Assists": 1, "Points Before Acquiring": 1},
+                        {"Player ID": "2", "Team": "C", "Position": "G", "Wins": 2}]),
+]
+
+
+class TestSnapshotSeries(unittest.TestCase):
+
+    def test_forward_fill_and_as_of(self):
+        series = SnapshotSeries.from_snapshots([(date(2025, 5, 1), {"A": 1}), (date(2025, 5, 3), {"B": 2})])
+        self.assertEqual(series.snapshot(date(2025, 5, 2)), {"A": 1, "B": 0})
+        self.assertEqual(series.snapshot(date(2025, 5, 9)), {"A": 1, "B": 2})
+        self.assertEqual(series.snapshot(date(2025, 4, 30)), {})
+        self.assertIsNone(series.value("A", date(2025, 4, 30)))
+
+
+class TestStandingsHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.history = StandingsHistory(STANDINGS, STATS)
+
+    def test_standings_as_of(self):
+        self.assertEqual(self.history.standings_as_of(date(2025, 5, 3)), [(1, "B", 8), (2, "A", 6)])
+        self.assertEqual(self.history.standings_as_of(date(2025, 4, 1)), [])
+
+    def test_points_gained(self):
+        self.assertEqual(self.history.points_gained("B", date(2025, 5, 1), date(2025, 5, 4)), 6)
+        # A team missing from the latest standings keeps its last known points
+        self.assertEqual(self.history.points_gained("A", date(2025, 5, 1), date(2025, 5, 30)), 1)
+        # Before the first snapshot counts from zero
+        self.assertEqual(self.history.points_gained("C", date(2025, 4, 1), date(2025, 5, 4)), 7)
+        self.assertIsNone(self.history.points_gained("Z", date(2025, 5, 1), date(2025, 5, 4)))
+
+    def test_rank_over_time(self):
+        self.assertEqual(self.history.rank_over_time("A"),
+                         [(date(2025, 5, 1), 1), (date(2025, 5, 2), 2), (date(2025, 5, 4), None)])
+        self.assertEqual(self.history.rank_over_time("B", start=date(2025, 5, 2), end=date(2025, 5, 3)),
+                         [(date(2025, 5, 2), 1)])
+
+    def test_player_points_gained(self):
+        self.assertEqual(self.history.player_points_gained("1", date(2025, 5, 1), date(2025, 5, 4)), 0)
+        self.assertEqual(self.history.player_points_gained(2, date(2025, 5, 1), date(2025, 5, 4)), 4)
+
+    def test_chart_series(self):
+        chart = self.history.chart_series(start=date(2025, 5, 2))
+        self.assertEqual(chart["labels"], ["2025-05-02", "2025-05-04"])
+        datasets = {dataset["label"]: dataset for dataset in chart["datasets"]}
+        self.assertEqual(datasets["A"]["data"], [6, 6])
+        self.assertEqual(datasets["A"]["ranks"], [2, None])
+        self.assertEqual(datasets["C"]["data"], [0, 7])
+        json.dumps(chart)
+
+
+class TestLoadStandingsHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_daily_files_fill_days_missing_from_the_log(self):
+        data_dir = os.path.join(self.tmp_dir, "data")
+        history_dir = os.path.join(self.tmp_dir, "history")
+        os.makedirs(data_dir)
+        HistoryStore("standings", history_dir).rewrite(STANDINGS[:2])
+        with open(os.path.join(data_dir, "standings-20250504.json"), "w") as f:
+            json.dump(STANDINGS[2][1], f, indent=4)
+
+        history = load_standings_history(data_dir, history_dir, include_players=False)
+        self.assertEqual(history.dates, [day for day, _ in STANDINGS])
+        self.assertEqual(history.standings_as_of(date(2025, 5, 4)), [(1, "B", 9), (2, "C", 7)])
+
+
+if __name__ == '__main__':
+    unittest.main()
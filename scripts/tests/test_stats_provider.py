@@ -0,0 +1,67 @@
+import unittest
+import os
+import tempfile
+import threading
+import time
+from unittest.mock import patch
+
+# Adjust sys.path to allow direct import of the module under test
+import sys
+SCRIPTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+import stats_provider
+from stats_provider import PlayerStatsProvider
+
+
+class TestPlayerStatsProvider(unittest.TestCase):
+
+    def setUp(self):
+        self.calls = []
+        self.calls_lock = threading.Lock()
+
+        def fake_fetch_landing(player_id, session, timeout, cache):
+            with self.calls_lock:
+                self.calls.append(player_id)
+            time.sleep(0.02)
+            return {"featuredStats": {}, "position": "C", "currentTeamAbbrev": "EDM", "careerTotals": {}}
+
+        patcher = patch.object(stats_provider, 'fetch_landing', side_effect=fake_fetch_landing)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_concurrent_callers_share_one_request(self):
+        provider = PlayerStatsProvider(workers=4)
+        threads = [threading.Thread(target=provider.get, args=("8478402",)) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.calls, ["8478402"])
+
+    def test_duplicate_ids_fetched_once(self):
+        provider = PlayerStatsProvider(workers=4)
+        results = provider.get_many(["1", "2", "1", "3", "2"])
+        self.assertEqual(sorted(self.calls), ["1", "2", "3"])
+        self.assertEqual(len(results), 5)
+        self.assertNotIn("careerTotals", results[0])
+
+    def test_results_shared_between_stages_of_one_run(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            run_file = os.path.join(tmp_dir, 'run.json')
+            first_stage = PlayerStatsProvider(run_id="run-1")
+            first_stage.get_many(["1", "2"])
+            first_stage.save_run(run_file)
+
+            second_stage = PlayerStatsProvider(run_id="run-1")
+            self.assertEqual(second_stage.load_run(run_file), 2)
+            second_stage.get_many(["1", "2", "3"])
+            self.assertEqual(sorted(self.calls), ["1", "2", "3"])
+
+            other_run = PlayerStatsProvider(run_id="run-2")
+            self.assertEqual(other_run.load_run(run_file), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 import os
+import argparse
 import json
 import requests
 import firebase_admin
@@ -10,11 +11,24 @@ import base64
 import io
 import tempfile
 
+from nhl_api import fetch_landing
+from landing_cache import open_landing_cache
+from stats_provider import PlayerStatsProvider
+from fetch_stats import parse_player_stats
+from scoring_rules import DEFAULT_SCORING, rules_for_leagues
+from rtdb import CountingReference, read_leagues
+from boxscores import update_ledger
+from club_stats import current_season
+from point_in_time import PointInTimeStats, parse_drafted_at
+
 # Setup logging
 logging.basicConfig(level=logging.INFO, 
                     format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Consolidated list of drafted players, read by fetch_stats.py
+DRAFTED_PLAYERS_FILE = 'data/playerlist_drafted_with_pre_acq_stats.json'
+
 # Initialize Firebase
 def initialize_firebase():
     """Initialize Firebase using service account credentials from environment variables"""
@@ -57,33 +71,19 @@ def initialize_firebase():
         logger.error(f"Error initializing Firebase from file path: {e}")
         exit(1)
 
-def fetch_nhl_player_stats(player_id):
+def fetch_nhl_player_stats(player_id, provider=None, rules=DEFAULT_SCORING):
     """Fetch player stats from NHL API. This is used to get CURRENT playoff points."""
     try:
-        # Updated NHL API URL
-        stats_url = f"https://api-web.nhle.com/v1/player/{player_id}/landing"
-        
-        response = requests.get(stats_url)
-        response.raise_for_status()
-        data = response.json()
+        # The shared provider makes sure each player is only requested once per run
+        data = provider.get(player_id) if provider is not None else fetch_landing(player_id)
+        if data is None:
+            raise requests.exceptions.RequestException("no usable response from the landing endpoint")
         
         # Only get playoff stats
-        featured_stats = data.get('featuredStats', {})
-        
-        # Check for playoffs
-        playoff_stats = featured_stats.get('playoffs', {}).get('subSeason', {})
-        if playoff_stats and playoff_stats.get('gamesPlayed', 0) > 0:
-            # Calculate points based on player type
-            position_code = data.get('position', {}).get('code', '')
-            
-            if position_code == 'G':  # Goalie
-                wins = playoff_stats.get('wins', 0)
-                shutouts = playoff_stats.get('shutouts', 0)
-                points = (wins * 2) + shutouts
-            else:  # Skater
-                goals = playoff_stats.get('goals', 0)
-                assists = playoff_stats.get('assists', 0)
-                points = goals + assists
+        playoff_stats = parse_player_stats(data)
+        if playoff_stats["Games Played"] > 0:
+            # Same scoring rules as the standings, so the two can never disagree
+            points = rules.score(playoff_stats)
             
             logger.info(f"Fetched playoff stats for player {player_id}: {points} points")
             return points
@@ -98,131 +98,197 @@ def fetch_nhl_player_stats(player_id):
         logger.error(f"Unexpected error processing player {player_id}: {e}")
         return 0  # Return 0 as default
 
-def process_drafted_players(database):
+def find_players_needing_pre_acq(leagues_snapshot, with_drafted_at=True):
+    """
+    Return the NHL player IDs (in league order, without duplicates) whose pre-acquisition stats must be fetched.
+    with_drafted_at=False leaves out entries with a draftedAt time, which point-in-time stats answer.
     """
-    Processes all drafted players from Firebase.
+    player_ids = []
+    for league_data in leagues_snapshot.values():
+        if not isinstance(league_data, dict) or not isinstance(league_data.get('draftedPlayers'), dict):
+            continue
+        for player_data in league_data['draftedPlayers'].values():
+            if not isinstance(player_data, dict) or not player_data.get('playerId'):
+                continue
+            playoff_round_drafted = player_data.get('playoffRoundDrafted', 0)
+            if playoff_round_drafted > 1 and player_data.get('preAcqRound', 0) < playoff_round_drafted \
+                    and (with_drafted_at or parse_drafted_at(player_data.get('draftedAt')) is None):
+                player_ids.append(str(player_data['playerId']))
+    return list(dict.fromkeys(player_ids))
+
+def collect_drafted_players(database, provider=None, leagues_snapshot=None, point_in_time=None, recompute=False):
+    """
+    Walks all drafted players from Firebase.
     If a player was drafted in an NHL playoff round > 1, and their stats prior to that round
     haven't been recorded yet, it fetches their current playoff stats and updates
-    `pointsBeforeAcquiring` and `preAcqRound` in Firebase.
-    It then writes a JSON file (`data/playerlist_drafted_with_pre_acq_stats.json`) 
-    containing all drafted players with these potentially updated stats.
+    `pointsBeforeAcquiring` and `preAcqRound` in Firebase with a single multi-path update.
+    With point_in_time (PointInTimeStats), players with a draftedAt time get their points as of
+    that moment instead, without a request; recompute=True also corrects points recorded earlier.
+    Returns (output_data, updated_count, skipped_count), where output_data holds every drafted
+    player keyed by NHL player ID (None if there are no leagues).
+    An already-read leagues_snapshot can be passed in; its entries are updated in place.
     """
-    try:
-        # Get all leagues
-        leagues_snapshot = database.child('leagues').get()
-        if not leagues_snapshot:
-            logger.warning("No leagues found in database")
-            return 0, 0
-        
-        logger.info(f"Found leagues: {list(leagues_snapshot.keys() if isinstance(leagues_snapshot, dict) else [])[:5]}")
+    # Get the drafted players of every league (not the chat/presence/draft nodes)
+    if leagues_snapshot is None:
+        leagues_snapshot = read_leagues(database)
+    if not leagues_snapshot:
+        logger.warning("No leagues found in database")
+        return None, 0, 0
+    
+    logger.info(f"Found leagues: {list(leagues_snapshot.keys() if isinstance(leagues_snapshot, dict) else [])[:5]}")
+    
+    # Fetch everyone who needs pre-acquisition stats up front, once per NHL player ID,
+    # even if they were drafted in several leagues
+    if provider is None:
+        provider = PlayerStatsProvider()
+    provider.prefetch(find_players_needing_pre_acq(leagues_snapshot, with_drafted_at=point_in_time is None))
+    # Pre-acquisition points are scored with each league's own rules
+    rules_by_league = rules_for_leagues(leagues_snapshot)
+    
+    # Prepare output data - this will be a dictionary of players, keyed by NHL player ID.
+    # It will contain all drafted players from all leagues, ensuring each player appears once
+    # with their latest pre-acquisition stats if applicable.
+    output_data = {}
+    updated_count = 0
+    skipped_count = 0
+    
+    league_count = 0
+    player_entries_count = 0
+    player_with_id_count = 0
+    
+    # Every Firebase change, keyed by path, sent together once all leagues are processed
+    pending_updates = {}
+    updated_entries = []
+    
+    # Find and process all drafted players across all leagues
+    for league_id, league_data in leagues_snapshot.items():
+        league_count += 1
+        logger.info(f"Processing league: {league_id}")
         
-        # Prepare output data - this will be a dictionary of players, keyed by NHL player ID.
-        # It will contain all drafted players from all leagues, ensuring each player appears once
-        # with their latest pre-acquisition stats if applicable.
-        output_data = {}
-        updated_count = 0
-        skipped_count = 0
+        if not isinstance(league_data, dict):
+            logger.info(f"League data for {league_id} is not a dictionary: {type(league_data)}")
+            continue
         
-        league_count = 0
-        player_entries_count = 0
-        player_with_id_count = 0
+        if 'draftedPlayers' not in league_data:
+            logger.info(f"No draftedPlayers found in league {league_id}")
+            continue
+            
+        drafted_players_in_league = league_data['draftedPlayers']
+        if not isinstance(drafted_players_in_league, dict):
+            logger.info(f"draftedPlayers in league {league_id} is not a dictionary: {type(drafted_players_in_league)}")
+            continue
         
-        # Find and process all drafted players across all leagues
-        for league_id, league_data in leagues_snapshot.items():
-            league_count += 1
-            logger.info(f"Processing league: {league_id}")
+        # Process all players in this league
+        for firebase_player_key, player_data in drafted_players_in_league.items():
+            player_entries_count += 1
             
-            if not isinstance(league_data, dict):
-                logger.info(f"League data for {league_id} is not a dictionary: {type(league_data)}")
+            if not isinstance(player_data, dict):
+                logger.info(f"Player data for {firebase_player_key} is not a dictionary: {type(player_data)}")
                 continue
             
-            if 'draftedPlayers' not in league_data:
-                logger.info(f"No draftedPlayers found in league {league_id}")
+            nhl_player_id = player_data.get("playerId")
+            if not nhl_player_id:
+                logger.info(f"No playerId found in player {firebase_player_key}")
                 continue
                 
-            drafted_players_in_league = league_data['draftedPlayers']
-            if not isinstance(drafted_players_in_league, dict):
-                logger.info(f"draftedPlayers in league {league_id} is not a dictionary: {type(drafted_players_in_league)}")
-                continue
+            player_with_id_count += 1
             
-            # Process all players in this league
-            for firebase_player_key, player_data in drafted_players_in_league.items():
-                player_entries_count += 1
+            # Get playoff round drafted (default to 0 if not set)
+            # playoffRoundDrafted is the NHL playoff round (1-4) in which the player was acquired by this team.
+            playoff_round_drafted = player_data.get('playoffRoundDrafted', 0)
+            # preAcqRound stores the NHL playoff round *for which* the pointsBeforeAcquiring were last calculated.
+            # This helps avoid re-calculating if the script runs multiple times for the same round.
+            pre_acq_round = player_data.get('preAcqRound', 0)
+            
+            logger.info(f"Found player {nhl_player_id} (Firebase key: {firebase_player_key}): Round drafted: {playoff_round_drafted}, PreAcqRound: {pre_acq_round}")
+            
+            # Update the master output_data. If a player is in multiple leagues,
+            # this ensures we have their latest pre-acquisition stats if they were updated.
+            if nhl_player_id not in output_data:
+                output_data[nhl_player_id] = player_data.copy() # Use a copy
+            else: # Player might be in multiple leagues; ensure we have the most up-to-date preAcq info
+                if player_data.get('preAcqRound', 0) > output_data[nhl_player_id].get('preAcqRound', 0):
+                    output_data[nhl_player_id]['pointsBeforeAcquiring'] = player_data.get('pointsBeforeAcquiring')
+                    output_data[nhl_player_id]['preAcqRound'] = player_data.get('preAcqRound')
+
+            # Logic to determine if pre-acquisition stats need to be fetched and updated:
+            # - Player must have been drafted in an NHL playoff round greater than 1.
+            # - The preAcqRound recorded for the player must be less than the round they were drafted in.
+            #   This means their pre-acquisition stats for *this specific* playoffRoundDrafted haven't been captured yet.
+            # - With recompute and point-in-time stats, entries with a draftedAt time are recalculated as well.
+            drafted_at = parse_drafted_at(player_data.get('draftedAt')) if point_in_time is not None else None
+            needs_update = playoff_round_drafted > 1 and pre_acq_round < playoff_round_drafted
+            if needs_update or (recompute and playoff_round_drafted > 1 and drafted_at is not None):
+                logger.info(f"Processing player {nhl_player_id}: drafted in NHL round {playoff_round_drafted}, preAcqRound currently {pre_acq_round}. Needs update.")
                 
-                if not isinstance(player_data, dict):
-                    logger.info(f"Player data for {firebase_player_key} is not a dictionary: {type(player_data)}")
-                    continue
+                if drafted_at is not None:
+                    # Points scored before the player was drafted, however late this runs
+                    points_before_acquiring = point_in_time.points_as_of(nhl_player_id, drafted_at, rules_by_league[league_id])
+                else:
+                    # Fetch current playoff stats from NHL API. These become the "points before acquiring" for this round.
+                    points_before_acquiring = fetch_nhl_player_stats(nhl_player_id, provider, rules_by_league[league_id])
                 
-                nhl_player_id = player_data.get("playerId")
-                if not nhl_player_id:
-                    logger.info(f"No playerId found in player {firebase_player_key}")
-                    continue
+                if not needs_update and points_before_acquiring == player_data.get('pointsBeforeAcquiring'):
+                    # Recomputed and unchanged: nothing to write
+                    skipped_count += 1
+                elif points_before_acquiring is not None: # fetch_nhl_player_stats returns 0 on error or no stats, not None unless truly exceptional.
+                    # Queue the update of this specific drafted player entry in Realtime Database
+                    player_path = f"leagues/{league_id}/draftedPlayers/{firebase_player_key}"
                     
-                player_with_id_count += 1
-                
-                # Get playoff round drafted (default to 0 if not set)
-                # playoffRoundDrafted is the NHL playoff round (1-4) in which the player was acquired by this team.
-                playoff_round_drafted = player_data.get('playoffRoundDrafted', 0)
-                # preAcqRound stores the NHL playoff round *for which* the pointsBeforeAcquiring were last calculated.
-                # This helps avoid re-calculating if the script runs multiple times for the same round.
-                pre_acq_round = player_data.get('preAcqRound', 0)
-                
-                logger.info(f"Found player {nhl_player_id} (Firebase key: {firebase_player_key}): Round drafted: {playoff_round_drafted}, PreAcqRound: {pre_acq_round}")
-                
-                # Update the master output_data. If a player is in multiple leagues,
-                # this ensures we have their latest pre-acquisition stats if they were updated.
-                if nhl_player_id not in output_data:
-                    output_data[nhl_player_id] = player_data.copy() # Use a copy
-                else: # Player might be in multiple leagues; ensure we have the most up-to-date preAcq info
-                    if player_data.get('preAcqRound', 0) > output_data[nhl_player_id].get('preAcqRound', 0):
-                        output_data[nhl_player_id]['pointsBeforeAcquiring'] = player_data.get('pointsBeforeAcquiring')
-                        output_data[nhl_player_id]['preAcqRound'] = player_data.get('preAcqRound')
-
-                # Logic to determine if pre-acquisition stats need to be fetched and updated:
-                # - Player must have been drafted in an NHL playoff round greater than 1.
-                # - The preAcqRound recorded for the player must be less than the round they were drafted in.
-                #   This means their pre-acquisition stats for *this specific* playoffRoundDrafted haven't been captured yet.
-                if playoff_round_drafted > 1 and pre_acq_round < playoff_round_drafted:
-                    logger.info(f"Processing player {nhl_player_id}: drafted in NHL round {playoff_round_drafted}, preAcqRound currently {pre_acq_round}. Needs update.")
+                    update_data = {
+                        'pointsBeforeAcquiring': points_before_acquiring,
+                        'preAcqRound': playoff_round_drafted # Mark that pre-acq stats for this round are now set
+                    }
                     
-                    # Fetch current playoff stats from NHL API. These become the "points before acquiring" for this round.
-                    points_before_acquiring = fetch_nhl_player_stats(nhl_player_id)
+                    for field, value in update_data.items():
+                        pending_updates[f"{player_path}/{field}"] = value
+                    updated_entries.append((player_data, update_data))
                     
-                    if points_before_acquiring is not None: # fetch_nhl_player_stats returns 0 on error or no stats, not None unless truly exceptional.
-                        # Update player data in Realtime Database for this specific drafted player entry
-                        player_ref = database.child(f"leagues/{league_id}/draftedPlayers/{firebase_player_key}")
-                        
-                        update_data = {
-                            'pointsBeforeAcquiring': points_before_acquiring,
-                            'preAcqRound': playoff_round_drafted # Mark that pre-acq stats for this round are now set
-                        }
-                        
-                        player_ref.update(update_data)
-                        logger.info(f"Updated Firebase at leagues/{league_id}/draftedPlayers/{firebase_player_key} with {update_data}")
-                        
-                        # Update the master output_data for this NHL player ID
-                        output_data[nhl_player_id]['pointsBeforeAcquiring'] = points_before_acquiring
-                        output_data[nhl_player_id]['preAcqRound'] = playoff_round_drafted
-                        
-                        updated_count += 1
-                        logger.info(f"Updated player {nhl_player_id} with {points_before_acquiring} points before acquiring for NHL round {playoff_round_drafted}")
-                else:
-                    logger.info(f"Skipping update for player {nhl_player_id}: playoffRoundDrafted={playoff_round_drafted}, preAcqRound={pre_acq_round}")
-                    skipped_count += 1
-        
-        logger.info(f"Found {league_count} leagues, {player_entries_count} player entries, {player_with_id_count} players with NHL IDs")
-        
-        # Ensure data directory exists
-        os.makedirs('data', exist_ok=True)
-        
-        # Write output_data (all unique drafted players with updated pre-acq stats) to the new JSON file
-        output_filename = 'data/playerlist_drafted_with_pre_acq_stats.json'
-        with open(output_filename, 'w') as f:
-            json.dump(output_data, f, indent=2)
-        
-        logger.info(f"Process complete: Updated {updated_count} players in Firebase, skipped {skipped_count} players (already up-to-date or R1 draft).")
-        logger.info(f"Saved consolidated drafted player data to {output_filename}")
-        
+                    # Update the master output_data for this NHL player ID
+                    output_data[nhl_player_id]['pointsBeforeAcquiring'] = points_before_acquiring
+                    output_data[nhl_player_id]['preAcqRound'] = playoff_round_drafted
+                    
+                    updated_count += 1
+                    logger.info(f"Updated player {nhl_player_id} with {points_before_acquiring} points before acquiring for NHL round {playoff_round_drafted}")
+            else:
+                logger.info(f"Skipping update for player {nhl_player_id}: playoffRoundDrafted={playoff_round_drafted}, preAcqRound={pre_acq_round}")
+                skipped_count += 1
+    
+    if pending_updates:
+        # One atomic multi-path update instead of a round trip per player
+        database.update(pending_updates)
+        logger.info(f"Updated {len(updated_entries)} drafted players in Firebase with one multi-path update")
+        # Keep the in-memory snapshot in step with Firebase for later per-league stages
+        for player_data, update_data in updated_entries:
+            player_data.update(update_data)
+    
+    logger.info(f"Found {league_count} leagues, {player_entries_count} player entries, {player_with_id_count} players with NHL IDs")
+    logger.info(f"Process complete: Updated {updated_count} players in Firebase, skipped {skipped_count} players (already up-to-date or R1 draft).")
+    
+    return output_data, updated_count, skipped_count
+
+def write_drafted_players(output_data, output_filename=DRAFTED_PLAYERS_FILE):
+    """Write the consolidated drafted player data consumed by fetch_stats.py"""
+    # Ensure data directory exists
+    os.makedirs(os.path.dirname(output_filename), exist_ok=True)
+    
+    # Write output_data (all unique drafted players with updated pre-acq stats) to the new JSON file
+    with open(output_filename, 'w') as f:
+        json.dump(output_data, f, indent=2)
+    
+    logger.info(f"Saved consolidated drafted player data to {output_filename}")
+
+def process_drafted_players(database, provider=None, point_in_time=None, recompute=False):
+    """
+    Processes all drafted players from Firebase (see collect_drafted_players) and writes
+    a JSON file (`data/playerlist_drafted_with_pre_acq_stats.json`) 
+    containing all drafted players with these potentially updated stats.
+    """
+    try:
+        output_data, updated_count, skipped_count = collect_drafted_players(database, provider, None, point_in_time,
+                                                                            recompute)
+        if output_data is not None:
+            write_drafted_players(output_data)
         return updated_count, skipped_count
     
     except Exception as e:
@@ -232,12 +298,38 @@ def process_drafted_players(database):
         return 0, 0
     
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Update pre-acquisition stats for drafted players")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Ignore the on-disk landing cache and fetch every player")
+    parser.add_argument("--run-id", default=None,
+                        help="Pipeline run ID under which fetched landing data is shared with fetch_stats.py "
+                             "(default: $PIPELINE_RUN_ID)")
+    parser.add_argument("--ledger", action="store_true",
+                        help="Record each player's points as of their draftedAt time, from the boxscore ledger")
+    parser.add_argument("--recompute-pre-acq", action="store_true",
+                        help="With --ledger, also correct pre-acquisition points that were already recorded")
+    args = parser.parse_args()
+    
     logger.info("Starting update_playerlist.py script")
     
-    # Initialize Firebase
-    db_connection = initialize_firebase() # Renamed variable to avoid conflict with 'db' module
+    # Initialize Firebase; reads and writes are counted for the summary at the end
+    db_connection = CountingReference(initialize_firebase()) # Renamed variable to avoid conflict with 'db' module
     
     # Process players
-    updated_players, skipped_players = process_drafted_players(db_connection) # Pass the connection
+    landing_cache = open_landing_cache(args.no_cache)
+    stats_provider = PlayerStatsProvider(landing_cache, run_id=args.run_id)
+    point_in_time = None
+    if args.ledger:
+        ledger = update_ledger(session=stats_provider.session)
+        point_in_time = PointInTimeStats.from_ledger(ledger, current_season())
+    updated_players, skipped_players = process_drafted_players(db_connection, stats_provider, point_in_time,
+                                                               args.recompute_pre_acq) # Pass the connection
+    stats_provider.save_run()
+    stats_provider.close()
+    stats_provider.log_summary()
+    if landing_cache is not None:
+        landing_cache.save()
+        landing_cache.log_summary()
+    db_connection.stats.log_summary()
     
     logger.info(f"Script completed: {updated_players} players updated, {skipped_players} players skipped")
@@ -1,15 +1,27 @@
 import os
-import requests
-import json
-from datetime import datetime
+import argparse
+import time
+from datetime import timedelta
 
-def fetch_playoff_stats(player_id):
-    """Fetch player playoff stats from NHL API"""
-    stats_url = f"https://api-web.nhle.com/v1/player/{player_id}/landing"
-    response = requests.get(stats_url)
-    if response.status_code == 200:
-        data = response.json()
-        
+from nhl_api import DEFAULT_WORKERS, DEFAULT_TIMEOUT, create_session, fetch_landing, fetch_landings
+from landing_cache import open_landing_cache, trim_landing
+from club_stats import fetch_club_landings
+from data_io import JsonArrayWriter, JsonlWriter, batched, iter_records, jsonl_path, jsonl_to_json
+from checkpoint import DEFAULT_MAX_AGE, CheckpointJournal, checkpoint_path
+from search_index import SEARCH_DIR, build_index_for_file
+from player_database import (RosterDelta, carry_forward_stats, load_player_index, stale_teams_since_last_build,
+                             write_delta_report)
+
+# Players fetched and written per batch in main(); memory use is bounded by this, not the pool size
+DEFAULT_BATCH_SIZE = 100
+
+
+class TimeLimitReached(Exception):
+    """--time-limit ran out; the journal keeps the finished fetches for --resume"""
+
+def parse_playoff_stats(data):
+    """Extract the playoff stat fields from a /landing payload (None means the fetch failed)"""
+    if data is not None:
         # Get playoff stats
         featured_stats = data.get('featuredStats', {})
         
@@ -97,7 +109,6 @@ def fetch_playoff_stats(player_id):
                 "gameWinningGoals": 0
             }
     else:
-        print(f"Failed to fetch stats for player {player_id}. Status code: {response.status_code}")
         # Return basic zero stats as fallback
         return {
             "gamesPlayed": 0,
@@ -106,7 +117,76 @@ def fetch_playoff_stats(player_id):
             "points": 0
         }
 
-def main():
+def fetch_playoff_stats(player_id, session=None, timeout=DEFAULT_TIMEOUT, cache=None):
+    """Fetch player playoff stats from NHL API"""
+    return parse_playoff_stats(fetch_landing(player_id, session, timeout, cache))
+
+def apply_playoff_stats(player, landing):
+    """Overwrite a player's regular season stats with playoff stats; True if they have playoff games"""
+    playoff_stats = parse_playoff_stats(landing)
+    
+    # Update player data with playoff stats (overwriting the regular season stats)
+    for key, value in playoff_stats.items():
+        if key in player:
+            player[key] = value
+    return playoff_stats.get("gamesPlayed", 0) > 0
+
+def fetch_batch_landings(players, session, cache, args, club_landings, fetched_teams, journal=None, resumed=None):
+    """
+    Landing payloads for a batch of players, aligned with it. With --club-stats, each team's
+    listing is requested once, the first time one of its players comes up. Players in `resumed`
+    (from the checkpoint journal) are not fetched again; every new /landing fetch is journaled.
+    """
+    resumed = resumed or {}
+    
+    def record(player_id, data):
+        if data is not None and journal is not None:
+            journal.record(player_id, trim_landing(data))
+    
+    if args.club_stats:
+        new_teams = {player.get('teamAbbreviation') for player in players} - fetched_teams
+        if new_teams:
+            club_landings.update(fetch_club_landings(new_teams, session=session, workers=args.workers,
+                                                     timeout=args.timeout))
+            fetched_teams.update(new_teams)
+    landing_ids = [player['id'] for player in players
+                   if str(player['id']) not in club_landings and str(player['id']) not in resumed]
+    landings_by_id = dict(zip(landing_ids, fetch_landings(landing_ids, workers=args.workers, timeout=args.timeout,
+                                                          session=session, cache=cache, on_result=record)))
+    # Club and resumed entries are dropped once used so they do not pile up over the run
+    return [club_landings.pop(str(player['id']), None) or resumed.pop(str(player['id']), None)
+            or landings_by_id.get(player['id']) for player in players]
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build nhl_playoff_players.json from nhl_players.json")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"Number of concurrent NHL API requests (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT,
+                        help=f"Per-request timeout in seconds (default: {DEFAULT_TIMEOUT})")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Ignore the on-disk landing cache and fetch every player")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only refetch new and moved players and teams that played since the last build")
+    parser.add_argument("--club-stats", action="store_true",
+                        help="Take playoff stats from one club stats listing per team and fetch /landing only for "
+                             "players it does not list (powerPlayPoints is not in the listings and reads as 0)")
+    parser.add_argument("--stream", action="store_true",
+                        help="Write nhl_playoff_players.jsonl one player per line (read nhl_players.jsonl if present), "
+                             "then convert it to the nhl_playoff_players.json array")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"Players fetched and written at a time (default: {DEFAULT_BATCH_SIZE})")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip players an interrupted earlier run already fetched (see --resume-max-age)")
+    parser.add_argument("--resume-max-age", type=float, default=DEFAULT_MAX_AGE.total_seconds() / 3600,
+                        help=f"Hours a fetch from an interrupted run stays usable (default: {DEFAULT_MAX_AGE.total_seconds() / 3600:g})")
+    parser.add_argument("--time-limit", type=float, default=None,
+                        help="Stop after this many seconds without writing the output; rerun with --resume to continue. "
+                             "Splits a full refresh across several short runs")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    
     # Get the directory of the current script
     script_dir = os.path.dirname(os.path.abspath(__file__))
     
@@ -119,60 +199,102 @@ def main():
     # Input and output file paths
     input_file = os.path.join(data_dir, "nhl_players.json")
     output_file = os.path.join(data_dir, "nhl_playoff_players.json")
+    report_file = os.path.join(data_dir, "player-database-delta.json")
+    if args.stream and os.path.exists(jsonl_path(input_file)):
+        input_file = jsonl_path(input_file)
     
     print(f"Looking for input file at: {input_file}")
-    
-    # Load regular season player data
-    try:
-        with open(input_file, "r") as file:
-            players_data = json.load(file)
-    except FileNotFoundError:
+    if not os.path.exists(input_file):
         print(f"Error: {input_file} not found.")
         return
     
-    print(f"Loaded data from {input_file}")
+    # Diff against the existing output; in incremental mode players who have not moved or
+    # played since it was built keep their playoff stats from it (otherwise only teams are kept)
+    existing_by_id = load_player_index(output_file, with_stats=args.incremental)
+    stale_teams = stale_teams_since_last_build(output_file, report_file) if args.incremental else None
+    tracker = RosterDelta(existing_by_id, stale_teams)
     
     # Track processing statistics
+    players_seen = 0
     players_processed = 0
     players_with_playoff_stats = 0
     
-    # Process each player
-    for i, player in enumerate(players_data):
-        # Get player ID
-        player_id = player.get('id')
-        
-        if not player_id:
-            player_name = player.get('fullName', f"Player {i+1}")
-            print(f"Skipping player {player_name} due to missing player ID.")
-            continue
-        
-        player_name = player.get('fullName', f"Player {player_id}")
-        
-        print(f"[{i+1}/{len(players_data)}] Fetching playoff stats for {player_name} (ID: {player_id})")
-        
-        # Fetch playoff stats
-        playoff_stats = fetch_playoff_stats(player_id)
-        
-        # Check if player has playoff stats
-        if playoff_stats.get("gamesPlayed", 0) > 0:
-            players_with_playoff_stats += 1
-        
-        # Update player data with playoff stats (overwriting the regular season stats)
-        for key, value in playoff_stats.items():
-            if key in player:
-                player[key] = value
-        
-        players_processed += 1
+    # Every finished fetch is journaled so an interrupted or time-limited run can be resumed
+    journal = CheckpointJournal(checkpoint_path('update_playoff_playerlist'))
+    resumed = {}
+    if args.resume:
+        resumed = journal.load(timedelta(hours=args.resume_max_age))
+        print(f"Resuming: {len(resumed)} players already fetched")
+    else:
+        journal.clear()
+    deadline = time.monotonic() + args.time_limit if args.time_limit else None
+    
+    cache = open_landing_cache(args.no_cache)
+    session = create_session(args.workers)
+    club_landings, fetched_teams = {}, set()
+    # Players are read, fetched and written a batch at a time, in file order. The output only
+    # replaces the old file once every batch is done.
+    writer = JsonlWriter(jsonl_path(output_file)) if args.stream else JsonArrayWriter(output_file, indent=4)
+    finished = True
+    try:
+        with writer:
+            for batch in batched(iter_records(input_file), max(1, args.batch_size)):
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise TimeLimitReached()
+                to_fetch = []
+                for player in batch:
+                    players_seen += 1
+                    # Get player ID
+                    player_id = player.get('id')
+                    if not player_id:
+                        player_name = player.get('fullName', f"Player {players_seen}")
+                        print(f"Skipping player {player_name} due to missing player ID.")
+                    elif tracker.add(player):
+                        to_fetch.append(player)
+                    else:
+                        carry_forward_stats(player, existing_by_id[player_id])
+                
+                landings = fetch_batch_landings(to_fetch, session, cache, args, club_landings, fetched_teams,
+                                                journal, resumed)
+                for player, landing in zip(to_fetch, landings):
+                    if apply_playoff_stats(player, landing):
+                        players_with_playoff_stats += 1
+                    players_processed += 1
+                print(f"[{players_seen}] Fetched playoff stats for {players_processed} players using {args.workers} workers")
+                
+                for player in batch:
+                    writer.write(player)
+    except TimeLimitReached:
+        finished = False
+    finally:
+        session.close()
+        journal.close()
     
-    # Save updated data with playoff stats
-    with open(output_file, "w") as file:
-        json.dump(players_data, file, indent=4)
+    if cache is not None:
+        cache.save()
+        cache_stats = cache.stats()
+        print(f"Landing cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+              f"{cache_stats['revalidations']} revalidated")
+    
+    if not finished:
+        print(f"\nTime limit reached after {players_seen - len(batch)} players; {output_file} was not changed. "
+              f"Rerun with --resume to continue.")
+        return
+    
+    if args.stream:
+        # The front end reads the legacy array
+        jsonl_to_json(jsonl_path(output_file), output_file, indent=4)
     
     print(f"\nProcessing summary:")
     print(f"- Total players processed: {players_processed}")
     print(f"- Players with playoff stats: {players_with_playoff_stats}")
     print(f"- Players without playoff stats: {players_processed - players_with_playoff_stats}")
     print(f"\nSuccessfully saved playoff stats to {output_file}")
+    
+    write_delta_report(output_file, tracker.finish(), session.requests_sent, report_file)
+    build_index_for_file(output_file, os.path.join(parent_dir, SEARCH_DIR))
+    # The output is final, so nothing is left to resume
+    journal.clear()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file